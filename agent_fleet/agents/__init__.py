@@ -1,3 +1,14 @@
+from .async_codex_runner import AsyncCodexRunner
 from .codex_runner import CodexRunResult, CodexRunner
+from .json_codec import JsonCodec, json_codec
+from .multiplexer import OutputBatches, OutputMultiplexer
 
-__all__ = ["CodexRunner", "CodexRunResult"]
+__all__ = [
+    "AsyncCodexRunner",
+    "CodexRunner",
+    "CodexRunResult",
+    "JsonCodec",
+    "OutputBatches",
+    "OutputMultiplexer",
+    "json_codec",
+]
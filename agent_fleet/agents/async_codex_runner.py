@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+import signal
+import sys
+import time
+import warnings
+from typing import Sequence
+
+from agent_fleet.agents.codex_runner import (
+    EVENT_PAYLOAD_MODES,
+    CodexRunResult,
+    build_codex_command,
+    parse_event_line,
+)
+from agent_fleet.agents.json_codec import JsonCodec, json_codec
+from agent_fleet.observability.timings import StageTimer
+from agent_fleet.persistence.event_writer import ExecutionEventWriter
+from agent_fleet.persistence.repository import SQLiteRepository
+
+# Codex `--json` lines carry whole command outputs; asyncio's default 64 KiB
+# line limit is far too small for them.
+STREAM_LINE_LIMIT_BYTES = 16 * 1024 * 1024
+_READ_SIZE = 64 * 1024
+
+
+def install_pidfd_child_watcher() -> bool:
+    """Reap agent processes through pidfds instead of a waitpid thread per process.
+
+    Python 3.11's default `ThreadedChildWatcher` starts one thread per child,
+    which defeats running many agents on one loop. Python 3.12+ already uses
+    pidfds when the kernel supports them, so this only acts on older versions.
+    Must be called from inside the running loop. Returns whether it was installed.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(asyncio.get_running_loop())
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        asyncio.set_child_watcher(watcher)
+    return True
+
+
+class AsyncCodexRunner:
+    """`CodexRunner` for an asyncio event loop.
+
+    Output pipes are read by stream readers on the loop instead of two reader
+    threads per execution, so one loop can drive hundreds of concurrent agents.
+    Events go through the same `ExecutionEventWriter` and are parsed exactly
+    as `CodexRunner` does. Database calls run in the loop's default executor.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        *,
+        command: Sequence[str] = ("codex", "exec", "--json"),
+        event_writer: ExecutionEventWriter | None = None,
+        event_payloads: str = "normalized",
+        codec: JsonCodec | None = None,
+    ) -> None:
+        if event_payloads not in EVENT_PAYLOAD_MODES:
+            raise ValueError(f"unknown event payload mode: {event_payloads!r}")
+        self.repository = repository
+        self.command = tuple(command)
+        self.event_writer = event_writer or ExecutionEventWriter(repository)
+        self.event_payloads = event_payloads
+        self.codec = codec or json_codec()
+
+    async def run(
+        self,
+        *,
+        execution_id: str,
+        prompt: str,
+        working_dir: str | Path,
+    ) -> CodexRunResult:
+        working_dir_path = Path(working_dir)
+        command = build_codex_command(self.command, working_dir=working_dir_path, prompt=prompt)
+        timer = StageTimer()
+        spawn_started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=working_dir_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            stdin=asyncio.subprocess.DEVNULL,
+            # Own process group, so a failed run can kill the agent's children too.
+            start_new_session=True,
+        )
+        process_started = time.perf_counter()
+        await asyncio.to_thread(
+            self.repository.mark_execution_running,
+            execution_id=execution_id,
+            process_id=process.pid,
+        )
+        timer.add("spawn", time.perf_counter() - spawn_started)
+
+        # Both readers run on the loop thread, so the shared counters need no lock.
+        sequence = [0]
+        summary = {"json_events": 0, "stdout_lines": 0, "stderr_lines": 0}
+        readers = [
+            asyncio.ensure_future(
+                self._consume(stream, source, execution_id, sequence, summary, timer, process_started)
+            )
+            for stream, source in ((process.stdout, "stdout"), (process.stderr, "stderr"))
+        ]
+        try:
+            await asyncio.gather(*readers)
+            exit_code = await process.wait()
+            timer.add("agent", time.perf_counter() - process_started)
+        except BaseException:
+            # Cancellation or a failed reader (e.g. an over-long line): stop the
+            # other reader and never leave the agent running or unreaped.
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            _kill_process_group(process)
+            # Waits for the pipes to close as well, i.e. for the whole group.
+            await process.wait()
+            raise
+
+        # Every streamed event must be durable before the execution is marked finished.
+        flush_started = time.perf_counter()
+        await asyncio.to_thread(self.event_writer.flush, execution_id)
+        finalize_started = time.perf_counter()
+        timer.add("flush", finalize_started - flush_started)
+        if exit_code == 0:
+            mark_finished = self.repository.mark_execution_succeeded
+        else:
+            mark_finished = self.repository.mark_execution_failed
+        await asyncio.to_thread(mark_finished, execution_id=execution_id, exit_code=exit_code)
+        timer.add("finalize", time.perf_counter() - finalize_started)
+        return CodexRunResult(exit_code=exit_code, summary=summary, timings=timer.durations)
+
+    async def _consume(
+        self,
+        stream: asyncio.StreamReader | None,
+        source: str,
+        execution_id: str,
+        sequence: list[int],
+        summary: dict[str, int],
+        timer: StageTimer,
+        process_started: float,
+    ) -> None:
+        if stream is None:
+            return
+        pending = bytearray()
+        while True:
+            chunk = await stream.read(_READ_SIZE)
+            ingest_started = time.perf_counter()
+            if chunk:
+                pending += chunk
+                end = pending.rfind(b"\n") + 1
+                complete = bytes(pending[:end]).split(b"\n")[:-1]
+                del pending[:end]
+                if len(pending) > STREAM_LINE_LIMIT_BYTES:
+                    raise ValueError(f"agent {source} line exceeds {STREAM_LINE_LIMIT_BYTES} bytes")
+                lines = [_decode(raw) + "\n" for raw in complete]
+            else:
+                lines = [_decode(bytes(pending))] if pending else []
+            if lines:
+                if sequence[0] == 0:
+                    timer.add("first_event", ingest_started - process_started)
+                events = []
+                for line in lines:
+                    sequence[0] += 1
+                    event_source, event_type, payload = parse_event_line(
+                        line,
+                        source=source,
+                        event_payloads=self.event_payloads,
+                        codec=self.codec,
+                    )
+                    if event_source == "json":
+                        summary["json_events"] += 1
+                    elif event_source == "stderr":
+                        summary["stderr_lines"] += 1
+                    else:
+                        summary["stdout_lines"] += 1
+                    events.append(
+                        {
+                            "execution_id": execution_id,
+                            "sequence_number": sequence[0],
+                            "source": event_source,
+                            "event_type": event_type,
+                            "payload": payload,
+                        }
+                    )
+                # Hand off on the loop; only a writer at capacity is waited for in a
+                # thread, so backpressure never stalls lease renewal or other executions.
+                if not self.event_writer.try_put_many(events):
+                    await asyncio.to_thread(self.event_writer.put_many, events)
+                timer.add("ingest", time.perf_counter() - ingest_started)
+            if not chunk:
+                return
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        if process.returncode is None:
+            process.kill()
+
+
+def _decode(line: bytes) -> str:
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line.decode("utf-8", errors="replace")
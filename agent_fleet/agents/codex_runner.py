@@ -1,33 +1,68 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import json
 from queue import Queue
 import subprocess
 import threading
+import time
 from pathlib import Path
-from typing import IO, Sequence
+from typing import IO, Iterable, Iterator, Sequence
 
+from agent_fleet.agents.json_codec import JsonCodec, json_codec
+from agent_fleet.agents.multiplexer import OutputMultiplexer
+from agent_fleet.observability.timings import StageTimer
+from agent_fleet.persistence.event_writer import ExecutionEventWriter
 from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.workspace.git_facts import git_facts
+
+EVENT_PAYLOAD_MODES = ("normalized", "verbatim")
+
+# A JSON text can only start with one of these characters; anything else is
+# raw output and skips the parser entirely.
+_JSON_START_CHARACTERS = frozenset('{["-0123456789tfn \t\r')
+_TYPE_PREFIX = '{"type":"'
+_SUMMARY_KEYS = {"json": "json_events", "stderr": "stderr_lines"}
 
 
 @dataclass(frozen=True, slots=True)
 class CodexRunResult:
     exit_code: int
     summary: dict[str, int]
+    # Stage durations in seconds; see `agent_fleet.observability.timings`.
+    timings: dict[str, float] = field(default_factory=dict)
 
 
 class CodexRunner:
-    """Adapter that runs Codex and persists streamed execution events."""
+    """Adapter that runs Codex and persists streamed execution events.
+
+    In `normalized` payload mode JSON events are re-serialized with sorted
+    keys by the stdlib `json` module; `verbatim` mode stores the original line once it has been
+    validated, which avoids a second serialization per event.
+
+    Output is read by two threads per execution unless a shared
+    `OutputMultiplexer` is given, in which case one thread serves the pipes
+    of every execution and lines arrive in batches.
+    """
 
     def __init__(
         self,
         repository: SQLiteRepository,
         *,
         command: Sequence[str] = ("codex", "exec", "--json"),
+        event_writer: ExecutionEventWriter | None = None,
+        event_payloads: str = "normalized",
+        codec: JsonCodec | None = None,
+        multiplexer: OutputMultiplexer | None = None,
     ) -> None:
+        if event_payloads not in EVENT_PAYLOAD_MODES:
+            raise ValueError(f"unknown event payload mode: {event_payloads!r}")
         self.repository = repository
         self.command = tuple(command)
+        self.event_writer = event_writer or ExecutionEventWriter(repository)
+        self.event_payloads = event_payloads
+        self.codec = codec or json_codec()
+        self.multiplexer = multiplexer
 
     def run(
         self,
@@ -37,89 +72,129 @@ class CodexRunner:
         working_dir: str | Path,
     ) -> CodexRunResult:
         working_dir_path = Path(working_dir)
-        command = [*self.command]
-
-        # Allow execution outside git when needed; policy prompt still enforces
-        # commit/push/PR behavior when inside git repositories.
-        if not _is_git_repo(working_dir_path) and _looks_like_codex_command(command):
-            command.append("--skip-git-repo-check")
-
-        command.append(prompt)
+        command = build_codex_command(self.command, working_dir=working_dir_path, prompt=prompt)
 
+        # The multiplexer reads raw bytes; the reader threads use text-mode pipes.
+        text_mode = self.multiplexer is None
+        timer = StageTimer()
+        spawn_started = time.perf_counter()
         process = subprocess.Popen(
             command,
             cwd=working_dir_path,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             stdin=subprocess.DEVNULL,
-            text=True,
-            bufsize=1,
+            text=text_mode,
+            bufsize=1 if text_mode else 0,
         )
+        process_started = time.perf_counter()
         self.repository.mark_execution_running(execution_id=execution_id, process_id=process.pid)
+        timer.add("spawn", time.perf_counter() - spawn_started)
 
-        output_queue: Queue[tuple[str, str] | None] = Queue()
-        readers = [
-            threading.Thread(
-                target=_enqueue_lines,
-                args=(process.stdout, "stdout", output_queue),
-                daemon=True,
-            ),
-            threading.Thread(
-                target=_enqueue_lines,
-                args=(process.stderr, "stderr", output_queue),
-                daemon=True,
-            ),
-        ]
-        for reader in readers:
-            reader.start()
+        if self.multiplexer is None:
+            batches: Iterable[list[tuple[str, str]]] = _threaded_line_batches(process)
+        else:
+            batches = self.multiplexer.watch(process.stdout, process.stderr)
 
         sequence_number = 0
         summary = {"json_events": 0, "stdout_lines": 0, "stderr_lines": 0}
-        completed_readers = 0
-        while completed_readers < len(readers):
-            item = output_queue.get()
-            if item is None:
-                completed_readers += 1
-                continue
-
-            source, line = item
-            sequence_number += 1
-            event_source, event_type, payload = self._parse_event_line(source=source, line=line)
-            if event_source == "json":
-                summary["json_events"] += 1
-            elif event_source == "stderr":
-                summary["stderr_lines"] += 1
+        for batch in batches:
+            ingest_started = time.perf_counter()
+            if sequence_number == 0:
+                timer.add("first_event", ingest_started - process_started)
+            events = []
+            for source, line in batch:
+                sequence_number += 1
+                event_source, event_type, payload = self._parse_event_line(source=source, line=line)
+                summary[_SUMMARY_KEYS.get(event_source, "stdout_lines")] += 1
+                events.append(
+                    {
+                        "execution_id": execution_id,
+                        "sequence_number": sequence_number,
+                        "source": event_source,
+                        "event_type": event_type,
+                        "payload": payload,
+                    }
+                )
+            self.event_writer.put_many(events)
+            timer.add("ingest", time.perf_counter() - ingest_started)
+
+        exit_code = process.wait()
+        timer.add("agent", time.perf_counter() - process_started)
+        # Every streamed event must be durable before the execution is marked finished.
+        with timer.stage("flush"):
+            self.event_writer.flush(execution_id)
+        with timer.stage("finalize"):
+            if exit_code == 0:
+                self.repository.mark_execution_succeeded(execution_id=execution_id, exit_code=exit_code)
             else:
-                summary["stdout_lines"] += 1
+                self.repository.mark_execution_failed(execution_id=execution_id, exit_code=exit_code)
+        return CodexRunResult(exit_code=exit_code, summary=summary, timings=timer.durations)
 
-            self.repository.append_execution_event(
-                execution_id=execution_id,
-                sequence_number=sequence_number,
-                source=event_source,
-                event_type=event_type,
-                payload=payload,
-            )
+    def _parse_event_line(self, *, source: str, line: str) -> tuple[str, str, str]:
+        return parse_event_line(line, source=source, event_payloads=self.event_payloads, codec=self.codec)
 
-        exit_code = process.wait()
-        if exit_code == 0:
-            self.repository.mark_execution_succeeded(execution_id=execution_id, exit_code=exit_code)
-        else:
-            self.repository.mark_execution_failed(execution_id=execution_id, exit_code=exit_code)
-        return CodexRunResult(exit_code=exit_code, summary=summary)
-
-    @staticmethod
-    def _parse_event_line(*, source: str, line: str) -> tuple[str, str, str]:
-        stripped = line.rstrip("\n")
-        try:
-            payload = json.loads(stripped)
-        except json.JSONDecodeError:
-            return source, "raw_text", stripped
-
-        if isinstance(payload, dict):
-            event_type = payload.get("type") or payload.get("event_type") or "json_event"
-        else:
-            event_type = "json_event"
-        return "json", _normalize_event_type(str(event_type)), json.dumps(payload, sort_keys=True)
+
+def build_codex_command(base_command: Sequence[str], *, working_dir: Path, prompt: str) -> list[str]:
+    command = [*base_command]
+    # Allow execution outside git when needed; policy prompt still enforces
+    # commit/push/PR behavior when inside git repositories.
+    if not git_facts(working_dir).is_repo and _looks_like_codex_command(command):
+        command.append("--skip-git-repo-check")
+    command.append(prompt)
+    return command
+
+
+def parse_event_line(
+    line: str,
+    *,
+    source: str,
+    event_payloads: str,
+    codec: JsonCodec,
+) -> tuple[str, str, str]:
+    """Classify one output line as `(event_source, event_type, payload)`."""
+    stripped = line.rstrip("\n")
+    if not stripped or stripped[0] not in _JSON_START_CHARACTERS:
+        return source, "raw_text", stripped
+    # Normalized payloads always go through the stdlib so the stored text does
+    # not depend on the installed backend; the codec only speeds up validation.
+    loads = codec.loads if event_payloads == "verbatim" else json.loads
+    try:
+        payload = loads(stripped)
+    except json.JSONDecodeError:
+        return source, "raw_text", stripped
+
+    if event_payloads == "verbatim":
+        event_type = _scan_event_type(stripped) or _event_type(payload)
+        return "json", _normalize_event_type(event_type), stripped
+    return "json", _normalize_event_type(_event_type(payload)), json.dumps(payload, sort_keys=True)
+
+
+def _threaded_line_batches(process: subprocess.Popen[str]) -> Iterator[list[tuple[str, str]]]:
+    """Read both pipes with one thread each, yielding every line as its own batch."""
+    output_queue: Queue[tuple[str, str] | None] = Queue()
+    readers = [
+        threading.Thread(
+            target=_enqueue_lines,
+            args=(process.stdout, "stdout", output_queue),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_enqueue_lines,
+            args=(process.stderr, "stderr", output_queue),
+            daemon=True,
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+
+    completed_readers = 0
+    while completed_readers < len(readers):
+        item = output_queue.get()
+        if item is None:
+            completed_readers += 1
+            continue
+        yield [item]
 
 
 def _enqueue_lines(
@@ -139,6 +214,24 @@ def _enqueue_lines(
         output_queue.put(None)
 
 
+def _event_type(payload: object) -> str:
+    if isinstance(payload, dict):
+        return str(payload.get("type") or payload.get("event_type") or "json_event")
+    return "json_event"
+
+
+def _scan_event_type(line: str) -> str | None:
+    # Codex emits compact objects whose first key is `type`; read it straight
+    # from the line instead of walking the parsed object.
+    if not line.startswith(_TYPE_PREFIX):
+        return None
+    end = line.find('"', len(_TYPE_PREFIX))
+    value = line[len(_TYPE_PREFIX) : end]
+    if end < 0 or not value or "\\" in value:
+        return None
+    return value
+
+
 def _normalize_event_type(value: str) -> str:
     normalized = []
     for character in value.lower():
@@ -149,17 +242,6 @@ def _normalize_event_type(value: str) -> str:
     return "".join(normalized).strip("_") or "json_event"
 
 
-def _is_git_repo(path: Path) -> bool:
-    result = subprocess.run(
-        ["git", "rev-parse", "--is-inside-work-tree"],
-        cwd=path,
-        check=False,
-        capture_output=True,
-        text=True,
-    )
-    return result.returncode == 0 and result.stdout.strip() == "true"
-
-
 def _looks_like_codex_command(command: Sequence[str]) -> bool:
     if not command:
         return False
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from typing import Any, Callable
+
+JSON_CODEC_NAMES = ("orjson", "json")
+
+
+@dataclass(frozen=True, slots=True)
+class JsonCodec:
+    """JSON backend used to validate and parse agent events in `verbatim` payload mode.
+
+    `loads` accepts exactly what the stdlib `json.loads` accepts and raises
+    `json.JSONDecodeError` (or a subclass of it) otherwise, for every backend.
+    `normalized` payloads are always produced by the stdlib so the stored text
+    never depends on which backend is installed.
+    """
+
+    name: str
+    loads: Callable[[str], Any]
+
+
+_STDLIB_CODEC = JsonCodec(name="json", loads=json.loads)
+
+
+def json_codec(name: str | None = None) -> JsonCodec:
+    """Return the named backend, or the fastest installed one when `name` is None."""
+    if name is None:
+        try:
+            return json_codec("orjson")
+        except ValueError:
+            return _STDLIB_CODEC
+    if name == "json":
+        return _STDLIB_CODEC
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError as exc:
+            raise ValueError("orjson JSON backend is not installed") from exc
+        return JsonCodec(name="orjson", loads=_with_stdlib_fallback(orjson.loads, orjson.JSONDecodeError))
+    raise ValueError(f"unknown JSON backend: {name!r}")
+
+
+def _with_stdlib_fallback(
+    loads: Callable[[str], Any],
+    error: type[Exception],
+) -> Callable[[str], Any]:
+    def _loads(text: str) -> Any:
+        try:
+            return loads(text)
+        except error:
+            # orjson is stricter than the stdlib (NaN, Infinity, lone surrogates);
+            # re-check so both backends accept the same lines.
+            return json.loads(text)
+
+    return _loads
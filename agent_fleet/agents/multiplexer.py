@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import os
+from queue import Queue
+import selectors
+import threading
+from typing import IO, Callable, Iterator
+
+_READ_SIZE = 64 * 1024
+_MAX_PENDING_LINES = 10_000
+
+Line = tuple[str, str]
+
+
+class OutputBatches:
+    """Lines of one process's stdout and stderr, delivered in batches.
+
+    Iterating yields lists of `(source, line)` in arrival order and stops
+    once both pipes are closed. When more than `max_pending_lines` lines are
+    waiting, the multiplexer stops reading this process's pipes until half
+    of them have been consumed, so a slow consumer blocks its own agent in
+    the OS pipe buffer instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        max_pending_lines: int = _MAX_PENDING_LINES,
+        resume: Callable[[list[_Pipe]], None] | None = None,
+    ) -> None:
+        self._queue: Queue[list[Line] | None] = Queue()
+        self._open_pipes = 0
+        self._pipes: list[_Pipe] = []
+        self._max_pending_lines = max_pending_lines
+        self._resume = resume
+        self._lock = threading.Lock()
+        self._pending_lines = 0
+        self._paused: list[_Pipe] = []
+
+    def __iter__(self) -> Iterator[list[Line]]:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            with self._lock:
+                self._pending_lines -= len(batch)
+                resumed: list[_Pipe] = []
+                if self._paused and self._pending_lines <= self._max_pending_lines // 2:
+                    resumed, self._paused = self._paused, []
+            if resumed and self._resume is not None:
+                self._resume(resumed)
+            yield batch
+
+    def _deliver(self, lines: list[Line]) -> list[_Pipe]:
+        """Queue `lines` (reader thread); returns the open pipes to pause when over the limit."""
+        with self._lock:
+            self._pending_lines += len(lines)
+            if not self._paused and self._pending_lines > self._max_pending_lines:
+                self._paused = [pipe for pipe in self._pipes if not pipe.stream.closed]
+                paused = list(self._paused)
+            else:
+                paused = []
+        self._queue.put(lines)
+        return paused
+
+
+@dataclass(slots=True, eq=False)
+class _Pipe:
+    stream: IO[bytes]
+    source: str
+    batches: OutputBatches
+    partial: bytes = field(default=b"")
+
+
+class OutputMultiplexer:
+    """Reads the output pipes of every running agent process from one thread.
+
+    A `selectors` loop (epoll on Linux) replaces the two reader threads per
+    execution. Each select round reads every ready pipe once and hands each
+    process the complete lines it produced as a single batch, so consumers
+    pay one queue hand-off per batch instead of per line. Shared by all
+    runners of an orchestrator; the thread starts on first use.
+
+    `max_pending_lines` bounds the unconsumed lines per process; see
+    `OutputBatches`.
+    """
+
+    def __init__(
+        self,
+        *,
+        read_size: int = _READ_SIZE,
+        max_pending_lines: int = _MAX_PENDING_LINES,
+    ) -> None:
+        if max_pending_lines < 1:
+            raise ValueError(f"max_pending_lines must be at least 1, got {max_pending_lines}")
+        self.read_size = read_size
+        self.max_pending_lines = max_pending_lines
+        self._lock = threading.Lock()
+        self._pending: list[_Pipe] = []
+        # Pipes unregistered for backpressure; close() waits for them as well.
+        self._paused_pipes = 0
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._wake_reader, self._wake_writer = os.pipe()
+        os.set_blocking(self._wake_reader, False)
+        os.set_blocking(self._wake_writer, False)
+
+    def watch(self, stdout: IO[bytes] | None, stderr: IO[bytes] | None) -> OutputBatches:
+        """Start reading a process's binary pipes; they are closed at EOF."""
+        batches = OutputBatches(self.max_pending_lines, self._resume)
+        pipes = [
+            _Pipe(stream, source, batches)
+            for stream, source in ((stdout, "stdout"), (stderr, "stderr"))
+            if stream is not None
+        ]
+        if not pipes:
+            batches._queue.put(None)
+            return batches
+        batches._open_pipes = len(pipes)
+        batches._pipes = pipes
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("output multiplexer is closed")
+            self._pending.extend(pipes)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="agent-fleet-output-mux",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._wake()
+        return batches
+
+    def close(self) -> None:
+        """Stop the reader thread once every watched pipe has reached EOF."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._wake()
+        if thread is not None:
+            thread.join()
+        os.close(self._wake_reader)
+        os.close(self._wake_writer)
+
+    def _resume(self, pipes: list[_Pipe]) -> None:
+        with self._lock:
+            self._paused_pipes -= len(pipes)
+            self._pending.extend(pipes)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_writer, b"\0")
+        except BlockingIOError:
+            # The pipe is full, so a wakeup is already pending.
+            pass
+
+    def _run(self) -> None:
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wake_reader, selectors.EVENT_READ, None)
+            while True:
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    closed = self._closed and not self._paused_pipes
+                for pipe in pending:
+                    os.set_blocking(pipe.stream.fileno(), False)
+                    selector.register(pipe.stream, selectors.EVENT_READ, pipe)
+                if closed and len(selector.get_map()) == 1:
+                    return
+
+                ready: dict[OutputBatches, list[Line]] = {}
+                finished: list[OutputBatches] = []
+                for key, _events in selector.select():
+                    pipe = key.data
+                    if pipe is None:
+                        self._drain_wakeups()
+                        continue
+                    lines = ready.setdefault(pipe.batches, [])
+                    if not self._read(pipe, lines):
+                        selector.unregister(pipe.stream)
+                        pipe.stream.close()
+                        pipe.batches._open_pipes -= 1
+                        if pipe.batches._open_pipes == 0:
+                            finished.append(pipe.batches)
+                for batches, lines in ready.items():
+                    if not lines:
+                        continue
+                    paused = batches._deliver(lines)
+                    if paused:
+                        with self._lock:
+                            self._paused_pipes += len(paused)
+                        for pipe in paused:
+                            selector.unregister(pipe.stream)
+                for batches in finished:
+                    batches._queue.put(None)
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while os.read(self._wake_reader, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _read(self, pipe: _Pipe, lines: list[Line]) -> bool:
+        """Append the pipe's complete lines; returns False at EOF."""
+        try:
+            chunk = os.read(pipe.stream.fileno(), self.read_size)
+        except BlockingIOError:
+            return True
+        except OSError:
+            chunk = b""
+        if not chunk:
+            if pipe.partial:
+                lines.append((pipe.source, _decode(pipe.partial)))
+                pipe.partial = b""
+            return False
+        data = pipe.partial + chunk if pipe.partial else chunk
+        *complete, pipe.partial = data.split(b"\n")
+        lines.extend((pipe.source, _decode(line) + "\n") for line in complete)
+        return True
+
+
+def _decode(line: bytes) -> str:
+    # Match the text-mode readers: universal newlines and undecodable bytes replaced.
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line.decode("utf-8", errors="replace")
@@ -5,15 +5,30 @@ from pathlib import Path
 import signal
 import subprocess
 import sys
+import tempfile
 import time
+from typing import Callable, TextIO
 
 import click
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-from .agents.codex_runner import CodexRunner
-from .config import AppConfig
+from .agents.async_codex_runner import AsyncCodexRunner
+from .agents.codex_runner import EVENT_PAYLOAD_MODES, CodexRunner
+from .agents.json_codec import JSON_CODEC_NAMES, json_codec
+from .agents.multiplexer import OutputMultiplexer
+from .config import (
+    SQLITE_JOURNAL_MODES,
+    SQLITE_SYNCHRONOUS_LEVELS,
+    AppConfig,
+    SQLiteSettings,
+)
+from .domain.models import ExecutionTiming, TaskStatus
+from .github.cache import IssueCache
+from .github.issues import GitHubError, fetch_issue, fetch_issues, list_issues
+from .loadtest.fake_agent import DEFAULT_MIX, format_mix, parse_mix
+from .loadtest.harness import FakeAgentProfile, enqueue_load_tasks, run_load_test
 from .orchestrator.runtime import (
     RuntimeStateError,
     acquire_pid_file,
@@ -22,19 +37,108 @@ from .orchestrator.runtime import (
     release_pid_file,
     stop_process,
 )
+from .observability.metrics import fleet_metrics
+from .observability.server import MetricsServer, parse_metrics_address
+from .observability.timings import (
+    DEFAULT_PERCENTILES,
+    EXECUTION_STAGES,
+    OVERHEAD_STAGE,
+    stage_percentiles,
+    with_overhead,
+)
+from .orchestrator.async_service import AsyncOrchestratorService
 from .orchestrator.service import OrchestratorService
-from .persistence.repository import SQLiteRepository
+from .orchestrator.slots import read_slot_state
+from .orchestrator.wakeup import notify_orchestrator
+from .persistence.codecs import EVENT_CODECS, PLAIN_CODEC, ZLIB_DICT_CODEC
+from .persistence.repository import DEFAULT_LEASE_SECONDS, SQLiteRepository, task_cursor
 from .prompts.task_types import task_type_choices
+from .queue.base import TaskQueue
 from .queue.fifo import FIFOQueue
+from .queue.priority import DEFAULT_AGING_INTERVAL_SECONDS, PriorityQueue
+from .workspace.worktrees import WorktreePool
+
+
+_DEFAULT_SQLITE = SQLiteSettings()
+_RUNTIMES = ("threads", "asyncio")
+_PIPE_READERS = ("selector", "threads")
+
+_BATCH_RECORD_FIELDS = frozenset(
+    {
+        "working_dir",
+        "instruction",
+        "github_issue_url",
+        "github_issue_title",
+        "github_issue_body",
+        "github_issue_number",
+        "task_type",
+        "priority",
+    }
+)
 
 
 @click.group()
 @click.option("--database", "database_path", default="agent_fleet.db", show_default=True)
 @click.option("--runtime-dir", default="runtime", show_default=True)
+@click.option(
+    "--sqlite-journal-mode",
+    default=_DEFAULT_SQLITE.journal_mode,
+    type=click.Choice(SQLITE_JOURNAL_MODES, case_sensitive=False),
+    show_default=True,
+)
+@click.option(
+    "--sqlite-synchronous",
+    default=_DEFAULT_SQLITE.synchronous,
+    type=click.Choice(SQLITE_SYNCHRONOUS_LEVELS, case_sensitive=False),
+    show_default=True,
+)
+@click.option(
+    "--sqlite-busy-timeout-ms",
+    default=_DEFAULT_SQLITE.busy_timeout_ms,
+    type=click.IntRange(min=0),
+    show_default=True,
+)
+@click.option(
+    "--sqlite-mmap-size",
+    "sqlite_mmap_size_bytes",
+    default=_DEFAULT_SQLITE.mmap_size_bytes,
+    type=click.IntRange(min=0),
+    show_default=True,
+    help="Bytes of the database file to memory-map (0 disables mmap)",
+)
+@click.option(
+    "--event-codec",
+    default=PLAIN_CODEC,
+    type=click.Choice(EVENT_CODECS, case_sensitive=False),
+    show_default=True,
+    help="Compression applied to newly written execution event payloads",
+)
 @click.pass_context
-def main(ctx: click.Context, database_path: str, runtime_dir: str) -> None:
+def main(
+    ctx: click.Context,
+    database_path: str,
+    runtime_dir: str,
+    sqlite_journal_mode: str,
+    sqlite_synchronous: str,
+    sqlite_busy_timeout_ms: int,
+    sqlite_mmap_size_bytes: int,
+    event_codec: str,
+) -> None:
     """Manage the agent-fleet queue and orchestrator lifecycle."""
-    ctx.obj = {"config": AppConfig.from_paths(database_path=database_path, runtime_dir=runtime_dir)}
+    sqlite = SQLiteSettings(
+        journal_mode=sqlite_journal_mode.lower(),
+        synchronous=sqlite_synchronous.lower(),
+        busy_timeout_ms=sqlite_busy_timeout_ms,
+        mmap_size_bytes=sqlite_mmap_size_bytes,
+    )
+    ctx.obj = {
+        "config": AppConfig.from_paths(
+            database_path=database_path,
+            runtime_dir=runtime_dir,
+            sqlite=sqlite,
+            event_codec=event_codec.lower(),
+        )
+    }
 
 
 @main.command()
@@ -50,6 +154,13 @@ def main(ctx: click.Context, database_path: str, runtime_dir: str) -> None:
     type=click.Choice(task_type_choices(), case_sensitive=False),
     show_default=True,
 )
+@click.option(
+    "--priority",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Higher values are dispatched first by the priority scheduler",
+)
 @click.pass_context
 def enqueue(
     ctx: click.Context,
@@ -60,6 +171,7 @@ def enqueue(
     github_issue_body: str | None,
     github_issue_number: int | None,
     task_type: str,
+    priority: int,
 ) -> None:
     payload = _build_enqueue_payload(
         working_dir=working_dir,
@@ -73,7 +185,8 @@ def enqueue(
 
     repository = _repository(ctx)
     queue = FIFOQueue(repository)
-    task = queue.enqueue(kind="codex", payload=json.dumps(payload))
+    task = queue.enqueue(kind="codex", payload=json.dumps(payload), priority=priority)
+    notify_orchestrator(_config(ctx).wakeup_socket_path)
     Console().print(f"queued task {task.id}")
 
 
@@ -87,6 +200,20 @@ def enqueue(
     type=click.Choice(task_type_choices(), case_sensitive=False),
     show_default=True,
 )
+@click.option(
+    "--priority",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Higher values are dispatched first by the priority scheduler",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=True,
+    show_default=True,
+    help="Reuse cached issue text when the issue's updatedAt is unchanged",
+)
 @click.pass_context
 def enqueue_from_issue(
     ctx: click.Context,
@@ -94,8 +221,17 @@ def enqueue_from_issue(
     repo: str,
     issue_number: int,
     task_type: str,
+    priority: int,
+    use_cache: bool,
 ) -> None:
-    issue = _fetch_github_issue(repo=repo, issue_number=issue_number)
+    repository = _repository(ctx)
+    if use_cache:
+        fetched = IssueCache(repository).fetch_issues(repo=repo, issue_numbers=[issue_number])
+        if issue_number in fetched.errors:
+            raise click.ClickException(fetched.errors[issue_number])
+        issue = fetched.issues[issue_number]
+    else:
+        issue = _fetch_github_issue(repo=repo, issue_number=issue_number)
     payload = _build_enqueue_payload(
         working_dir=working_dir,
         instruction=None,
@@ -106,27 +242,441 @@ def enqueue_from_issue(
         task_type=task_type,
     )
 
-    repository = _repository(ctx)
     queue = FIFOQueue(repository)
-    task = queue.enqueue(kind="codex", payload=json.dumps(payload))
+    task = queue.enqueue(kind="codex", payload=json.dumps(payload), priority=priority)
+    notify_orchestrator(_config(ctx).wakeup_socket_path)
     issue_ref = issue.get("url") or f"{repo}#{issue_number}"
     Console().print(f"queued task {task.id} from issue {issue_ref}")
 
 
+@main.command(name="enqueue-from-issues")
+@click.option("--working-dir", required=True, type=click.Path(path_type=Path))
+@click.option("--repo", required=True, help="GitHub repository in owner/repo format")
+@click.option("--label", default=None, help="Queue every issue with this label")
+@click.option("--issues", "issue_list", default=None, help="Comma-separated issue numbers, e.g. 1,2,3")
+@click.option(
+    "--state",
+    default="open",
+    show_default=True,
+    type=click.Choice(["open", "closed", "all"], case_sensitive=False),
+    help="Issue state to list with --label",
+)
+@click.option(
+    "--limit",
+    default=500,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum issues listed with --label",
+)
+@click.option(
+    "--max-workers",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Concurrent `gh issue view` calls for issues a bulk query could not return",
+)
+@click.option(
+    "--task-type",
+    default="feature_implementation",
+    type=click.Choice(task_type_choices(), case_sensitive=False),
+    show_default=True,
+)
+@click.option(
+    "--priority",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Higher values are dispatched first by the priority scheduler",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=True,
+    show_default=True,
+    help="Reuse cached issue text when the issue's updatedAt is unchanged",
+)
+@click.pass_context
+def enqueue_from_issues(
+    ctx: click.Context,
+    working_dir: Path,
+    repo: str,
+    label: str | None,
+    issue_list: str | None,
+    state: str,
+    limit: int,
+    max_workers: int,
+    task_type: str,
+    priority: int,
+    use_cache: bool,
+) -> None:
+    """Queue one task per GitHub issue, fetched in bulk."""
+    if (label is None) == (issue_list is None):
+        raise click.UsageError("Provide exactly one of --label or --issues.")
+
+    console = Console()
+    repository = _repository(ctx)
+    cache = IssueCache(repository) if use_cache else None
+    issues: list[tuple[int | None, dict[str, object]]]
+    errors: dict[int, str] = {}
+    if label is not None:
+        try:
+            if cache is not None:
+                listed = cache.list_issues(repo=repo, label=label, state=state.lower(), limit=limit)
+                issues = list(listed.issues.items())
+                errors = listed.errors
+            else:
+                issues = [
+                    (number if isinstance(number := issue.get("number"), int) else None, issue)
+                    for issue in list_issues(repo=repo, label=label, state=state.lower(), limit=limit)
+                ]
+        except GitHubError as error:
+            raise click.ClickException(str(error)) from error
+    else:
+        try:
+            numbers = [int(part) for part in (issue_list or "").split(",") if part.strip()]
+        except ValueError as error:
+            raise click.BadParameter("expected comma-separated issue numbers", param_hint="--issues") from error
+        fetch = cache.fetch_issues if cache is not None else fetch_issues
+        fetched = fetch(repo=repo, issue_numbers=numbers, max_workers=max_workers)
+        issues = [(number, fetched.issues[number]) for number in numbers if number in fetched.issues]
+        errors = fetched.errors
+
+    # Issues are keyed by the number that was requested (or listed), so a
+    # payload missing its own `number` is still reported against the right issue.
+    failures = [(f"{repo}#{number}", message) for number, message in sorted(errors.items())]
+    tasks = []
+    for number, issue in issues:
+        try:
+            payload = _build_enqueue_payload(
+                working_dir=working_dir,
+                instruction=None,
+                github_issue_url=str(issue.get("url") or ""),
+                github_issue_title=str(issue.get("title") or ""),
+                github_issue_body=str(issue.get("body") or ""),
+                github_issue_number=number,
+                task_type=task_type,
+            )
+        except click.ClickException as error:
+            source = f"{repo}#{number}" if number is not None else str(issue.get("url") or repo)
+            failures.append((source, error.format_message()))
+            continue
+        tasks.append({"kind": "codex", "payload": json.dumps(payload), "priority": priority})
+
+    task_ids = FIFOQueue(repository).enqueue_many(tasks)
+    if task_ids:
+        notify_orchestrator(_config(ctx).wakeup_socket_path)
+    for source, message in failures:
+        click.echo(f"{source}: {message}", err=True)
+    console.print(f"queued {len(task_ids)} tasks from {repo} ({len(failures)} failed)")
+    if failures:
+        ctx.exit(1)
+
+
+@main.command(name="enqueue-batch")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--working-dir",
+    default=None,
+    type=click.Path(path_type=Path),
+    help="Default working_dir for records that don't set one",
+)
+@click.option(
+    "--task-type",
+    default="feature_implementation",
+    type=click.Choice(task_type_choices(), case_sensitive=False),
+    show_default=True,
+    help="Default task_type for records that don't set one",
+)
+@click.option("--priority", default=0, show_default=True, type=int, help="Default priority")
+@click.option(
+    "--chunk-size",
+    default=500,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Tasks inserted per transaction",
+)
+@click.pass_context
+def enqueue_batch(
+    ctx: click.Context,
+    source: TextIO,
+    working_dir: Path | None,
+    task_type: str,
+    priority: int,
+    chunk_size: int,
+) -> None:
+    """Queue one task per JSON line of SOURCE (a file or `-` for stdin).
+
+    Records use the `enqueue` option names as keys: `working_dir`,
+    `instruction`, the `github_issue_*` fields, `task_type` and `priority`.
+    Invalid lines are reported and skipped; the rest are queued.
+    """
+    repository = _repository(ctx)
+    queue = FIFOQueue(repository)
+    chunk: list[dict[str, object]] = []
+    queued = 0
+    errors = 0
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            chunk.append(
+                _task_from_record(
+                    json.loads(line),
+                    working_dir=working_dir,
+                    task_type=task_type,
+                    priority=priority,
+                )
+            )
+        except (ValueError, click.ClickException) as error:
+            message = error.format_message() if isinstance(error, click.ClickException) else str(error)
+            click.echo(f"line {line_number}: {message}", err=True)
+            errors += 1
+            continue
+        if len(chunk) >= chunk_size:
+            queued += len(queue.enqueue_many(chunk))
+            chunk = []
+    if chunk:
+        queued += len(queue.enqueue_many(chunk))
+
+    if queued:
+        notify_orchestrator(_config(ctx).wakeup_socket_path)
+    Console().print(f"queued {queued} tasks ({errors} invalid lines skipped)")
+    if errors:
+        ctx.exit(1)
+
+
+_RUN_OPTIONS = (
+    click.option("--poll-interval", default=1.0, show_default=True, type=float),
+    click.option(
+        "--max-poll-interval",
+        default=30.0,
+        show_default=True,
+        type=float,
+        help="Upper bound for the exponential idle backoff between queue polls",
+    ),
+    click.option(
+        "--workers",
+        default=1,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Maximum number of executions to run concurrently",
+    ),
+    click.option(
+        "--worker-id",
+        default=None,
+        help="Identity recorded on claimed tasks (defaults to hostname:pid)",
+    ),
+    click.option(
+        "--lease-seconds",
+        default=DEFAULT_LEASE_SECONDS,
+        show_default=True,
+        type=click.FloatRange(min=1.0),
+        help="Claim lease length; expired leases are returned to the queue",
+    ),
+    click.option(
+        "--scheduler",
+        default="priority",
+        show_default=True,
+        type=click.Choice(["priority", "fifo"], case_sensitive=False),
+        help="Queue ordering: priority (with aging) or strict FIFO",
+    ),
+    click.option(
+        "--aging-interval",
+        default=DEFAULT_AGING_INTERVAL_SECONDS,
+        show_default=True,
+        type=click.FloatRange(min=0.0),
+        help="Seconds of waiting that raise a queued task's priority by one (0 disables aging)",
+    ),
+    click.option(
+        "--max-aging-boost",
+        default=None,
+        type=click.IntRange(min=0),
+        help="Most priority levels a task can gain by waiting (default: unlimited)",
+    ),
+    click.option(
+        "--max-per-working-dir",
+        default=1,
+        show_default=True,
+        type=click.IntRange(min=0),
+        help="Maximum concurrent tasks per working directory across all orchestrators (0 = unlimited)",
+    ),
+    click.option(
+        "--isolation",
+        default="none",
+        show_default=True,
+        type=click.Choice(["none", "worktree"], case_sensitive=False),
+        help="Run git tasks in pooled git worktrees instead of the shared working_dir",
+    ),
+    click.option(
+        "--worktree-pool-size",
+        default=16,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Maximum number of pooled worktrees across all repositories",
+    ),
+    click.option(
+        "--event-payloads",
+        default="normalized",
+        show_default=True,
+        type=click.Choice(EVENT_PAYLOAD_MODES, case_sensitive=False),
+        help="Store JSON events re-serialized with sorted keys, or verbatim as emitted",
+    ),
+    click.option(
+        "--json-backend",
+        default="auto",
+        show_default=True,
+        type=click.Choice(["auto", *JSON_CODEC_NAMES], case_sensitive=False),
+        help=(
+            "JSON parser that validates --event-payloads verbatim lines "
+            "(auto prefers orjson when installed)"
+        ),
+    ),
+    click.option(
+        "--archive-after-days",
+        default=0.0,
+        show_default=True,
+        type=click.FloatRange(min=0.0),
+        help="Archive events of executions finished this many days ago in the background (0 disables)",
+    ),
+    click.option(
+        "--runtime",
+        default="threads",
+        show_default=True,
+        type=click.Choice(_RUNTIMES, case_sensitive=False),
+        help="Run each execution on its own threads, or all of them on one asyncio event loop",
+    ),
+    click.option(
+        "--pipe-reader",
+        default="selector",
+        show_default=True,
+        type=click.Choice(_PIPE_READERS, case_sensitive=False),
+        help=(
+            "threads runtime: read every agent's output from one selector thread, "
+            "or two threads per execution"
+        ),
+    ),
+    click.option(
+        "--metrics-address",
+        default=None,
+        help="Serve Prometheus metrics at http://HOST:PORT/metrics (a bare PORT binds 127.0.0.1)",
+    ),
+    click.option(
+        "--queue-metrics-interval",
+        default=15.0,
+        show_default=True,
+        type=click.FloatRange(min=0.1),
+        help="Seconds between queue depth refreshes from the database for --metrics-address",
+    ),
+)
+
+
+def _run_options(command: Callable[..., None]) -> Callable[..., None]:
+    """Orchestrator options shared by `run` and `start`, which forwards them to `run`."""
+    for option in reversed(_RUN_OPTIONS):
+        command = option(command)
+    return command
+
+
 @main.command()
-@click.option("--poll-interval", default=1.0, show_default=True, type=float)
+@_run_options
 @click.option("--pid-file", default=None, type=click.Path(path_type=Path))
 @click.pass_context
-def run(ctx: click.Context, poll_interval: float, pid_file: Path | None) -> None:
+def run(
+    ctx: click.Context,
+    poll_interval: float,
+    max_poll_interval: float,
+    workers: int,
+    worker_id: str | None,
+    lease_seconds: float,
+    scheduler: str,
+    aging_interval: float,
+    max_aging_boost: int | None,
+    max_per_working_dir: int,
+    isolation: str,
+    worktree_pool_size: int,
+    event_payloads: str,
+    json_backend: str,
+    archive_after_days: float,
+    runtime: str,
+    pipe_reader: str,
+    metrics_address: str | None,
+    queue_metrics_interval: float,
+    pid_file: Path | None,
+) -> None:
     config = _config(ctx)
     repository = _repository(ctx)
-    queue = FIFOQueue(repository)
-    service = OrchestratorService(
+    queue = _build_queue(
         repository,
-        queue,
-        CodexRunner(repository),
-        poll_interval_seconds=poll_interval,
+        scheduler=scheduler,
+        aging_interval=aging_interval,
+        max_aging_boost=max_aging_boost,
+        max_per_working_dir=max_per_working_dir,
     )
+    try:
+        codec = json_codec(None if json_backend.lower() == "auto" else json_backend.lower())
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--json-backend") from error
+    worktree_pool = None
+    if isolation.lower() == "worktree":
+        worktree_pool = WorktreePool(
+            config.worktree_root,
+            max_idle_per_repo=workers,
+            max_total=worktree_pool_size,
+        )
+    archive_after_seconds = archive_after_days * 86400 if archive_after_days else None
+    queue_metrics_interval_seconds = queue_metrics_interval if metrics_address else None
+    metrics_server = None
+    if metrics_address:
+        try:
+            host, port = parse_metrics_address(metrics_address)
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="--metrics-address") from error
+        metrics_server = MetricsServer(host, port, fleet_metrics().render)
+    multiplexer: OutputMultiplexer | None = None
+    service: OrchestratorService | AsyncOrchestratorService
+    if runtime.lower() == "asyncio":
+        # One event loop drives every execution; --workers is its concurrency.
+        service = AsyncOrchestratorService(
+            repository,
+            queue,
+            AsyncCodexRunner(
+                repository,
+                event_payloads=event_payloads.lower(),
+                codec=codec,
+            ),
+            poll_interval_seconds=poll_interval,
+            max_concurrency=workers,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+            max_poll_interval_seconds=max_poll_interval,
+            wakeup_socket_path=config.wakeup_socket_path,
+            worktree_pool=worktree_pool,
+            archive_after_seconds=archive_after_seconds,
+            queue_metrics_interval_seconds=queue_metrics_interval_seconds,
+        )
+    else:
+        if pipe_reader.lower() == "selector":
+            multiplexer = OutputMultiplexer()
+        service = OrchestratorService(
+            repository,
+            queue,
+            CodexRunner(
+                repository,
+                event_payloads=event_payloads.lower(),
+                codec=codec,
+                multiplexer=multiplexer,
+            ),
+            poll_interval_seconds=poll_interval,
+            max_workers=workers,
+            slot_state_path=config.slot_state_path,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+            max_poll_interval_seconds=max_poll_interval,
+            wakeup_socket_path=config.wakeup_socket_path,
+            worktree_pool=worktree_pool,
+            archive_after_seconds=archive_after_seconds,
+            queue_metrics_interval_seconds=queue_metrics_interval_seconds,
+        )
 
     pid_path = pid_file or config.pid_file_path
     pid_written = False
@@ -140,18 +690,31 @@ def run(ctx: click.Context, poll_interval: float, pid_file: Path | None) -> None
     previous_sigint = signal.signal(signal.SIGINT, _handle_signal)
     previous_sigterm = signal.signal(signal.SIGTERM, _handle_signal)
     try:
+        if metrics_server is not None:
+            try:
+                metrics_server.start()
+            except OSError as error:
+                raise click.ClickException(f"cannot serve metrics on {metrics_address}: {error}") from error
+            metrics_host, metrics_port = metrics_server.address
+            print(f"serving metrics at http://{metrics_host}:{metrics_port}/metrics", file=sys.stderr)
         service.run()
     finally:
+        if metrics_server is not None:
+            metrics_server.close()
         signal.signal(signal.SIGINT, previous_sigint)
         signal.signal(signal.SIGTERM, previous_sigterm)
+        if worktree_pool is not None:
+            worktree_pool.close()
+        if multiplexer is not None:
+            multiplexer.close()
         if pid_written:
             release_pid_file(pid_path)
 
 
 @main.command()
-@click.option("--poll-interval", default=1.0, show_default=True, type=float)
+@_run_options
 @click.pass_context
-def start(ctx: click.Context, poll_interval: float) -> None:
+def start(ctx: click.Context, **run_options: object) -> None:
     config = _config(ctx)
     console = Console()
     try:
@@ -168,13 +731,9 @@ def start(ctx: click.Context, poll_interval: float) -> None:
                 sys.executable,
                 "-m",
                 "agent_fleet",
-                "--database",
-                str(config.database_path),
-                "--runtime-dir",
-                str(config.runtime_dir),
+                *_global_cli_args(config),
                 "run",
-                "--poll-interval",
-                str(poll_interval),
+                *_forwarded_cli_args(ctx.command, run_options),
                 "--pid-file",
                 str(config.pid_file_path),
             ],
@@ -194,8 +753,14 @@ def start(ctx: click.Context, poll_interval: float) -> None:
 
 
 @main.command()
+@click.option(
+    "--timeout",
+    default=None,
+    type=click.FloatRange(min=0.0),
+    help="Give up after this many seconds (default: wait until in-flight executions have drained)",
+)
 @click.pass_context
-def stop(ctx: click.Context) -> None:
+def stop(ctx: click.Context, timeout: float | None) -> None:
     config = _config(ctx)
     pid = read_pid_file(config.pid_file_path)
     if pid is None:
@@ -206,8 +771,9 @@ def stop(ctx: click.Context) -> None:
         raise click.ClickException("orchestrator pid file was stale and has been removed")
 
     stop_process(pid)
-    deadline = time.time() + 10.0
-    while time.time() < deadline:
+    # The orchestrator exits only after its running executions finish.
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while deadline is None or time.monotonic() < deadline:
         if not is_process_running(pid):
             release_pid_file(config.pid_file_path)
             Console().print(f"stopped orchestrator pid {pid}")
@@ -218,8 +784,25 @@ def stop(ctx: click.Context) -> None:
 
 @main.command()
 @click.option("--limit", default=10, show_default=True, type=int)
+@click.option(
+    "--status",
+    "status_filter",
+    default=None,
+    type=click.Choice([status.value for status in TaskStatus], case_sensitive=False),
+    help="Only list tasks in this status",
+)
+@click.option("--kind", default=None, help="Only list tasks of this kind")
+@click.option("--after", default=None, help="Cursor printed by the previous page")
+@click.option("--summary", is_flag=True, help="Show task counts per status instead of the task list")
 @click.pass_context
-def status(ctx: click.Context, limit: int) -> None:
+def status(
+    ctx: click.Context,
+    limit: int,
+    status_filter: str | None,
+    kind: str | None,
+    after: str | None,
+    summary: bool,
+) -> None:
     config = _config(ctx)
     repository = _repository(ctx)
     console = Console()
@@ -232,45 +815,100 @@ def status(ctx: click.Context, limit: int) -> None:
     lifecycle.add_row("Runtime Dir", str(config.runtime_dir))
     lifecycle.add_row("PID File", str(config.pid_file_path))
     lifecycle.add_row("Log File", str(config.log_file_path))
-    lifecycle.add_row("Running", "yes" if pid is not None and is_process_running(pid) else "no")
+    running = pid is not None and is_process_running(pid)
+    lifecycle.add_row("Running", "yes" if running else "no")
     lifecycle.add_row("PID", str(pid) if pid is not None else "-")
     console.print(lifecycle)
 
-    tasks = repository.list_tasks(limit=limit)
+    slots = read_slot_state(config.slot_state_path) if running else []
+    if slots:
+        slot_table = Table(title="worker slots")
+        slot_table.add_column("Slot")
+        slot_table.add_column("State")
+        slot_table.add_column("Task")
+        slot_table.add_column("Started")
+        for slot in slots:
+            slot_table.add_row(
+                str(slot.index),
+                slot.state.value,
+                slot.task_id or "-",
+                slot.started_at or "-",
+            )
+        console.print(slot_table)
+
+    if summary:
+        counts = repository.count_tasks_by_status()
+        summary_table = Table(title="queue summary")
+        summary_table.add_column("Status")
+        summary_table.add_column("Tasks", justify="right")
+        for task_status, count in counts.items():
+            summary_table.add_row(task_status.value, str(count))
+        summary_table.add_row("total", str(sum(counts.values())))
+        console.print(summary_table)
+        return
+
+    try:
+        tasks = repository.list_tasks(
+            limit=limit,
+            status=TaskStatus(status_filter.lower()) if status_filter else None,
+            kind=kind,
+            after=after,
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--after") from error
     task_table = Table(title="recent tasks")
     task_table.add_column("Task")
     task_table.add_column("Status")
+    task_table.add_column("Priority")
     task_table.add_column("Queued")
     task_table.add_column("Kind")
     for task in tasks:
-        task_table.add_row(task.id, task.status.value, task.queued_at, task.kind)
+        task_table.add_row(task.id, task.status.value, str(task.priority), task.queued_at, task.kind)
     console.print(task_table)
+    if tasks and len(tasks) == limit:
+        console.print(f"next page: --after {task_cursor(tasks[-1])}", markup=False, highlight=False)
 
 
 @main.command()
 @click.option("--task-id", required=True)
 @click.option("--tail", default=50, show_default=True, type=int)
+@click.option("--follow", "-f", is_flag=True, help="Keep printing new events until the task finishes")
+@click.option(
+    "--interval",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0.05),
+    help="Seconds between polls while following",
+)
+@click.option(
+    "--max-payload-chars",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Truncate payloads in the tail table to this many characters (0 = no limit)",
+)
 @click.pass_context
-def events(ctx: click.Context, task_id: str, tail: int) -> None:
+def events(
+    ctx: click.Context,
+    task_id: str,
+    tail: int,
+    follow: bool,
+    interval: float,
+    max_payload_chars: int,
+) -> None:
     repository = _repository(ctx)
     console = Console()
 
-    history_data = repository.get_task_history(task_id)
-    if history_data is None:
+    task = repository.get_task(task_id)
+    if task is None:
         raise click.ClickException(f"task {task_id} not found")
-
-    task = history_data["task"]
-    assert not isinstance(task, dict)
     console.print(Panel.fit(f"{task.id}\nstatus={task.status.value}\nkind={task.kind}", title="task"))
 
-    all_rows: list[tuple[str, int, str, str, str]] = []
-    for item in history_data["executions"]:
-        execution = item["execution"]
-        for event in item["events"]:
-            all_rows.append((execution.id, event.sequence_number, event.source, event.event_type, event.payload))
-
-    if tail > 0:
-        all_rows = all_rows[-tail:]
+    rows = repository.tail_task_events(
+        task_id,
+        limit=tail if tail > 0 else None,
+        max_payload_chars=max_payload_chars or None,
+    )
 
     event_table = Table(title="events")
     event_table.add_column("Execution")
@@ -279,11 +917,18 @@ def events(ctx: click.Context, task_id: str, tail: int) -> None:
     event_table.add_column("Type")
     event_table.add_column("Payload")
 
-    for execution_id, seq, source, event_type, payload in all_rows:
-        event_table.add_row(execution_id, str(seq), source, event_type, payload)
+    for row in rows:
+        event_table.add_row(row.execution_id, str(row.sequence_number), row.source, row.event_type, row.payload)
 
     console.print(event_table)
 
+    if follow:
+        cursor = (rows[-1].execution_id, rows[-1].sequence_number) if rows else None
+        try:
+            _follow_events(repository, console, task_id=task_id, cursor=cursor, interval=interval)
+        except KeyboardInterrupt:
+            pass
+
 
 @main.command(hidden=True)
 @click.argument("task_id")
@@ -291,51 +936,435 @@ def events(ctx: click.Context, task_id: str, tail: int) -> None:
 @click.pass_context
 def history(ctx: click.Context, task_id: str, tail: int) -> None:
     """Deprecated alias for `events --task-id`"""
-    ctx.invoke(events, task_id=task_id, tail=tail)
+    ctx.invoke(events, task_id=task_id, tail=tail, follow=False, interval=1.0, max_payload_chars=0)
 
 
-def _fetch_github_issue(*, repo: str, issue_number: int) -> dict[str, object]:
-    command = [
-        "gh",
-        "issue",
-        "view",
-        str(issue_number),
-        "--repo",
-        repo,
-        "--json",
-        "number,title,body,url",
-    ]
-    result = subprocess.run(command, check=False, capture_output=True, text=True)
-    if result.returncode != 0:
-        error_text = (result.stderr or result.stdout).strip() or "unknown gh error"
-        raise click.ClickException(
-            f"failed to fetch github issue {repo}#{issue_number}: {error_text}"
-        )
+@main.command()
+@click.option("--task-id", default=None, help="Show each execution of this task instead of aggregates")
+@click.option(
+    "--limit",
+    default=1000,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Aggregate over this many most recent executions",
+)
+@click.option("--kind", default=None, help="Only aggregate executions of tasks of this kind")
+@click.pass_context
+def timings(ctx: click.Context, task_id: str | None, limit: int, kind: str | None) -> None:
+    """Show where executions spent their time, stage by stage."""
+    repository = _repository(ctx)
+    console = Console()
+    stages = (*EXECUTION_STAGES, OVERHEAD_STAGE)
 
-    raw = result.stdout.strip()
-    if not raw:
-        raise click.ClickException(
-            f"gh returned an empty response for issue {repo}#{issue_number}"
+    if task_id is not None:
+        records = repository.list_execution_timings(task_id)
+        if not records:
+            raise click.ClickException(f"no timings recorded for task {task_id}")
+        table = Table(title=f"stage timings for task {task_id}")
+        table.add_column("Stage")
+        rows = []
+        for record in records:
+            table.add_column(record.execution_id[:8], justify="right")
+            rows.append(with_overhead(_timing_durations(record)))
+        for stage in stages:
+            table.add_row(stage, *(_format_seconds(row[stage]) for row in rows))
+        console.print(table)
+        return
+
+    records = repository.recent_execution_timings(limit=limit, kind=kind)
+    if not records:
+        raise click.ClickException("no execution timings recorded yet")
+    summary = stage_percentiles(_timing_durations(record) for record in records)
+    table = Table(title=f"stage timings over the last {len(records)} executions")
+    table.add_column("Stage")
+    columns = [f"p{percentile:g}" for percentile in DEFAULT_PERCENTILES] + ["max"]
+    for column in columns:
+        table.add_column(column, justify="right")
+    table.add_column("Samples", justify="right")
+    for stage, stats in summary.items():
+        table.add_row(
+            stage,
+            *(_format_seconds(stats[column]) for column in columns),
+            str(int(stats["count"])),
         )
+    console.print(table)
+
+
+def _timing_durations(record: ExecutionTiming) -> dict[str, float | None]:
+    return {stage: getattr(record, f"{stage}_seconds") for stage in EXECUTION_STAGES}
+
+
+def _format_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1.0:
+        return f"{seconds * 1000:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def _follow_events(
+    repository: SQLiteRepository,
+    console: Console,
+    *,
+    task_id: str,
+    cursor: tuple[str, int] | None,
+    interval: float,
+) -> None:
+    """Print events newer than `cursor` as they arrive.
+
+    The cursor is `(execution_id, sequence_number)` of the last printed event;
+    each poll only reads rows past it, so memory and per-poll work stay
+    constant however many events the task already has.
+    """
+    terminal = {TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.CANCELED}
+    while True:
+        task = repository.get_task(task_id)
+        finished = task is None or task.status in terminal
+        execution_ids = [execution.id for execution in repository.list_executions_for_task(task_id)]
+        if cursor is not None and cursor[0] in execution_ids:
+            execution_ids = execution_ids[execution_ids.index(cursor[0]) :]
+
+        printed = False
+        for execution_id in execution_ids:
+            after_sequence = cursor[1] if cursor is not None and cursor[0] == execution_id else 0
+            while True:
+                batch = repository.list_execution_events_after(execution_id, after_sequence=after_sequence)
+                for event in batch:
+                    console.print(
+                        f"{execution_id} {event.sequence_number:>6} {event.source:<6} "
+                        f"{event.event_type}: {event.payload}",
+                        markup=False,
+                        highlight=False,
+                    )
+                if not batch:
+                    break
+                printed = True
+                after_sequence = batch[-1].sequence_number
+                cursor = (execution_id, after_sequence)
+
+        # Status was read before the events, so nothing written before the
+        # task finished can be missed by stopping here.
+        if finished and not printed:
+            return
+        if not printed:
+            time.sleep(interval)
+
+
+@main.command()
+@click.option("--tasks", default=20, show_default=True, type=click.IntRange(min=1), help="Tasks to enqueue")
+@click.option(
+    "--workers",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of agents running at once",
+)
+@click.option(
+    "--runtime",
+    default="threads",
+    show_default=True,
+    type=click.Choice(_RUNTIMES, case_sensitive=False),
+)
+@click.option(
+    "--pipe-reader",
+    default="selector",
+    show_default=True,
+    type=click.Choice(_PIPE_READERS, case_sensitive=False),
+)
+@click.option(
+    "--event-payloads",
+    default="normalized",
+    show_default=True,
+    type=click.Choice(EVENT_PAYLOAD_MODES, case_sensitive=False),
+)
+@click.option(
+    "--events-per-second",
+    default=50.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Output lines each fake agent emits per second",
+)
+@click.option(
+    "--duration",
+    default=5.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Seconds each fake agent runs",
+)
+@click.option(
+    "--mix",
+    default=DEFAULT_MIX,
+    show_default=True,
+    help="Relative weights of JSON events, raw stdout lines and stderr lines",
+)
+@click.option("--payload-bytes", default=256, show_default=True, type=click.IntRange(min=0))
+@click.option("--poll-interval", default=1.0, show_default=True, type=float)
+@click.option("--sample-interval", default=0.5, show_default=True, type=click.FloatRange(min=0.05))
+@click.option(
+    "--timeout",
+    default=600.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Stop waiting for unfinished tasks after this many seconds",
+)
+@click.option(
+    "--work-dir",
+    default=None,
+    type=click.Path(path_type=Path, file_okay=False),
+    help="Keep the load test database and working directories here (a temporary directory by default)",
+)
+@click.option(
+    "--output",
+    default=None,
+    type=click.Path(path_type=Path, dir_okay=False),
+    help="Also write the report as JSON",
+)
+@click.pass_context
+def loadtest(
+    ctx: click.Context,
+    tasks: int,
+    workers: int,
+    runtime: str,
+    pipe_reader: str,
+    event_payloads: str,
+    events_per_second: float,
+    duration: float,
+    mix: str,
+    payload_bytes: int,
+    poll_interval: float,
+    sample_interval: float,
+    timeout: float,
+    work_dir: Path | None,
+    output: Path | None,
+) -> None:
+    """Run the orchestrator in-process against synthetic agents and report its capacity.
 
+    Uses a fresh database in the work directory, never --database; the
+    SQLite and event codec options still apply.
+    """
+    config = _config(ctx)
     try:
-        payload = json.loads(raw)
-    except json.JSONDecodeError as error:
-        raise click.ClickException(
-            f"gh returned invalid JSON for issue {repo}#{issue_number}"
-        ) from error
+        profile = FakeAgentProfile(
+            events_per_second=events_per_second,
+            duration_seconds=duration,
+            mix=parse_mix(mix),
+            payload_bytes=payload_bytes,
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--mix") from error
 
-    if not isinstance(payload, dict):
-        raise click.ClickException(
-            f"gh returned unexpected issue shape for {repo}#{issue_number}"
+    with tempfile.TemporaryDirectory(prefix="agent-fleet-loadtest-") as temporary:
+        root = work_dir or Path(temporary)
+        database_path = root / "loadtest.db"
+        if database_path.exists():
+            raise click.ClickException(f"{database_path} already exists; pick an empty --work-dir")
+        root.mkdir(parents=True, exist_ok=True)
+        repository = SQLiteRepository(
+            database_path,
+            sqlite_settings=config.sqlite,
+            event_codec=config.event_codec,
         )
+        repository.initialize()
+        queue = FIFOQueue(repository)
+        task_ids = enqueue_load_tasks(queue, root, tasks)
 
-    return {
-        "url": str(payload.get("url", "")).strip(),
-        "title": str(payload.get("title", "")).strip(),
-        "body": str(payload.get("body", "")).strip(),
-        "number": payload.get("number", issue_number),
-    }
+        multiplexer: OutputMultiplexer | None = None
+        service: OrchestratorService | AsyncOrchestratorService
+        if runtime.lower() == "asyncio":
+            service = AsyncOrchestratorService(
+                repository,
+                queue,
+                AsyncCodexRunner(
+                    repository,
+                    command=profile.command(),
+                    event_payloads=event_payloads.lower(),
+                ),
+                poll_interval_seconds=poll_interval,
+                max_concurrency=workers,
+            )
+        else:
+            if pipe_reader.lower() == "selector":
+                multiplexer = OutputMultiplexer()
+            service = OrchestratorService(
+                repository,
+                queue,
+                CodexRunner(
+                    repository,
+                    command=profile.command(),
+                    event_payloads=event_payloads.lower(),
+                    multiplexer=multiplexer,
+                ),
+                poll_interval_seconds=poll_interval,
+                max_workers=workers,
+            )
+        click.echo(
+            f"running {tasks} tasks on {workers} workers ({runtime.lower()} runtime); each agent emits "
+            f"{profile.events_per_agent} lines over {duration:g} s",
+            err=True,
+        )
+        try:
+            report = run_load_test(
+                repository,
+                service,
+                task_ids,
+                database_path=database_path,
+                sample_interval_seconds=sample_interval,
+                timeout_seconds=timeout or None,
+            )
+        finally:
+            if multiplexer is not None:
+                multiplexer.close()
+            repository.engine.dispose()
+
+    console = Console()
+    expected_events = tasks * profile.events_per_agent
+    summary = Table(title="load test", show_header=False)
+    summary.add_column("Measure")
+    summary.add_column("Value", justify="right")
+    summary.add_row("tasks succeeded / failed", f"{report.succeeded} / {report.failed} of {report.tasks}")
+    summary.add_row("wall time", _format_seconds(report.wall_seconds))
+    summary.add_row("events ingested", f"{report.events_ingested:,} of {expected_events:,}")
+    summary.add_row("events/s sustained", f"{report.events_per_second:,.0f}")
+    summary.add_row("events/s peak", f"{report.peak_events_per_second:,.0f}")
+    summary.add_row(
+        "database growth",
+        f"{_format_bytes(report.database_growth_bytes)} "
+        f"({report.database_growth_bytes / max(report.events_ingested, 1):,.0f} B/event)",
+    )
+    summary.add_row("orchestrator CPU", f"{report.cpu_seconds:.2f} s ({report.cpu_percent:.0f}% of one core)")
+    summary.add_row("fake agents CPU", f"{report.agents_cpu_seconds:.2f} s")
+    summary.add_row(
+        "orchestrator RSS",
+        f"{_format_bytes(report.rss_start_bytes)} -> {_format_bytes(report.rss_peak_bytes)} peak",
+    )
+    summary.add_row("threads peak", str(report.threads_peak))
+    console.print(summary)
+
+    stages = Table(title="per-execution stage latency")
+    stages.add_column("Stage")
+    columns = [f"p{percentile:g}" for percentile in DEFAULT_PERCENTILES] + ["max"]
+    for column in columns:
+        stages.add_column(column, justify="right")
+    for stage, stats in report.stages.items():
+        stages.add_row(stage, *(_format_seconds(stats[column]) for column in columns))
+    console.print(stages)
+
+    if output is not None:
+        document = {
+            "config": {
+                "tasks": tasks,
+                "workers": workers,
+                "runtime": runtime.lower(),
+                "pipe_reader": pipe_reader.lower(),
+                "event_payloads": event_payloads.lower(),
+                "events_per_second": events_per_second,
+                "duration_seconds": duration,
+                "mix": format_mix(profile.mix),
+                "payload_bytes": payload_bytes,
+                "expected_events": expected_events,
+            },
+            "report": report.as_dict(),
+        }
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+        click.echo(f"report written to {output}", err=True)
+    if not report.completed:
+        raise click.ClickException(f"tasks still unfinished after --timeout {timeout:g} s")
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024:
+            return f"{value:,.0f} {unit}" if unit == "B" else f"{value:,.1f} {unit}"
+        value /= 1024
+    return f"{value:,.1f} GiB"
+
+
+@main.group()
+def db() -> None:
+    """Database maintenance commands."""
+
+
+@db.command("compress-events")
+@click.option(
+    "--codec",
+    default=ZLIB_DICT_CODEC,
+    type=click.Choice([codec for codec in EVENT_CODECS if codec != PLAIN_CODEC], case_sensitive=False),
+    show_default=True,
+)
+@click.option("--batch-size", default=1000, show_default=True, type=click.IntRange(min=1))
+@click.option(
+    "--vacuum/--no-vacuum",
+    default=False,
+    show_default=True,
+    help="Run VACUUM afterwards to return freed pages to the filesystem",
+)
+@click.pass_context
+def compress_events(ctx: click.Context, codec: str, batch_size: int, vacuum: bool) -> None:
+    """Compress execution event payloads that were stored as plain text."""
+    repository = _repository(ctx)
+    stats = repository.compress_event_payloads(codec=codec.lower(), batch_size=batch_size)
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    click.echo(
+        f"Compressed {stats['compressed']} of {stats['scanned']} events "
+        f"({stats['bytes_before']} -> {stats['bytes_after']} bytes, saved {saved})"
+    )
+    if vacuum:
+        pages = repository.vacuum()
+        click.echo(f"Vacuumed database, released {pages} pages")
+
+
+@db.command("archive")
+@click.option(
+    "--older-than-days",
+    default=30.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Archive events of executions that finished at least this many days ago",
+)
+@click.option("--limit", default=None, type=click.IntRange(min=1), help="Maximum executions to archive")
+@click.option(
+    "--vacuum/--no-vacuum",
+    default=True,
+    show_default=True,
+    help="Return freed pages to the filesystem with incremental_vacuum afterwards",
+)
+@click.pass_context
+def archive(ctx: click.Context, older_than_days: float, limit: int | None, vacuum: bool) -> None:
+    """Move old execution events into compressed per-execution archive files."""
+    repository = _repository(ctx)
+    stats = repository.archive_execution_events(
+        older_than_seconds=older_than_days * 86400,
+        limit=limit,
+    )
+    click.echo(
+        f"Archived {stats['events']} events from {stats['executions']} executions "
+        f"to {repository.archive_dir} ({stats['archive_bytes']} bytes)"
+    )
+    if vacuum:
+        pages = repository.reclaim_free_pages()
+        click.echo(f"Released {pages} free pages")
+
+
+@db.command("vacuum")
+@click.pass_context
+def vacuum_database(ctx: click.Context) -> None:
+    """Rebuild the database file with a full VACUUM.
+
+    Needed once for databases created without incremental auto-vacuum, which
+    `db archive` and background archiving cannot shrink. Takes an exclusive
+    lock for the whole rebuild, so stop orchestrators first on large databases.
+    """
+    pages = _repository(ctx).vacuum()
+    click.echo(f"Vacuumed database, released {pages} pages")
+
+
+def _fetch_github_issue(*, repo: str, issue_number: int) -> dict[str, object]:
+    try:
+        return fetch_issue(repo=repo, issue_number=issue_number)
+    except GitHubError as error:
+        raise click.ClickException(str(error)) from error
 
 
 def _build_enqueue_payload(
@@ -393,13 +1422,118 @@ def _build_enqueue_payload(
     }
 
 
+def _task_from_record(
+    record: object,
+    *,
+    working_dir: Path | None,
+    task_type: str,
+    priority: int,
+) -> dict[str, object]:
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    unknown = set(record) - _BATCH_RECORD_FIELDS
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    record_working_dir = record.get("working_dir") or working_dir
+    if record_working_dir is None:
+        raise ValueError("working_dir is required (set it in the record or pass --working-dir)")
+    for field_name in ("github_issue_number", "priority"):
+        value = record.get(field_name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError(f"{field_name} must be an integer")
+    record_task_type = str(record.get("task_type") or task_type).lower()
+    if record_task_type not in task_type_choices():
+        raise ValueError(f"unknown task_type: {record_task_type}")
+
+    payload = _build_enqueue_payload(
+        working_dir=Path(str(record_working_dir)),
+        instruction=_optional_str(record.get("instruction")),
+        github_issue_url=_optional_str(record.get("github_issue_url")),
+        github_issue_title=_optional_str(record.get("github_issue_title")),
+        github_issue_body=_optional_str(record.get("github_issue_body")),
+        github_issue_number=record.get("github_issue_number"),
+        task_type=record_task_type,
+    )
+    record_priority = record.get("priority")
+    return {
+        "kind": "codex",
+        "payload": json.dumps(payload),
+        "priority": record_priority if record_priority is not None else priority,
+    }
+
+
+def _optional_str(value: object) -> str | None:
+    return None if value is None else str(value)
+
+
 def _config(ctx: click.Context) -> AppConfig:
     return ctx.obj["config"]
 
 
+def _global_cli_args(config: AppConfig) -> list[str]:
+    return [
+        "--database",
+        str(config.database_path),
+        "--runtime-dir",
+        str(config.runtime_dir),
+        "--sqlite-journal-mode",
+        config.sqlite.journal_mode,
+        "--sqlite-synchronous",
+        config.sqlite.synchronous,
+        "--sqlite-busy-timeout-ms",
+        str(config.sqlite.busy_timeout_ms),
+        "--sqlite-mmap-size",
+        str(config.sqlite.mmap_size_bytes),
+        "--event-codec",
+        config.event_codec,
+    ]
+
+
+def _forwarded_cli_args(command: click.Command, values: dict[str, object]) -> list[str]:
+    """Turn parsed option values back into command-line arguments for a child process."""
+    args: list[str] = []
+    for param in command.params:
+        if not isinstance(param, click.Option) or param.name not in values:
+            continue
+        value = values[param.name]
+        if value is None:
+            continue
+        if param.is_flag:
+            if value:
+                args.append(param.opts[0])
+            elif param.secondary_opts:
+                args.append(param.secondary_opts[0])
+            continue
+        args += [param.opts[0], str(value)]
+    return args
+
+
+def _build_queue(
+    repository: SQLiteRepository,
+    *,
+    scheduler: str,
+    aging_interval: float,
+    max_aging_boost: int | None,
+    max_per_working_dir: int,
+) -> TaskQueue:
+    per_dir_limit = max_per_working_dir or None
+    if scheduler.lower() == "fifo":
+        return FIFOQueue(repository, max_per_working_dir=per_dir_limit)
+    return PriorityQueue(
+        repository,
+        aging_interval_seconds=aging_interval or None,
+        max_aging_boost=max_aging_boost,
+        max_per_working_dir=per_dir_limit,
+    )
+
+
 def _repository(ctx: click.Context) -> SQLiteRepository:
     config = _config(ctx)
-    repository = SQLiteRepository(config.database_path)
+    repository = SQLiteRepository(
+        config.database_path,
+        sqlite_settings=config.sqlite,
+        event_codec=config.event_codec,
+    )
     repository.initialize()
     return repository
 
@@ -1,13 +1,47 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
+SQLITE_JOURNAL_MODES = ("wal", "delete", "truncate", "persist", "memory", "off")
+SQLITE_SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+SQLITE_TEMP_STORES = ("default", "file", "memory")
+SQLITE_AUTO_VACUUM_MODES = ("none", "full", "incremental")
+
+
+@dataclass(frozen=True, slots=True)
+class SQLiteSettings:
+    """Connection profile applied to every SQLite connection opened by the engine."""
+
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    busy_timeout_ms: int = 5_000
+    cache_size_kib: int = 64 * 1024
+    mmap_size_bytes: int = 256 * 1024 * 1024
+    temp_store: str = "memory"
+    auto_vacuum: str = "incremental"
+    busy_retries: int = 5
+    busy_retry_delay_seconds: float = 0.05
+
+    def __post_init__(self) -> None:
+        if self.journal_mode not in SQLITE_JOURNAL_MODES:
+            raise ValueError(f"unsupported sqlite journal_mode: {self.journal_mode!r}")
+        if self.synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+            raise ValueError(f"unsupported sqlite synchronous level: {self.synchronous!r}")
+        if self.temp_store not in SQLITE_TEMP_STORES:
+            raise ValueError(f"unsupported sqlite temp_store: {self.temp_store!r}")
+        if self.auto_vacuum not in SQLITE_AUTO_VACUUM_MODES:
+            raise ValueError(f"unsupported sqlite auto_vacuum mode: {self.auto_vacuum!r}")
+        if self.busy_timeout_ms < 0 or self.busy_retries < 0:
+            raise ValueError("sqlite busy timeout and retries must not be negative")
+
 
 @dataclass(frozen=True, slots=True)
 class AppConfig:
     database_path: Path = Path("agent_fleet.db")
     runtime_dir: Path = Path("runtime")
+    sqlite: SQLiteSettings = field(default_factory=SQLiteSettings)
+    event_codec: str = "none"
 
     @property
     def pid_file_path(self) -> Path:
@@ -17,11 +51,30 @@ class AppConfig:
     def log_file_path(self) -> Path:
         return self.runtime_dir / "orchestrator.log"
 
+    @property
+    def slot_state_path(self) -> Path:
+        return self.runtime_dir / "orchestrator.slots.json"
+
+    @property
+    def worktree_root(self) -> Path:
+        return self.runtime_dir / "worktrees"
+
+    @property
+    def wakeup_socket_path(self) -> Path:
+        return self.runtime_dir / "orchestrator.sock"
+
     @classmethod
     def from_paths(
         cls,
         *,
         database_path: str | Path = Path("agent_fleet.db"),
         runtime_dir: str | Path = Path("runtime"),
+        sqlite: SQLiteSettings | None = None,
+        event_codec: str = "none",
     ) -> "AppConfig":
-        return cls(database_path=Path(database_path), runtime_dir=Path(runtime_dir))
+        return cls(
+            database_path=Path(database_path),
+            runtime_dir=Path(runtime_dir),
+            sqlite=sqlite or SQLiteSettings(),
+            event_codec=event_codec,
+        )
@@ -1,3 +1,19 @@
-from .models import Execution, ExecutionEvent, Task, TaskStatus
+from .models import (
+    EventArchive,
+    Execution,
+    ExecutionEvent,
+    ExecutionTiming,
+    IssueCacheEntry,
+    Task,
+    TaskStatus,
+)
 
-__all__ = ["Execution", "ExecutionEvent", "Task", "TaskStatus"]
+__all__ = [
+    "EventArchive",
+    "Execution",
+    "ExecutionEvent",
+    "ExecutionTiming",
+    "IssueCacheEntry",
+    "Task",
+    "TaskStatus",
+]
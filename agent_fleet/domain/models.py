@@ -1,5 +1,3 @@
-from __future__ import annotations
-
 from enum import StrEnum
 from typing import Optional
 from uuid import uuid4
@@ -22,11 +20,15 @@ class Task(SQLModel, table=True):
     kind: str
     payload: str
     status: TaskStatus = Field(default=TaskStatus.QUEUED, index=True)
+    priority: int = 0
+    working_dir: Optional[str] = None
     created_at: str
     updated_at: str
     queued_at: str
     started_at: Optional[str] = None
     finished_at: Optional[str] = None
+    claimed_by: Optional[str] = None
+    lease_expires_at: Optional[str] = None
 
     executions: list["Execution"] = Relationship(back_populates="task")
 
@@ -57,6 +59,50 @@ class ExecutionEvent(SQLModel, table=True):
     source: str
     event_type: str
     payload: str
+    payload_codec: Optional[str] = None
+    payload_data: Optional[bytes] = None
     created_at: str
 
     execution: Optional[Execution] = Relationship(back_populates="events")
+
+
+class EventArchive(SQLModel, table=True):
+    __tablename__ = "event_archives"
+
+    execution_id: str = Field(foreign_key="executions.id", primary_key=True)
+    path: str
+    event_count: int
+    compressed_bytes: int
+    archived_at: str
+
+
+class ExecutionTiming(SQLModel, table=True):
+    __tablename__ = "execution_timings"
+
+    execution_id: str = Field(foreign_key="executions.id", primary_key=True)
+    task_id: str = Field(foreign_key="tasks.id", index=True)
+    queue_wait_seconds: Optional[float] = None
+    dispatch_seconds: Optional[float] = None
+    checkout_seconds: Optional[float] = None
+    prompt_build_seconds: Optional[float] = None
+    spawn_seconds: Optional[float] = None
+    first_event_seconds: Optional[float] = None
+    agent_seconds: Optional[float] = None
+    ingest_seconds: Optional[float] = None
+    flush_seconds: Optional[float] = None
+    finalize_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
+    recorded_at: str = Field(index=True)
+
+
+class IssueCacheEntry(SQLModel, table=True):
+    __tablename__ = "github_issue_cache"
+
+    key: str = Field(primary_key=True)
+    repo: str
+    number: int
+    updated_at: str
+    url: str
+    title: str
+    body: str
+    fetched_at: str = Field(index=True)
@@ -0,0 +1,22 @@
+from .cache import IssueCache, issue_cache_key
+from .issues import (
+    GitHubError,
+    IssueFetchResult,
+    fetch_issue,
+    fetch_issues,
+    issue_versions,
+    list_issue_versions,
+    list_issues,
+)
+
+__all__ = [
+    "GitHubError",
+    "IssueCache",
+    "IssueFetchResult",
+    "fetch_issue",
+    "fetch_issues",
+    "issue_cache_key",
+    "issue_versions",
+    "list_issue_versions",
+    "list_issues",
+]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from agent_fleet.domain.models import IssueCacheEntry
+from agent_fleet.github.issues import (
+    IssueFetchResult,
+    fetch_issues,
+    issue_versions,
+    list_issue_versions,
+)
+from agent_fleet.persistence.repository import SQLiteRepository, utc_after, utc_now
+
+DEFAULT_ISSUE_CACHE_TTL_SECONDS = 7 * 24 * 3600.0
+DEFAULT_ISSUE_CACHE_MAX_ENTRIES = 5000
+
+
+def issue_cache_key(repo: str, issue_number: int) -> str:
+    return f"{repo.lower()}#{issue_number}"
+
+
+class IssueCache:
+    """Issue titles and bodies cached in the database, keyed by `repo#number`.
+
+    Each lookup first asks GitHub only for `updatedAt` (one metadata query for
+    many issues) and re-downloads just the issues whose `updatedAt` differs
+    from the cached copy. Entries older than `ttl_seconds` are dropped, and
+    the least recently fetched go first once there are more than
+    `max_entries`.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        *,
+        ttl_seconds: float = DEFAULT_ISSUE_CACHE_TTL_SECONDS,
+        max_entries: int = DEFAULT_ISSUE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.repository = repository
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def fetch_issues(
+        self,
+        *,
+        repo: str,
+        issue_numbers: Sequence[int],
+        max_workers: int = 8,
+    ) -> IssueFetchResult:
+        versions = issue_versions(repo=repo, issue_numbers=issue_numbers)
+        return self._resolve(repo, list(dict.fromkeys(issue_numbers)), versions, max_workers=max_workers)
+
+    def list_issues(
+        self,
+        *,
+        repo: str,
+        label: str | None = None,
+        state: str = "open",
+        limit: int = 1000,
+        max_workers: int = 8,
+    ) -> IssueFetchResult:
+        versions = list_issue_versions(repo=repo, label=label, state=state, limit=limit)
+        return self._resolve(repo, list(versions), versions, max_workers=max_workers)
+
+    def _resolve(
+        self,
+        repo: str,
+        issue_numbers: list[int],
+        versions: dict[int, str],
+        *,
+        max_workers: int,
+    ) -> IssueFetchResult:
+        self.repository.evict_cached_issues(fetched_before=utc_after(-self.ttl_seconds))
+        cached = self.repository.get_cached_issues([issue_cache_key(repo, number) for number in issue_numbers])
+
+        result = IssueFetchResult(gh_calls=1)
+        stale = []
+        for number in issue_numbers:
+            entry = cached.get(issue_cache_key(repo, number))
+            if entry is not None and number in versions and entry.updated_at == versions[number]:
+                result.issues[number] = {
+                    "url": entry.url,
+                    "title": entry.title,
+                    "body": entry.body,
+                    "number": number,
+                    "updated_at": entry.updated_at,
+                }
+            else:
+                stale.append(number)
+        self.hits += len(issue_numbers) - len(stale)
+        self.misses += len(stale)
+        if not stale:
+            return result
+
+        fetched = fetch_issues(repo=repo, issue_numbers=stale, max_workers=max_workers)
+        result.issues.update(fetched.issues)
+        result.errors.update(fetched.errors)
+        result.gh_calls += fetched.gh_calls
+        fetched_at = utc_now()
+        self.repository.store_cached_issues(
+            [
+                IssueCacheEntry(
+                    key=issue_cache_key(repo, number),
+                    repo=repo,
+                    number=number,
+                    updated_at=str(issue.get("updated_at") or ""),
+                    url=str(issue.get("url") or ""),
+                    title=str(issue.get("title") or ""),
+                    body=str(issue.get("body") or ""),
+                    fetched_at=fetched_at,
+                )
+                for number, issue in fetched.issues.items()
+                if issue.get("updated_at")
+            ]
+        )
+        self.repository.evict_cached_issues(max_entries=self.max_entries)
+        # Keep the caller's order.
+        result.issues = {number: result.issues[number] for number in issue_numbers if number in result.issues}
+        return result
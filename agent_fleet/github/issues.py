@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import subprocess
+from typing import Sequence
+
+ISSUE_FIELDS = "number,title,body,url,updatedAt"
+_GRAPHQL_ISSUE_FIELDS = "number title body url updatedAt"
+_GRAPHQL_VERSION_FIELDS = "number updatedAt"
+
+# Issues requested per aliased GraphQL query; keeps responses well under
+# GitHub's node and size limits.
+GRAPHQL_BATCH_SIZE = 50
+
+
+class GitHubError(RuntimeError):
+    pass
+
+
+@dataclass(slots=True)
+class IssueFetchResult:
+    issues: dict[int, dict[str, object]] = field(default_factory=dict)
+    errors: dict[int, str] = field(default_factory=dict)
+    gh_calls: int = 0
+
+
+def fetch_issue(*, repo: str, issue_number: int) -> dict[str, object]:
+    """Fetch one issue with `gh issue view`."""
+    payload = _gh_json(
+        ["issue", "view", str(issue_number), "--repo", repo, "--json", ISSUE_FIELDS],
+        subject=f"issue {repo}#{issue_number}",
+    )
+    if not isinstance(payload, dict):
+        raise GitHubError(f"gh returned unexpected issue shape for {repo}#{issue_number}")
+    return _normalize_issue(payload, issue_number)
+
+
+def list_issues(
+    *,
+    repo: str,
+    label: str | None = None,
+    state: str = "open",
+    limit: int = 1000,
+) -> list[dict[str, object]]:
+    """List issues (with bodies) in a single `gh issue list` call."""
+    command = [
+        "issue",
+        "list",
+        "--repo",
+        repo,
+        "--state",
+        state,
+        "--limit",
+        str(limit),
+        "--json",
+        ISSUE_FIELDS,
+    ]
+    if label:
+        command.extend(["--label", label])
+    payload = _gh_json(command, subject=f"issue list for {repo}")
+    if not isinstance(payload, list):
+        raise GitHubError(f"gh returned unexpected issue list shape for {repo}")
+    return [
+        _normalize_issue(item, int(item.get("number", 0)))
+        for item in payload
+        if isinstance(item, dict)
+    ]
+
+
+def fetch_issues(
+    *,
+    repo: str,
+    issue_numbers: Sequence[int],
+    max_workers: int = 8,
+) -> IssueFetchResult:
+    """Fetch many issues by number with as few `gh` processes as possible.
+
+    Issues are requested in aliased GraphQL batches through `gh api graphql`;
+    anything a batch could not return (or every issue, if GraphQL is
+    unavailable) is fetched with `gh issue view` on a bounded thread pool.
+    """
+    result = IssueFetchResult()
+    numbers = list(dict.fromkeys(issue_numbers))
+    owner, _, name = repo.partition("/")
+    remaining: list[int] = []
+    for start in range(0, len(numbers), GRAPHQL_BATCH_SIZE):
+        batch = numbers[start : start + GRAPHQL_BATCH_SIZE]
+        result.gh_calls += 1
+        raw = _graphql_issues(owner=owner, name=name, issue_numbers=batch, fields=_GRAPHQL_ISSUE_FIELDS)
+        found = {number: _normalize_issue(item, number) for number, item in raw.items()}
+        result.issues.update(found)
+        remaining.extend(number for number in batch if number not in found)
+
+    if remaining:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(remaining)))) as pool:
+            futures = {
+                number: pool.submit(fetch_issue, repo=repo, issue_number=number)
+                for number in remaining
+            }
+        for number, future in futures.items():
+            result.gh_calls += 1
+            error = future.exception()
+            if error is None:
+                result.issues[number] = future.result()
+            else:
+                result.errors[number] = str(error)
+    return result
+
+
+def issue_versions(*, repo: str, issue_numbers: Sequence[int]) -> dict[int, str]:
+    """`updatedAt` of each issue from metadata-only GraphQL batches (no titles or bodies).
+
+    Issues that don't exist (or can't be read) are missing from the result.
+    """
+    owner, _, name = repo.partition("/")
+    numbers = list(dict.fromkeys(issue_numbers))
+    versions: dict[int, str] = {}
+    for start in range(0, len(numbers), GRAPHQL_BATCH_SIZE * 2):
+        batch = numbers[start : start + GRAPHQL_BATCH_SIZE * 2]
+        found = _graphql_issues(owner=owner, name=name, issue_numbers=batch, fields=_GRAPHQL_VERSION_FIELDS)
+        versions.update({number: str(item.get("updatedAt") or "") for number, item in found.items()})
+    return versions
+
+
+def list_issue_versions(
+    *,
+    repo: str,
+    label: str | None = None,
+    state: str = "open",
+    limit: int = 1000,
+) -> dict[int, str]:
+    """Numbers and `updatedAt` of matching issues from one metadata-only `gh issue list` call."""
+    command = [
+        "issue",
+        "list",
+        "--repo",
+        repo,
+        "--state",
+        state,
+        "--limit",
+        str(limit),
+        "--json",
+        "number,updatedAt",
+    ]
+    if label:
+        command.extend(["--label", label])
+    payload = _gh_json(command, subject=f"issue list for {repo}")
+    if not isinstance(payload, list):
+        raise GitHubError(f"gh returned unexpected issue list shape for {repo}")
+    return {
+        int(item["number"]): str(item.get("updatedAt") or "")
+        for item in payload
+        if isinstance(item, dict) and isinstance(item.get("number"), int)
+    }
+
+
+def _graphql_issues(
+    *,
+    owner: str,
+    name: str,
+    issue_numbers: Sequence[int],
+    fields: str,
+) -> dict[int, dict[str, object]]:
+    if not owner or not name or not issue_numbers:
+        return {}
+    selections = " ".join(f"i{number}: issue(number: {number}) {{ {fields} }}" for number in issue_numbers)
+    query = f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {selections} }} }}"
+    completed = subprocess.run(
+        ["gh", "api", "graphql", "-f", f"query={query}", "-f", f"owner={owner}", "-f", f"name={name}"],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    # Missing issues come back as null alongside a GraphQL error (and a
+    # non-zero exit), so use whatever data was returned either way.
+    try:
+        response = json.loads(completed.stdout or "null")
+    except json.JSONDecodeError:
+        return {}
+    repository = ((response or {}).get("data") or {}).get("repository") if isinstance(response, dict) else None
+    if not isinstance(repository, dict):
+        return {}
+    issues = {}
+    for number in issue_numbers:
+        item = repository.get(f"i{number}")
+        if isinstance(item, dict):
+            issues[number] = item
+    return issues
+
+
+def _gh_json(arguments: list[str], *, subject: str) -> object:
+    result = subprocess.run(["gh", *arguments], check=False, capture_output=True, text=True)
+    if result.returncode != 0:
+        error_text = (result.stderr or result.stdout).strip() or "unknown gh error"
+        raise GitHubError(f"failed to fetch github {subject}: {error_text}")
+
+    raw = result.stdout.strip()
+    if not raw:
+        raise GitHubError(f"gh returned an empty response for {subject}")
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError as error:
+        raise GitHubError(f"gh returned invalid JSON for {subject}") from error
+
+
+def _normalize_issue(payload: dict[str, object], issue_number: int) -> dict[str, object]:
+    return {
+        "url": str(payload.get("url") or "").strip(),
+        "title": str(payload.get("title") or "").strip(),
+        "body": str(payload.get("body") or "").strip(),
+        "number": payload.get("number", issue_number),
+        "updated_at": str(payload.get("updatedAt") or ""),
+    }
@@ -0,0 +1,17 @@
+from .harness import (
+    FakeAgentProfile,
+    LoadTestReport,
+    ResourceSample,
+    ResourceSampler,
+    enqueue_load_tasks,
+    run_load_test,
+)
+
+__all__ = [
+    "FakeAgentProfile",
+    "LoadTestReport",
+    "ResourceSample",
+    "ResourceSampler",
+    "enqueue_load_tasks",
+    "run_load_test",
+]
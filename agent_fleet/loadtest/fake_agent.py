@@ -0,0 +1,98 @@
+"""Synthetic agent used by `agent-fleet loadtest`.
+
+Emits a paced, repeating mix of Codex-style JSON events, raw stdout lines
+and stderr lines, then exits. The orchestrator runs it by file path, so it
+must only import the standard library: every spawn pays its startup cost.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from typing import Sequence
+
+LINE_KINDS = ("json", "raw", "stderr")
+DEFAULT_MIX = "json=8,raw=1,stderr=1"
+# Lines due in the same tick are written and flushed together.
+_TICK_SECONDS = 0.01
+
+
+def parse_mix(text: str) -> tuple[tuple[str, int], ...]:
+    """Parse `json=8,raw=1,stderr=1` into `(kind, weight)` pairs, dropping zero weights."""
+    mix = []
+    for part in text.split(","):
+        kind, separator, weight = part.strip().partition("=")
+        if not separator or kind not in LINE_KINDS:
+            raise ValueError(f"mix entries must look like KIND=WEIGHT with KIND in {LINE_KINDS}: {part!r}")
+        try:
+            count = int(weight)
+        except ValueError:
+            raise ValueError(f"mix weight must be an integer: {part!r}") from None
+        if count < 0:
+            raise ValueError(f"mix weight must not be negative: {part!r}")
+        if count:
+            mix.append((kind, count))
+    if not mix:
+        raise ValueError("mix needs at least one positive weight")
+    return tuple(mix)
+
+
+def format_mix(mix: Sequence[tuple[str, int]]) -> str:
+    return ",".join(f"{kind}={weight}" for kind, weight in mix)
+
+
+def render_line(kind: str, index: int, filler: str) -> str:
+    if kind == "json":
+        item = {"id": f"item_{index}", "type": "agent_message", "text": filler}
+        return json.dumps({"type": "item.completed", "item": item}, separators=(",", ":"))
+    if kind == "stderr":
+        return f"warning: synthetic stderr line {index} {filler}"
+    return f"synthetic progress line {index} {filler}"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="lines per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to keep emitting")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="relative weights of each line kind")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="filler characters per line")
+    parser.add_argument("--exit-code", type=int, default=0)
+    # The orchestrator appends the prompt as the last argument; it is ignored.
+    parser.add_argument("prompt", nargs="?")
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as error:
+        parser.error(str(error))
+
+    pattern = [kind for kind, weight in mix for _ in range(weight)]
+    filler = "x" * max(args.payload_bytes, 0)
+    total = round(max(args.rate, 0.0) * max(args.duration, 0.0))
+    started = time.monotonic()
+    emitted = 0
+    while emitted < total:
+        due = min(int((time.monotonic() - started) * args.rate) + 1, total)
+        stdout_lines = []
+        stderr_lines = []
+        for index in range(emitted, due):
+            kind = pattern[index % len(pattern)]
+            line = render_line(kind, index, filler)
+            (stderr_lines if kind == "stderr" else stdout_lines).append(line + "\n")
+        emitted = due
+        if stdout_lines:
+            sys.stdout.write("".join(stdout_lines))
+            sys.stdout.flush()
+        if stderr_lines:
+            sys.stderr.write("".join(stderr_lines))
+            sys.stderr.flush()
+        next_due = started + emitted / args.rate
+        time.sleep(max(next_due - time.monotonic(), _TICK_SECONDS))
+    # Agents run for their whole duration even when the last line is due earlier.
+    time.sleep(max(started + args.duration - time.monotonic(), 0.0))
+    return args.exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
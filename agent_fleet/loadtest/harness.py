@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import json
+import os
+from pathlib import Path
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Protocol, Sequence
+
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.loadtest import fake_agent
+from agent_fleet.observability.metrics import fleet_metrics
+from agent_fleet.observability.timings import EXECUTION_STAGES, stage_percentiles
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.base import TaskQueue
+
+# Stages shown in the load test report; see `agent_fleet.observability.timings`.
+REPORT_STAGES = ("queue_wait", "dispatch", "spawn", "first_event", "flush", "finalize", "overhead", "total")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_STATM_PATH = Path("/proc/self/statm")
+
+
+class _Service(Protocol):
+    def run(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+@dataclass(frozen=True, slots=True)
+class FakeAgentProfile:
+    """What each synthetic agent emits: `events_per_second` lines for `duration_seconds`."""
+
+    events_per_second: float = 50.0
+    duration_seconds: float = 5.0
+    mix: tuple[tuple[str, int], ...] = fake_agent.parse_mix(fake_agent.DEFAULT_MIX)
+    payload_bytes: int = 256
+
+    def __post_init__(self) -> None:
+        if self.events_per_second < 0 or self.duration_seconds < 0:
+            raise ValueError("fake agent rate and duration must not be negative")
+        if self.payload_bytes < 0:
+            raise ValueError("fake agent payload size must not be negative")
+
+    @property
+    def events_per_agent(self) -> int:
+        return round(self.events_per_second * self.duration_seconds)
+
+    def command(self) -> tuple[str, ...]:
+        """Command for `CodexRunner(command=...)`; the runner appends the prompt."""
+        return (
+            sys.executable,
+            fake_agent.__file__,
+            "--rate",
+            f"{self.events_per_second:g}",
+            "--duration",
+            f"{self.duration_seconds:g}",
+            "--mix",
+            fake_agent.format_mix(self.mix),
+            "--payload-bytes",
+            str(self.payload_bytes),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ResourceSample:
+    elapsed_seconds: float
+    cpu_seconds: float
+    rss_bytes: int
+    threads: int
+    events_ingested: float
+
+
+class ResourceSampler:
+    """Samples this process's CPU time, RSS, thread count and ingested events on a thread."""
+
+    def __init__(self, interval_seconds: float, events_ingested: Callable[[], float]) -> None:
+        self.interval_seconds = interval_seconds
+        self.samples: list[ResourceSample] = []
+        self._events_ingested = events_ingested
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self.sample()
+        self._thread.start()
+
+    def stop(self) -> list[ResourceSample]:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return self.samples
+
+    def sample(self) -> ResourceSample:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        sample = ResourceSample(
+            elapsed_seconds=time.perf_counter() - self._started,
+            cpu_seconds=usage.ru_utime + usage.ru_stime,
+            rss_bytes=current_rss_bytes(),
+            threads=threading.active_count(),
+            events_ingested=self._events_ingested(),
+        )
+        self.samples.append(sample)
+        return sample
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.sample()
+
+
+@dataclass(frozen=True, slots=True)
+class LoadTestReport:
+    tasks: int
+    succeeded: int
+    failed: int
+    completed: bool
+    wall_seconds: float
+    events_ingested: int
+    events_per_second: float
+    peak_events_per_second: float
+    database_bytes_before: int
+    database_bytes_after: int
+    cpu_seconds: float
+    agents_cpu_seconds: float
+    rss_start_bytes: int
+    rss_peak_bytes: int
+    threads_peak: int
+    stages: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def cpu_percent(self) -> float:
+        return self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+
+    @property
+    def database_growth_bytes(self) -> int:
+        return self.database_bytes_after - self.database_bytes_before
+
+    def as_dict(self) -> dict[str, object]:
+        document = asdict(self)
+        document["cpu_percent"] = self.cpu_percent
+        document["database_growth_bytes"] = self.database_growth_bytes
+        return document
+
+
+def enqueue_load_tasks(queue: TaskQueue, work_dir: Path, count: int) -> list[str]:
+    """Queue `count` plain tasks, each with its own empty working directory under `work_dir`."""
+    records = []
+    for index in range(count):
+        working_dir = work_dir / "working-dirs" / f"task-{index:05d}"
+        working_dir.mkdir(parents=True, exist_ok=True)
+        payload = {"working_dir": str(working_dir), "instruction": f"Load test task {index}"}
+        records.append({"kind": "codex", "payload": json.dumps(payload)})
+    return queue.enqueue_many(records)
+
+
+def run_load_test(
+    repository: SQLiteRepository,
+    service: _Service,
+    task_ids: Sequence[str],
+    *,
+    database_path: Path,
+    sample_interval_seconds: float = 0.5,
+    timeout_seconds: float | None = None,
+) -> LoadTestReport:
+    """Run `service` until every task in `task_ids` has finished, then stop it and report.
+
+    `repository` must point at a database holding only the load test's tasks.
+    CPU and RSS are this process's, which is the orchestrator; the agents'
+    CPU time is reported separately once they have been reaped.
+    """
+    counter = fleet_metrics().events_ingested.labels()
+    events_before = counter.value
+    database_bytes_before = database_size_bytes(database_path)
+    agents_cpu_before = _children_cpu_seconds()
+    sampler = ResourceSampler(sample_interval_seconds, lambda: counter.value - events_before)
+    thread = threading.Thread(target=service.run, name="loadtest-orchestrator")
+
+    sampler.start()
+    started = time.perf_counter()
+    thread.start()
+    deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+    completed = False
+    try:
+        while thread.is_alive():
+            counts = repository.count_tasks_by_status()
+            if counts[TaskStatus.QUEUED] == 0 and counts[TaskStatus.RUNNING] == 0:
+                completed = True
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(min(sample_interval_seconds, 0.1))
+        wall_seconds = time.perf_counter() - started
+    finally:
+        service.stop()
+        thread.join()
+    samples = sampler.stop()
+
+    counts = repository.count_tasks_by_status()
+    events = int(counter.value - events_before)
+    timings = [timing for task_id in task_ids for timing in repository.list_execution_timings(task_id)]
+    stages = stage_percentiles(
+        {stage: getattr(timing, f"{stage}_seconds") for stage in EXECUTION_STAGES} for timing in timings
+    )
+    return LoadTestReport(
+        tasks=len(task_ids),
+        succeeded=counts[TaskStatus.SUCCEEDED],
+        failed=counts[TaskStatus.FAILED],
+        completed=completed,
+        wall_seconds=wall_seconds,
+        events_ingested=events,
+        events_per_second=events / wall_seconds if wall_seconds else 0.0,
+        peak_events_per_second=_peak_rate(samples),
+        database_bytes_before=database_bytes_before,
+        database_bytes_after=database_size_bytes(database_path),
+        cpu_seconds=samples[-1].cpu_seconds - samples[0].cpu_seconds,
+        agents_cpu_seconds=_children_cpu_seconds() - agents_cpu_before,
+        rss_start_bytes=samples[0].rss_bytes,
+        rss_peak_bytes=max(sample.rss_bytes for sample in samples),
+        threads_peak=max(sample.threads for sample in samples),
+        stages={stage: stats for stage, stats in stages.items() if stage in REPORT_STAGES},
+    )
+
+
+def database_size_bytes(database_path: Path) -> int:
+    """Size of the database file plus its WAL and shared-memory files."""
+    total = 0
+    for suffix in ("", "-wal", "-shm"):
+        path = Path(f"{database_path}{suffix}")
+        if path.exists():
+            total += path.stat().st_size
+    return total
+
+
+def current_rss_bytes() -> int:
+    try:
+        resident_pages = int(_STATM_PATH.read_text(encoding="ascii").split()[1])
+    except (OSError, IndexError, ValueError):
+        # No procfs: fall back to the peak, which is what macOS and the BSDs expose.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return resident_pages * _PAGE_SIZE
+
+
+def _children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rate(samples: Sequence[ResourceSample]) -> float:
+    peak = 0.0
+    for previous, current in zip(samples, samples[1:]):
+        elapsed = current.elapsed_seconds - previous.elapsed_seconds
+        if elapsed > 0:
+            peak = max(peak, (current.events_ingested - previous.events_ingested) / elapsed)
+    return peak
@@ -0,0 +1,13 @@
+from .metrics import Counter, FleetMetrics, Gauge, Histogram, MetricsRegistry, fleet_metrics
+from .server import MetricsServer, parse_metrics_address
+
+__all__ = [
+    "Counter",
+    "FleetMetrics",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsServer",
+    "fleet_metrics",
+    "parse_metrics_address",
+]
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import UTC, datetime
+import math
+import threading
+from typing import Iterator, Mapping, Sequence
+
+from agent_fleet.domain.models import Task, TaskStatus
+from agent_fleet.observability.timings import queue_wait_seconds
+
+DB_WRITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+EXECUTION_DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0)
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        # One slot per bucket plus the implicit +Inf bucket; cumulated on render.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: object):  # type: ignore[no-untyped-def]
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values!r}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    def _labelled_children(self) -> list[tuple[dict[str, str], object]]:
+        with self._lock:
+            items = sorted(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, child in self._labelled_children():
+            yield "_total", labels, child.value  # type: ignore[attr-defined]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def _samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, child in self._labelled_children():
+            yield "", labels, child.value  # type: ignore[attr-defined]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, child in self._labelled_children():
+            assert isinstance(child, _HistogramChild)
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float],
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets=buckets)
+        self.register(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class FleetMetrics:
+    """The orchestrator's metrics, updated in memory by the components that do the work.
+
+    Every update is a short uncontended lock on one value, and scrapes only
+    read memory. Queue depth is the exception: other processes enqueue
+    tasks too, so the dispatcher refreshes it from the database on its own
+    schedule, never on a scrape.
+    """
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        registry = self.registry
+        self.tasks = registry.gauge(
+            "agent_fleet_tasks",
+            "Tasks in the database by status, refreshed by the dispatcher.",
+            ("status",),
+        )
+        self.oldest_queued_task_age = registry.gauge(
+            "agent_fleet_oldest_queued_task_age_seconds",
+            "Seconds the longest-waiting queued task has been queued.",
+        )
+        self.tasks_dispatched = registry.counter(
+            "agent_fleet_tasks_dispatched",
+            "Tasks claimed and started by this orchestrator.",
+        )
+        self.task_queue_wait = registry.histogram(
+            "agent_fleet_task_queue_wait_seconds",
+            "Time from queueing to dispatch of claimed tasks.",
+            buckets=QUEUE_WAIT_BUCKETS,
+        )
+        self.executions_running = registry.gauge(
+            "agent_fleet_executions_running",
+            "Executions currently running in this orchestrator.",
+        )
+        self.execution_duration = registry.histogram(
+            "agent_fleet_execution_duration_seconds",
+            "Wall time of finished executions.",
+            ("outcome",),
+            buckets=EXECUTION_DURATION_BUCKETS,
+        )
+        self.agent_exits = registry.counter(
+            "agent_fleet_agent_exits",
+            "Finished executions by agent exit code (`none` when the agent never ran).",
+            ("exit_code",),
+        )
+        self.events_ingested = registry.counter(
+            "agent_fleet_events_ingested",
+            "Execution events committed to the database.",
+        )
+        self.db_write_latency = registry.histogram(
+            "agent_fleet_db_write_seconds",
+            "Latency of database writes on the dispatch and ingestion paths.",
+            ("operation",),
+            buckets=DB_WRITE_BUCKETS,
+        )
+
+    def record_dispatch(self, tasks: Sequence[Task], *, claim_seconds: float) -> None:
+        self.db_write_latency.labels("claim").observe(claim_seconds)
+        if not tasks:
+            return
+        self.tasks_dispatched.inc(len(tasks))
+        for task in tasks:
+            waited = queue_wait_seconds(task)
+            if waited is not None:
+                self.task_queue_wait.observe(waited)
+
+    def record_execution(self, *, outcome: str, exit_code: int | None, seconds: float) -> None:
+        self.execution_duration.labels(outcome).observe(seconds)
+        self.agent_exits.labels("none" if exit_code is None else exit_code).inc()
+
+    def record_queue(self, counts: Mapping[TaskStatus, int], oldest_queued_at: str | None) -> None:
+        for status, count in counts.items():
+            self.tasks.labels(status.value).set(count)
+        if oldest_queued_at is None:
+            self.oldest_queued_task_age.set(0.0)
+        else:
+            waited = datetime.now(tz=UTC) - datetime.fromisoformat(oldest_queued_at)
+            self.oldest_queued_task_age.set(max(waited.total_seconds(), 0.0))
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+_FLEET_METRICS = FleetMetrics()
+
+
+def fleet_metrics() -> FleetMetrics:
+    return _FLEET_METRICS
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + rendered + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from typing import Callable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def parse_metrics_address(address: str) -> tuple[str, int]:
+    """Split `host:port` (or a bare port, bound to localhost)."""
+    host, separator, port = address.rpartition(":")
+    if not separator:
+        host = "127.0.0.1"
+    try:
+        port_number = int(port)
+    except ValueError as error:
+        raise ValueError(f"invalid metrics address: {address!r}") from error
+    if not 0 <= port_number <= 65535:
+        raise ValueError(f"invalid metrics port: {port_number}")
+    return host.strip("[]") or "127.0.0.1", port_number
+
+
+class MetricsServer:
+    """Serves `render()` at `GET /metrics` from a background HTTP thread."""
+
+    def __init__(self, host: str, port: int, render: Callable[[], str]) -> None:
+        self.host = host
+        self.port = port
+        self.render = render
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The bound address; the real port when started with port 0."""
+        if self._server is None:
+            return self.host, self.port
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        render = self.render
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                # Scrapes every few seconds would flood the orchestrator log.
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="agent-fleet-metrics",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime
+import math
+import time
+from typing import Iterable, Iterator, Mapping, Sequence
+
+from agent_fleet.domain.models import Task
+
+# Hot-path stages of one execution, in the order they happen.
+#   queue_wait    queued_at -> claimed (wall clock, from the task row)
+#   dispatch      claim query start -> execution row created
+#   checkout      worktree acquisition
+#   prompt_build  build_prompt: template render plus cached `git_facts` (git runs only on a cache miss)
+#   spawn         starting the agent process and marking the execution running
+#   first_event   agent process started -> first output line received
+#   agent         agent process started -> agent process exited
+#   ingest        parsing output lines and handing them to the event writer
+#   flush         waiting for the event writer to commit the last events
+#   finalize      execution and task status writes
+#   total         claim query start -> task status written
+EXECUTION_STAGES = (
+    "queue_wait",
+    "dispatch",
+    "checkout",
+    "prompt_build",
+    "spawn",
+    "first_event",
+    "agent",
+    "ingest",
+    "flush",
+    "finalize",
+    "total",
+)
+# `total` minus `agent`: the time an execution spent in the orchestrator itself.
+OVERHEAD_STAGE = "overhead"
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+
+class StageTimer:
+    """Accumulates monotonic stage durations (seconds) for one execution."""
+
+    __slots__ = ("durations",)
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+
+def queue_wait_seconds(task: Task) -> float | None:
+    """Seconds a claimed task spent queued, from its `queued_at` and `started_at`."""
+    if not task.started_at or not task.queued_at:
+        return None
+    waited = datetime.fromisoformat(task.started_at) - datetime.fromisoformat(task.queued_at)
+    return max(waited.total_seconds(), 0.0)
+
+
+def with_overhead(durations: Mapping[str, float | None]) -> dict[str, float | None]:
+    """Return the stage durations plus the derived orchestration `overhead`."""
+    values = {stage: durations.get(stage) for stage in EXECUTION_STAGES}
+    total, agent = values["total"], values["agent"]
+    values[OVERHEAD_STAGE] = None if total is None or agent is None else max(total - agent, 0.0)
+    return values
+
+
+def stage_percentiles(
+    rows: Iterable[Mapping[str, float | None]],
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> dict[str, dict[str, float]]:
+    """Nearest-rank percentiles, `max` and sample count per stage; stages never recorded are omitted."""
+    samples: dict[str, list[float]] = {}
+    for row in rows:
+        for stage, value in with_overhead(row).items():
+            if value is not None:
+                samples.setdefault(stage, []).append(value)
+    summary: dict[str, dict[str, float]] = {}
+    for stage in (*EXECUTION_STAGES, OVERHEAD_STAGE):
+        values = sorted(samples.get(stage, ()))
+        if not values:
+            continue
+        stats = {f"p{percentile:g}": _nearest_rank(values, percentile) for percentile in percentiles}
+        stats["max"] = values[-1]
+        stats["count"] = float(len(values))
+        summary[stage] = stats
+    return summary
+
+
+def _nearest_rank(values: Sequence[float], percentile: float) -> float:
+    rank = max(math.ceil(percentile / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
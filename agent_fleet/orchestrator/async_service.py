@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+import threading
+import time
+
+from agent_fleet.agents.async_codex_runner import AsyncCodexRunner, install_pidfd_child_watcher
+from agent_fleet.observability.timings import queue_wait_seconds
+from agent_fleet.orchestrator.service import BaseOrchestratorService
+from agent_fleet.persistence.repository import DEFAULT_LEASE_SECONDS, SQLiteRepository
+from agent_fleet.prompts.policy import TASK_TYPE_TEMPLATES, template_registry
+from agent_fleet.queue.base import TaskQueue
+from agent_fleet.workspace.worktrees import WorktreePool
+
+
+class AsyncOrchestratorService(BaseOrchestratorService):
+    """`OrchestratorService` driven by one asyncio event loop.
+
+    Every execution is a coroutine on the loop rather than a slot thread with
+    two pipe readers, so `max_concurrency` can be in the hundreds without the
+    thread count growing with it. Queue and repository calls still block, so
+    they run in the loop's default executor. Claiming, lease renewal, idle
+    backoff, wakeup nudges and graceful drain behave as in the threaded
+    service.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        queue: TaskQueue,
+        codex_runner: AsyncCodexRunner,
+        *,
+        poll_interval_seconds: float = 1.0,
+        stop_event: threading.Event | None = None,
+        max_concurrency: int = 64,
+        worker_id: str | None = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_poll_interval_seconds: float | None = None,
+        wakeup_socket_path: str | Path | None = None,
+        worktree_pool: WorktreePool | None = None,
+        archive_after_seconds: float | None = None,
+        archive_interval_seconds: float = 3600.0,
+        queue_metrics_interval_seconds: float | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        super().__init__(
+            repository,
+            queue,
+            poll_interval_seconds=poll_interval_seconds,
+            stop_event=stop_event,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+            max_poll_interval_seconds=max_poll_interval_seconds,
+            wakeup_socket_path=wakeup_socket_path,
+            worktree_pool=worktree_pool,
+            archive_after_seconds=archive_after_seconds,
+            archive_interval_seconds=archive_interval_seconds,
+            queue_metrics_interval_seconds=queue_metrics_interval_seconds,
+        )
+        self.codex_runner = codex_runner
+        self.max_concurrency = max_concurrency
+        self._running: dict[asyncio.Task[None], str] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._nudged = False
+
+    def run(self) -> None:
+        asyncio.run(self.run_async())
+
+    def stop(self) -> None:
+        """Stop dispatching; safe to call from any thread or a signal handler."""
+        self.stop_event.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._set_wakeup)
+            except RuntimeError:
+                pass
+
+    def running_task_ids(self) -> list[str]:
+        return list(self._running.values())
+
+    async def run_async(self) -> None:
+        # Surface broken prompt templates at startup instead of failing every task.
+        template_registry().preload(TASK_TYPE_TEMPLATES.values())
+        self._loop = asyncio.get_running_loop()
+        install_pidfd_child_watcher()
+        self._wakeup = asyncio.Event()
+        if self.stop_event.is_set():
+            self._wakeup.set()
+        listener = self._start_wakeup_listener()
+        archiver = None
+        if self.archive_after_seconds is not None:
+            archiver = asyncio.create_task(self._archive_loop())
+        try:
+            while not self.stop_event.is_set():
+                self._wakeup.clear()
+                if self._nudged:
+                    self._nudged = False
+                    self._idle_wait_seconds = self.poll_interval_seconds
+                await self._maintain_leases()
+                await asyncio.to_thread(self.queue.maintain)
+                await self._refresh_queue_metrics()
+                free_slots = self.max_concurrency - len(self._running)
+                if free_slots <= 0:
+                    await self._wait(self.poll_interval_seconds)
+                    continue
+                claim_started = time.perf_counter()
+                tasks = await asyncio.to_thread(
+                    self.queue.claim,
+                    worker_id=self.worker_id,
+                    limit=free_slots,
+                    lease_seconds=self.lease_seconds,
+                )
+                self.metrics.record_dispatch(tasks, claim_seconds=time.perf_counter() - claim_started)
+                if not tasks:
+                    # Idle: back off exponentially; enqueue nudges reset the wait.
+                    await self._wait(self._idle_wait_seconds)
+                    self._back_off()
+                    continue
+                self._idle_wait_seconds = self.poll_interval_seconds
+                for task in tasks:
+                    execution = asyncio.create_task(
+                        self._run_task(
+                            task.id,
+                            task.kind,
+                            task.payload,
+                            claim_started=claim_started,
+                            queue_wait=queue_wait_seconds(task),
+                        )
+                    )
+                    self._running[execution] = task.id
+                    execution.add_done_callback(self._on_task_done)
+        finally:
+            # Graceful drain: stop dispatching but let in-flight executions finish,
+            # renewing their leases so other dispatchers don't reclaim them meanwhile.
+            while self._running:
+                await self._maintain_leases(requeue_expired=False)
+                await asyncio.wait(list(self._running), timeout=self.poll_interval_seconds)
+            if archiver is not None:
+                archiver.cancel()
+                await asyncio.gather(archiver, return_exceptions=True)
+            if listener is not None:
+                listener.close()
+            self._loop = None
+
+    def _set_wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _on_wakeup(self) -> None:
+        # Called from the listener thread.
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._nudge)
+
+    def _nudge(self) -> None:
+        self._nudged = True
+        self._set_wakeup()
+
+    def _on_task_done(self, execution: asyncio.Task[None]) -> None:
+        self._running.pop(execution, None)
+        if not execution.cancelled() and execution.exception() is not None:
+            print(f"task execution crashed: {execution.exception()}", file=sys.stderr)
+        self._set_wakeup()
+
+    async def _archive_loop(self) -> None:
+        while not self.stop_event.is_set():
+            if not await asyncio.to_thread(self._archive_batch):
+                await asyncio.sleep(self.archive_interval_seconds)
+
+    async def _refresh_queue_metrics(self) -> None:
+        if self._queue_metrics_due():
+            await asyncio.to_thread(self._record_queue_metrics)
+
+    async def _maintain_leases(self, *, requeue_expired: bool = True) -> None:
+        if self._lease_maintenance_due():
+            await asyncio.to_thread(
+                self._renew_leases,
+                self.running_task_ids(),
+                requeue_expired=requeue_expired,
+            )
+
+    async def _wait(self, timeout: float) -> None:
+        if self.stop_event.is_set() or self._wakeup is None:
+            return
+        # Never sleep past the next lease renewal.
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=min(timeout, self.lease_seconds / 3))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_task(
+        self,
+        task_id: str,
+        task_kind: str,
+        task_payload: str,
+        *,
+        claim_started: float | None = None,
+        queue_wait: float | None = None,
+    ) -> None:
+        claim_started = time.perf_counter() if claim_started is None else claim_started
+        self.metrics.executions_running.inc()
+        try:
+            execution, timer = await asyncio.to_thread(
+                self._begin_execution,
+                task_id,
+                task_kind,
+                claim_started=claim_started,
+                queue_wait=queue_wait,
+            )
+            try:
+                run_dir, worktree, prompt = await asyncio.to_thread(
+                    self._prepare_run,
+                    task_payload,
+                    execution.id,
+                    timer,
+                )
+                try:
+                    result = await self.codex_runner.run(
+                        execution_id=execution.id,
+                        prompt=prompt,
+                        working_dir=run_dir,
+                    )
+                finally:
+                    await asyncio.to_thread(self._release_worktree, worktree)
+            except Exception as error:  # noqa: BLE001
+                await asyncio.to_thread(
+                    self._fail_execution,
+                    task_id,
+                    execution.id,
+                    timer,
+                    claim_started,
+                    error,
+                )
+                return
+            await asyncio.to_thread(
+                self._complete_execution,
+                task_id,
+                execution.id,
+                timer,
+                claim_started,
+                result,
+            )
+        finally:
+            self.metrics.executions_running.dec()
@@ -1,79 +1,496 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import partial
 import json
 from pathlib import Path
+import sys
 import threading
+import time
 
-from agent_fleet.agents.codex_runner import CodexRunner
-from agent_fleet.persistence.repository import SQLiteRepository
-from agent_fleet.prompts.policy import build_prompt
-from agent_fleet.queue.fifo import FIFOQueue
+from agent_fleet.agents.codex_runner import CodexRunner, CodexRunResult
+from agent_fleet.domain.models import Execution
+from agent_fleet.observability.metrics import fleet_metrics
+from agent_fleet.observability.timings import StageTimer, queue_wait_seconds
+from agent_fleet.orchestrator.slots import SlotManager, SlotSnapshot
+from agent_fleet.orchestrator.wakeup import WakeupListener
+from agent_fleet.persistence.repository import (
+    DEFAULT_LEASE_SECONDS,
+    SQLiteRepository,
+    default_worker_id,
+)
+from agent_fleet.prompts.policy import TASK_TYPE_TEMPLATES, build_prompt, template_registry
+from agent_fleet.queue.base import TaskQueue
+from agent_fleet.workspace.worktrees import BRANCH_PREFIX, WorktreePool, repository_root
 
 
-class OrchestratorService:
+@dataclass(frozen=True, slots=True)
+class TaskSpec:
+    working_dir: Path
+    instruction: str
+    task_type: str
+    input_mode: str
+    github_issue: dict[str, object] | None
+
+    def build_prompt(self, run_dir: Path) -> str:
+        return build_prompt(
+            task_type=self.task_type,
+            working_dir=run_dir,
+            instruction=self.instruction,
+            input_mode=self.input_mode,
+            github_issue=self.github_issue,
+        )
+
+
+def parse_task_payload(task_payload: str) -> TaskSpec:
+    payload = json.loads(task_payload)
+    working_dir = Path(payload["working_dir"])
+    if not working_dir.exists() or not working_dir.is_dir():
+        raise ValueError(f"working_dir does not exist: {working_dir}")
+    github_issue = payload.get("github_issue")
+    return TaskSpec(
+        working_dir=working_dir,
+        instruction=str(payload.get("instruction", "")),
+        task_type=str(payload.get("task_type", "feature_implementation")),
+        input_mode=str(payload.get("input_mode", "plain_task")),
+        github_issue=github_issue if isinstance(github_issue, dict) else None,
+    )
+
+
+def checkout_working_dir(
+    worktree_pool: WorktreePool | None,
+    working_dir: Path,
+    *,
+    branch: str | None = None,
+) -> tuple[Path, Path | None]:
+    """Pick the directory to run in: a pooled worktree on `branch` when isolation is enabled.
+
+    Returns `(run_dir, worktree)`; `worktree` must be released back to the pool.
+    """
+    if worktree_pool is None:
+        return working_dir, None
+    source = repository_root(working_dir)
+    if source is None:
+        return working_dir, None
+    worktree = worktree_pool.acquire(source, branch=branch)
+    return worktree / working_dir.resolve().relative_to(source), worktree
+
+
+class BaseOrchestratorService(ABC):
+    """Dispatcher state and the blocking steps shared by the threaded and asyncio services.
+
+    Subclasses own the dispatch loop and decide how each step runs: the
+    threaded service calls them directly, the asyncio service hands them to
+    `asyncio.to_thread`. Only the agent run itself differs between the two.
+    """
+
     def __init__(
         self,
         repository: SQLiteRepository,
-        queue: FIFOQueue,
-        codex_runner: CodexRunner,
+        queue: TaskQueue,
         *,
-        poll_interval_seconds: float = 1.0,
-        stop_event: threading.Event | None = None,
+        poll_interval_seconds: float,
+        stop_event: threading.Event | None,
+        worker_id: str | None,
+        lease_seconds: float,
+        max_poll_interval_seconds: float | None,
+        wakeup_socket_path: str | Path | None,
+        worktree_pool: WorktreePool | None,
+        archive_after_seconds: float | None,
+        archive_interval_seconds: float,
+        queue_metrics_interval_seconds: float | None,
     ) -> None:
         self.repository = repository
         self.queue = queue
-        self.codex_runner = codex_runner
         self.poll_interval_seconds = poll_interval_seconds
+        self.max_poll_interval_seconds = max(
+            max_poll_interval_seconds or poll_interval_seconds,
+            poll_interval_seconds,
+        )
+        self.wakeup_socket_path = Path(wakeup_socket_path) if wakeup_socket_path else None
+        self.worktree_pool = worktree_pool
         self.stop_event = stop_event or threading.Event()
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.archive_after_seconds = archive_after_seconds
+        self.archive_interval_seconds = archive_interval_seconds
+        self.queue_metrics_interval_seconds = queue_metrics_interval_seconds
+        self.metrics = fleet_metrics()
+        self._next_queue_metrics = 0.0
+        self._next_lease_maintenance = 0.0
+        self._idle_wait_seconds = poll_interval_seconds
 
-    def run(self) -> None:
-        while not self.stop_event.is_set():
-            task = self.queue.dequeue()
-            if task is None:
-                self.stop_event.wait(self.poll_interval_seconds)
-                continue
-            self._run_task(task.id, task.kind, task.payload)
+    @abstractmethod
+    def running_task_ids(self) -> list[str]:
+        """Ids of the tasks this dispatcher is executing, for lease renewal."""
 
-    def stop(self) -> None:
-        self.stop_event.set()
+    @abstractmethod
+    def _on_wakeup(self) -> None:
+        """Handle an enqueue nudge; called from the wakeup listener's thread."""
 
-    def _run_task(self, task_id: str, task_kind: str, task_payload: str) -> None:
-        execution = self.repository.create_execution(task_id=task_id, agent_name=task_kind)
+    def _start_wakeup_listener(self) -> WakeupListener | None:
+        if self.wakeup_socket_path is None:
+            return None
+        listener = WakeupListener(self.wakeup_socket_path, self._on_wakeup)
         try:
-            payload = json.loads(task_payload)
-            working_dir = Path(payload["working_dir"])
-            instruction = str(payload.get("instruction", ""))
-            task_type = str(payload.get("task_type", "feature_implementation"))
-            input_mode = str(payload.get("input_mode", "plain_task"))
-            github_issue = payload.get("github_issue")
-            if not working_dir.exists() or not working_dir.is_dir():
-                raise ValueError(f"working_dir does not exist: {working_dir}")
-
-            prompt = build_prompt(
-                task_type=task_type,
-                working_dir=working_dir,
-                instruction=instruction,
-                input_mode=input_mode,
-                github_issue=github_issue if isinstance(github_issue, dict) else None,
+            listener.start()
+        except OSError as error:
+            print(
+                f"wakeup socket unavailable ({error}); falling back to polling",
+                file=sys.stderr,
             )
-            result = self.codex_runner.run(
-                execution_id=execution.id,
-                prompt=prompt,
-                working_dir=working_dir,
+            return None
+        return listener
+
+    def _archive_batch(self) -> bool:
+        """Archive one batch of old executions; returns whether more may be waiting."""
+        assert self.archive_after_seconds is not None
+        try:
+            stats = self.repository.archive_execution_events(
+                older_than_seconds=self.archive_after_seconds,
+                limit=100,
             )
+            if stats["executions"]:
+                self.repository.reclaim_free_pages()
+                return True
         except Exception as error:  # noqa: BLE001
+            print(f"event archival failed: {error}", file=sys.stderr)
+        return False
+
+    def _queue_metrics_due(self) -> bool:
+        if self.queue_metrics_interval_seconds is None:
+            return False
+        now = time.monotonic()
+        if now < self._next_queue_metrics:
+            return False
+        self._next_queue_metrics = now + self.queue_metrics_interval_seconds
+        return True
+
+    def _record_queue_metrics(self) -> None:
+        # Queue depth includes tasks enqueued by other processes, so it is read
+        # from the database here, on the dispatcher's schedule, not on scrapes.
+        self.metrics.record_queue(
+            self.repository.count_tasks_by_status(),
+            self.repository.oldest_queued_at(),
+        )
+
+    def _lease_maintenance_due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_lease_maintenance:
+            return False
+        self._next_lease_maintenance = now + self.lease_seconds / 3
+        return True
+
+    def _renew_leases(self, task_ids: list[str], *, requeue_expired: bool) -> None:
+        self.repository.renew_task_leases(
+            worker_id=self.worker_id,
+            task_ids=task_ids,
+            lease_seconds=self.lease_seconds,
+        )
+        if requeue_expired:
+            self.repository.requeue_expired_tasks()
+
+    def _back_off(self) -> None:
+        self._idle_wait_seconds = min(self._idle_wait_seconds * 2, self.max_poll_interval_seconds)
+
+    def _begin_execution(
+        self,
+        task_id: str,
+        task_kind: str,
+        *,
+        claim_started: float,
+        queue_wait: float | None,
+    ) -> tuple[Execution, StageTimer]:
+        timer = StageTimer()
+        if queue_wait is not None:
+            timer.add("queue_wait", queue_wait)
+        execution = self.repository.create_execution(task_id=task_id, agent_name=task_kind)
+        timer.add("dispatch", time.perf_counter() - claim_started)
+        return execution, timer
+
+    def _prepare_run(
+        self,
+        task_payload: str,
+        execution_id: str,
+        timer: StageTimer,
+    ) -> tuple[Path, Path | None, str]:
+        """Check out the working directory and render the prompt.
+
+        Pooled worktrees run on an `agent-fleet/<execution_id>` branch, which
+        outlives the worktree when the agent commits to it.
+
+        Returns `(run_dir, worktree, prompt)`; pass `worktree` to `_release_worktree`.
+        """
+        spec = parse_task_payload(task_payload)
+        with timer.stage("checkout"):
+            run_dir, worktree = checkout_working_dir(
+                self.worktree_pool,
+                spec.working_dir,
+                branch=f"{BRANCH_PREFIX}{execution_id}",
+            )
+        try:
+            with timer.stage("prompt_build"):
+                prompt = spec.build_prompt(run_dir)
+        except BaseException:
+            self._release_worktree(worktree)
+            raise
+        return run_dir, worktree, prompt
+
+    def _release_worktree(self, worktree: Path | None) -> None:
+        if worktree is not None and self.worktree_pool is not None:
+            self.worktree_pool.release(worktree)
+
+    def _complete_execution(
+        self,
+        task_id: str,
+        execution_id: str,
+        timer: StageTimer,
+        claim_started: float,
+        result: CodexRunResult,
+    ) -> None:
+        for stage, seconds in result.timings.items():
+            timer.add(stage, seconds)
+        with timer.stage("finalize"):
+            if result.exit_code == 0:
+                finished = self.repository.mark_task_succeeded(task_id, worker_id=self.worker_id)
+            else:
+                finished = self.repository.mark_task_failed(task_id, worker_id=self.worker_id)
+        if finished is None:
+            self._report_lost_task(task_id)
+        self._finish(
+            task_id,
+            execution_id,
+            timer,
+            claim_started,
+            outcome="succeeded" if result.exit_code == 0 else "failed",
+            exit_code=result.exit_code,
+        )
+
+    def _fail_execution(
+        self,
+        task_id: str,
+        execution_id: str,
+        timer: StageTimer,
+        claim_started: float,
+        error: Exception,
+    ) -> None:
+        with timer.stage("finalize"):
+            # The runner may already have stored events; report the error after them.
             self.repository.append_execution_event(
-                execution_id=execution.id,
-                sequence_number=1,
+                execution_id=execution_id,
+                sequence_number=self.repository.last_event_sequence(execution_id) + 1,
                 source="system",
                 event_type="orchestrator_error",
                 payload=str(error),
             )
-            self.repository.mark_execution_failed(execution_id=execution.id, exit_code=None)
-            self.repository.mark_task_failed(task_id)
-            return
-
-        if result.exit_code == 0:
-            self.repository.mark_task_succeeded(task_id)
-        else:
-            self.repository.mark_task_failed(task_id)
+            self.repository.mark_execution_failed(execution_id=execution_id, exit_code=None)
+            finished = self.repository.mark_task_failed(task_id, worker_id=self.worker_id)
+        if finished is None:
+            self._report_lost_task(task_id)
+        self._finish(task_id, execution_id, timer, claim_started, outcome="error", exit_code=None)
+
+    def _report_lost_task(self, task_id: str) -> None:
+        # The lease lapsed mid-run and the task was requeued or claimed elsewhere;
+        # its current status belongs to whoever holds it now.
+        print(
+            f"task {task_id} is no longer leased to {self.worker_id}; left its status unchanged",
+            file=sys.stderr,
+        )
+
+    def _finish(
+        self,
+        task_id: str,
+        execution_id: str,
+        timer: StageTimer,
+        claim_started: float,
+        *,
+        outcome: str,
+        exit_code: int | None,
+    ) -> None:
+        timer.add("total", time.perf_counter() - claim_started)
+        self.metrics.record_execution(outcome=outcome, exit_code=exit_code, seconds=timer.durations["total"])
+        try:
+            self.repository.record_execution_timing(
+                execution_id=execution_id,
+                task_id=task_id,
+                durations=timer.durations,
+            )
+        except Exception as error:  # noqa: BLE001
+            # Timings are diagnostics; losing one must not fail the task.
+            print(f"failed to record execution timings: {error}", file=sys.stderr)
+
+
+class OrchestratorService(BaseOrchestratorService):
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        queue: TaskQueue,
+        codex_runner: CodexRunner,
+        *,
+        poll_interval_seconds: float = 1.0,
+        stop_event: threading.Event | None = None,
+        max_workers: int = 1,
+        slot_state_path: str | Path | None = None,
+        worker_id: str | None = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_poll_interval_seconds: float | None = None,
+        wakeup_socket_path: str | Path | None = None,
+        worktree_pool: WorktreePool | None = None,
+        archive_after_seconds: float | None = None,
+        archive_interval_seconds: float = 3600.0,
+        queue_metrics_interval_seconds: float | None = None,
+    ) -> None:
+        super().__init__(
+            repository,
+            queue,
+            poll_interval_seconds=poll_interval_seconds,
+            stop_event=stop_event,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+            max_poll_interval_seconds=max_poll_interval_seconds,
+            wakeup_socket_path=wakeup_socket_path,
+            worktree_pool=worktree_pool,
+            archive_after_seconds=archive_after_seconds,
+            archive_interval_seconds=archive_interval_seconds,
+            queue_metrics_interval_seconds=queue_metrics_interval_seconds,
+        )
+        self.codex_runner = codex_runner
+        self._wakeup = threading.Event()
+        self._nudged = threading.Event()
+        self.slots = SlotManager(
+            max_workers,
+            on_release=self._wakeup.set,
+            state_path=slot_state_path,
+        )
+
+    def run(self) -> None:
+        # Surface broken prompt templates at startup instead of failing every task.
+        template_registry().preload(TASK_TYPE_TEMPLATES.values())
+        listener = self._start_wakeup_listener()
+        archiver = self._start_archiver()
+        try:
+            while not self.stop_event.is_set():
+                self._wakeup.clear()
+                if self._nudged.is_set():
+                    self._nudged.clear()
+                    self._idle_wait_seconds = self.poll_interval_seconds
+                self._maintain_leases()
+                self.queue.maintain()
+                self._refresh_queue_metrics()
+                free_slots = self.slots.free_count()
+                if free_slots == 0:
+                    self._wait(self.poll_interval_seconds)
+                    continue
+                claim_started = time.perf_counter()
+                tasks = self.queue.claim(
+                    worker_id=self.worker_id,
+                    limit=free_slots,
+                    lease_seconds=self.lease_seconds,
+                )
+                self.metrics.record_dispatch(tasks, claim_seconds=time.perf_counter() - claim_started)
+                if not tasks:
+                    # Idle: back off exponentially; enqueue nudges reset the wait.
+                    self._wait(self._idle_wait_seconds)
+                    self._back_off()
+                    continue
+                self._idle_wait_seconds = self.poll_interval_seconds
+                for task in tasks:
+                    self.slots.submit(
+                        task.id,
+                        partial(
+                            self._run_task,
+                            task.id,
+                            task.kind,
+                            task.payload,
+                            claim_started=claim_started,
+                            queue_wait=queue_wait_seconds(task),
+                        ),
+                    )
+        finally:
+            # Graceful drain: stop dispatching but let in-flight executions finish,
+            # renewing their leases so other dispatchers don't reclaim them meanwhile.
+            while self.slots.busy_count():
+                self._wakeup.clear()
+                self._maintain_leases(requeue_expired=False)
+                self._wakeup.wait(self.poll_interval_seconds)
+            self.slots.drain()
+            if listener is not None:
+                listener.close()
+            if archiver is not None:
+                archiver.join()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self._wakeup.set()
+
+    def slot_snapshot(self) -> list[SlotSnapshot]:
+        return self.slots.snapshot()
+
+    def running_task_ids(self) -> list[str]:
+        return [slot.task_id for slot in self.slots.snapshot() if slot.task_id]
+
+    def _start_archiver(self) -> threading.Thread | None:
+        if self.archive_after_seconds is None:
+            return None
+        archiver = threading.Thread(target=self._archive_loop, name="event-archiver", daemon=True)
+        archiver.start()
+        return archiver
+
+    def _archive_loop(self) -> None:
+        # Runs beside the dispatch loop so archiving a large backlog never delays claims.
+        while not self.stop_event.is_set():
+            if not self._archive_batch():
+                self.stop_event.wait(self.archive_interval_seconds)
+
+    def _on_wakeup(self) -> None:
+        self._nudged.set()
+        self._wakeup.set()
+
+    def _refresh_queue_metrics(self) -> None:
+        if self._queue_metrics_due():
+            self._record_queue_metrics()
+
+    def _maintain_leases(self, *, requeue_expired: bool = True) -> None:
+        if self._lease_maintenance_due():
+            self._renew_leases(self.running_task_ids(), requeue_expired=requeue_expired)
+
+    def _wait(self, timeout: float) -> None:
+        if not self.stop_event.is_set():
+            # Never sleep past the next lease renewal.
+            self._wakeup.wait(min(timeout, self.lease_seconds / 3))
+
+    def _run_task(
+        self,
+        task_id: str,
+        task_kind: str,
+        task_payload: str,
+        *,
+        claim_started: float | None = None,
+        queue_wait: float | None = None,
+    ) -> None:
+        claim_started = time.perf_counter() if claim_started is None else claim_started
+        self.metrics.executions_running.inc()
+        try:
+            execution, timer = self._begin_execution(
+                task_id,
+                task_kind,
+                claim_started=claim_started,
+                queue_wait=queue_wait,
+            )
+            try:
+                run_dir, worktree, prompt = self._prepare_run(task_payload, execution.id, timer)
+                try:
+                    result = self.codex_runner.run(
+                        execution_id=execution.id,
+                        prompt=prompt,
+                        working_dir=run_dir,
+                    )
+                finally:
+                    self._release_worktree(worktree)
+            except Exception as error:  # noqa: BLE001
+                self._fail_execution(task_id, execution.id, timer, claim_started, error)
+                return
+            self._complete_execution(task_id, execution.id, timer, claim_started, result)
+        finally:
+            self.metrics.executions_running.dec()
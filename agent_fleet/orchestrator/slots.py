@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from enum import StrEnum
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Callable
+
+
+class SlotState(StrEnum):
+    IDLE = "idle"
+    BUSY = "busy"
+
+
+@dataclass(frozen=True, slots=True)
+class SlotSnapshot:
+    index: int
+    state: SlotState
+    task_id: str | None = None
+    started_at: str | None = None
+
+
+class SlotManager:
+    """Bounded set of worker slots, each running at most one task on its own thread."""
+
+    def __init__(
+        self,
+        size: int,
+        *,
+        on_release: Callable[[], None] | None = None,
+        state_path: str | Path | None = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"slot count must be at least 1, got {size}")
+        self.size = size
+        self.on_release = on_release
+        self.state_path = Path(state_path) if state_path is not None else None
+        self._lock = threading.Lock()
+        # Serializes state-file writes: each write snapshots and replaces the
+        # file while holding it, so a slower write can never land after (and
+        # overwrite) a newer snapshot.
+        self._state_lock = threading.Lock()
+        self._slots: list[SlotSnapshot] = [
+            SlotSnapshot(index=index, state=SlotState.IDLE) for index in range(size)
+        ]
+        self._threads: dict[int, threading.Thread] = {}
+        self._write_state()
+
+    def free_count(self) -> int:
+        with self._lock:
+            return sum(1 for slot in self._slots if slot.state is SlotState.IDLE)
+
+    def busy_count(self) -> int:
+        return self.size - self.free_count()
+
+    def submit(self, task_id: str, work: Callable[[], None]) -> int:
+        with self._lock:
+            index = next(
+                (slot.index for slot in self._slots if slot.state is SlotState.IDLE),
+                None,
+            )
+            if index is None:
+                raise RuntimeError("no free worker slot")
+            self._slots[index] = SlotSnapshot(
+                index=index,
+                state=SlotState.BUSY,
+                task_id=task_id,
+                started_at=datetime.now(tz=UTC).isoformat(timespec="microseconds"),
+            )
+            thread = threading.Thread(
+                target=self._run_slot,
+                args=(index, work),
+                name=f"agent-fleet-slot-{index}",
+                daemon=True,
+            )
+            self._threads[index] = thread
+        self._write_state()
+        thread.start()
+        return index
+
+    def snapshot(self) -> list[SlotSnapshot]:
+        with self._lock:
+            return list(self._slots)
+
+    def drain(self) -> None:
+        """Block until every busy slot has finished its current task."""
+        while True:
+            with self._lock:
+                threads = list(self._threads.values())
+            if not threads:
+                break
+            for thread in threads:
+                thread.join()
+        self._remove_state()
+
+    def _run_slot(self, index: int, work: Callable[[], None]) -> None:
+        try:
+            work()
+        finally:
+            with self._lock:
+                self._slots[index] = SlotSnapshot(index=index, state=SlotState.IDLE)
+            self._write_state()
+            with self._lock:
+                if self._threads.get(index) is threading.current_thread():
+                    del self._threads[index]
+            if self.on_release is not None:
+                self.on_release()
+
+    def _write_state(self) -> None:
+        if self.state_path is None:
+            return
+        with self._state_lock:
+            with self._lock:
+                data = {
+                    "pid": os.getpid(),
+                    "slots": [asdict(slot) for slot in self._slots],
+                }
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(temp_path, self.state_path)
+
+    def _remove_state(self) -> None:
+        with self._state_lock:
+            if self.state_path is not None and self.state_path.exists():
+                self.state_path.unlink()
+
+
+def read_slot_state(state_path: str | Path) -> list[SlotSnapshot]:
+    path = Path(state_path)
+    if not path.exists():
+        return []
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return []
+    return [
+        SlotSnapshot(
+            index=int(item["index"]),
+            state=SlotState(item["state"]),
+            task_id=item.get("task_id"),
+            started_at=item.get("started_at"),
+        )
+        for item in data.get("slots", [])
+    ]
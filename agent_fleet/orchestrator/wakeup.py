@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import errno
+import os
+from pathlib import Path
+import socket
+import stat
+import threading
+from typing import Callable
+
+_WAKEUP_MESSAGE = b"1"
+
+
+class WakeupListener:
+    """Unix datagram socket that lets CLI commands nudge a running orchestrator."""
+
+    def __init__(self, socket_path: str | Path, on_wakeup: Callable[[], None]) -> None:
+        self.socket_path = Path(socket_path)
+        self.on_wakeup = on_wakeup
+        self._socket: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._inode: int | None = None
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        """Bind the socket, replacing a stale one; raises OSError if another listener owns it."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        _remove_stale_socket(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            listener.bind(str(self.socket_path))
+            self._inode = os.stat(self.socket_path).st_ino
+        except OSError:
+            listener.close()
+            raise
+        self._socket = listener
+        self._thread = threading.Thread(
+            target=self._listen,
+            name="agent-fleet-wakeup",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._socket is None:
+            return
+        self._closed.set()
+        owned = self._owns_path()
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if owned:
+            # A datagram to ourselves unblocks recv() where shutdown() does not.
+            notify_orchestrator(self.socket_path)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._socket.close()
+        self._socket = None
+        # Only remove the path if it is still ours, not a newer listener's socket.
+        if owned:
+            self.socket_path.unlink(missing_ok=True)
+
+    def _owns_path(self) -> bool:
+        try:
+            return os.stat(self.socket_path).st_ino == self._inode
+        except OSError:
+            return False
+
+    def _listen(self) -> None:
+        assert self._socket is not None
+        while not self._closed.is_set():
+            try:
+                self._socket.recv(64)
+            except OSError:
+                return
+            if self._closed.is_set():
+                return
+            self.on_wakeup()
+
+
+def _remove_stale_socket(path: Path) -> None:
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "not a wakeup socket", str(path))
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(str(path))
+    except ConnectionRefusedError:
+        # Nothing is bound to it: left behind by an orchestrator that died.
+        path.unlink(missing_ok=True)
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "another orchestrator is listening on the wakeup socket", str(path))
+
+
+def notify_orchestrator(socket_path: str | Path) -> bool:
+    """Best-effort nudge; returns False when no orchestrator is listening."""
+    path = Path(socket_path)
+    if not path.exists():
+        return False
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sender.setblocking(False)
+        sender.sendto(_WAKEUP_MESSAGE, str(path))
+    except OSError:
+        return False
+    finally:
+        sender.close()
+    return True
@@ -1,4 +1,5 @@
+from .event_writer import ExecutionEventWriter
 from .repository import SQLiteRepository
 from .schema import create_sqlite_engine, initialize_schema
 
-__all__ = ["SQLiteRepository", "initialize_schema", "create_sqlite_engine"]
+__all__ = ["ExecutionEventWriter", "SQLiteRepository", "initialize_schema", "create_sqlite_engine"]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+from agent_fleet.domain.models import ExecutionEvent
+
+_ARCHIVE_FIELDS = ("id", "sequence_number", "source", "event_type", "payload", "created_at")
+
+
+def event_archive_path(archive_dir: Path, execution_id: str) -> Path:
+    # Fan out by id prefix so no single directory holds every archive.
+    return archive_dir / execution_id[:2] / f"{execution_id}.jsonl.gz"
+
+
+def write_event_archive(path: Path, events: Iterable[ExecutionEvent]) -> int:
+    """Write decoded events as gzip-compressed JSON lines; returns the file size.
+
+    The file is written under a temporary name, fsynced and then renamed, so a
+    crash never leaves a truncated archive at `path`.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "wb") as raw_handle:
+        with gzip.GzipFile(fileobj=raw_handle, mode="wb", mtime=0) as handle:
+            for event in events:
+                record = {field: getattr(event, field) for field in _ARCHIVE_FIELDS}
+                handle.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        raw_handle.flush()
+        os.fsync(raw_handle.fileno())
+    os.replace(temp_path, path)
+    return path.stat().st_size
+
+
+def read_event_archive(path: Path, execution_id: str) -> list[ExecutionEvent]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return [ExecutionEvent(execution_id=execution_id, **json.loads(line)) for line in handle]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import zlib
+
+PLAIN_CODEC = "none"
+ZLIB_CODEC = "zlib"
+ZLIB_DICT_CODEC = "zlib-dict1"
+EVENT_CODECS = (PLAIN_CODEC, ZLIB_CODEC, ZLIB_DICT_CODEC)
+
+# Payloads shorter than this are stored as plain text; zlib's framing would
+# eat most of the saving.
+MIN_COMPRESSED_PAYLOAD_BYTES = 128
+
+# Preset dictionary of substrings common in `codex exec --json` events. Rows
+# written with `zlib-dict1` can only be decoded with exactly these bytes, so
+# changes must ship as a new codec name.
+_CODEX_EVENT_DICTIONARY_V1 = (
+    b'"aggregated_output":"'
+    b'"cached_input_tokens":'
+    b'"input_tokens":'
+    b'"output_tokens":'
+    b'"usage":{'
+    b'"exit_code":0'
+    b'"status":"completed"'
+    b'"status":"in_progress"'
+    b'"status":"failed"'
+    b'"type":"command_execution"'
+    b'"type":"file_change"'
+    b'"type":"agent_message"'
+    b'"type":"reasoning"'
+    b'"type":"todo_list"'
+    b'"type":"thread.started"'
+    b'"type":"turn.started"'
+    b'"type":"turn.completed"'
+    b'"type":"item.started"'
+    b'"type":"item.updated"'
+    b'"type":"item.completed"'
+    b'"command":"bash -lc '
+    b'"changes":[{"path":"'
+    b'"kind":"update"'
+    b'"text":"'
+    b'"id":"item_'
+    b'"item":{'
+    b'"thread_id":"'
+)
+
+
+def encode_payload(payload: str, codec: str) -> tuple[str, str | None, bytes | None]:
+    """Return `(payload, payload_codec, payload_data)` column values for an event.
+
+    Compressed rows keep an empty `payload` and store the bytes in
+    `payload_data`; rows that don't benefit stay plain with a NULL codec.
+    """
+    if codec == PLAIN_CODEC or len(payload) < MIN_COMPRESSED_PAYLOAD_BYTES:
+        return payload, None, None
+    raw = payload.encode("utf-8")
+    if codec == ZLIB_CODEC:
+        data = zlib.compress(raw, 6)
+    elif codec == ZLIB_DICT_CODEC:
+        compressor = zlib.compressobj(6, zdict=_CODEX_EVENT_DICTIONARY_V1)
+        data = compressor.compress(raw) + compressor.flush()
+    else:
+        raise ValueError(f"unknown event payload codec: {codec!r}")
+    if len(data) >= len(raw):
+        return payload, None, None
+    return "", codec, data
+
+
+def decode_payload(payload: str, codec: str | None, data: bytes | None) -> str:
+    if codec is None or codec == PLAIN_CODEC:
+        return payload
+    if data is None:
+        raise ValueError(f"event payload marked {codec!r} has no data")
+    if codec == ZLIB_CODEC:
+        return zlib.decompress(data).decode("utf-8")
+    if codec == ZLIB_DICT_CODEC:
+        decompressor = zlib.decompressobj(zdict=_CODEX_EVENT_DICTIONARY_V1)
+        return (decompressor.decompress(data) + decompressor.flush()).decode("utf-8")
+    raise ValueError(f"unknown event payload codec: {codec!r}")
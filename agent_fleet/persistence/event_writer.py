@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from queue import Empty, Queue
+import threading
+import time
+from typing import Mapping, Sequence
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from agent_fleet.observability.metrics import fleet_metrics
+from agent_fleet.persistence.repository import SQLiteRepository, utc_now
+
+
+@dataclass(slots=True)
+class _FlushRequest:
+    execution_id: str | None = None
+    done: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+
+
+_STOP = object()
+# Errors caused by the content of a row rather than the database as a whole.
+_ROW_ERRORS = (IntegrityError, DataError)
+
+
+class ExecutionEventWriter:
+    """Background stage that persists execution events in batched transactions.
+
+    Events are buffered and written with one multi-row insert per batch, flushed
+    when `max_batch_size` rows are pending or `flush_interval_seconds` has passed
+    since the oldest buffered row. `max_pending` bounds the rows queued or
+    buffered but not yet committed, so a stalled database applies
+    backpressure instead of growing memory.
+
+    One writer is shared by every running execution. When a batch insert
+    fails on a bad row (a constraint or data error) it is split and retried
+    until the rows that cannot be written are isolated, so one execution's bad
+    row never costs another execution its events. Any other failure, such as
+    a full disk or a lock that outlasts the busy retries, fails the batch once
+    instead of being retried row by row. Either way the error is reported to
+    the `flush` of each execution that lost events.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        *,
+        max_batch_size: int = 500,
+        flush_interval_seconds: float = 0.05,
+        max_pending: int = 10_000,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.repository = repository
+        self.max_batch_size = max_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        # Rows put but not yet written; flush and stop requests are never bounded.
+        self._queue: Queue[object] = Queue()
+        self._capacity = threading.Condition()
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def put(
+        self,
+        *,
+        execution_id: str,
+        sequence_number: int,
+        source: str,
+        event_type: str,
+        payload: str,
+    ) -> None:
+        self._ensure_started()
+        self._reserve(1)
+        self._queue.put(
+            {
+                "execution_id": execution_id,
+                "sequence_number": sequence_number,
+                "source": source,
+                "event_type": event_type,
+                "payload": payload,
+                "created_at": utc_now(),
+            }
+        )
+
+    def put_many(self, events: Sequence[Mapping[str, object]]) -> None:
+        """Queue several events in one hand-off.
+
+        Each event has the keyword arguments of `put` and counts as one row
+        against `max_pending`.
+        """
+        if not events:
+            return
+        self._ensure_started()
+        self._reserve(len(events))
+        self._enqueue_many(events)
+
+    def try_put_many(self, events: Sequence[Mapping[str, object]]) -> bool:
+        """Queue several events like `put_many` if that would not block.
+
+        Returns False, queueing nothing, while the writer is at `max_pending`;
+        callers that must not block (an event loop) can then wait elsewhere.
+        """
+        if not events:
+            return True
+        self._ensure_started()
+        if not self._reserve(len(events), block=False):
+            return False
+        self._enqueue_many(events)
+        return True
+
+    def flush(self, execution_id: str | None = None) -> None:
+        """Block until every event put before this call is committed.
+
+        Raises the first write error of `execution_id`'s events since its last
+        flush; without an `execution_id` any execution's pending error is raised.
+        """
+        if self._thread is None:
+            return
+        request = _FlushRequest(execution_id)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+
+    def __enter__(self) -> "ExecutionEventWriter":
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.close()
+
+    def _enqueue_many(self, events: Sequence[Mapping[str, object]]) -> None:
+        created_at = utc_now()
+        self._queue.put([{**event, "created_at": created_at} for event in events])
+
+    def _reserve(self, rows: int, *, block: bool = True) -> bool:
+        with self._capacity:
+            # A batch larger than the whole budget waits for an empty writer rather than forever.
+            while self._pending_rows and self._pending_rows + rows > self.max_pending:
+                if not block:
+                    return False
+                self._capacity.wait()
+            self._pending_rows += rows
+            return True
+
+    def _release(self, rows: int) -> None:
+        with self._capacity:
+            self._pending_rows -= rows
+            self._capacity.notify_all()
+
+    def _ensure_started(self) -> None:
+        if self._closed:
+            raise RuntimeError("event writer is closed")
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("event writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="agent-fleet-event-writer",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        buffer: list[dict[str, object]] = []
+        metrics = fleet_metrics()
+        deadline = 0.0
+        # First write error per execution, held until that execution flushes.
+        failures: dict[str, BaseException] = {}
+
+        def _append(rows: list[dict[str, object]]) -> None:
+            started = time.perf_counter()
+            try:
+                self.repository.append_execution_events(rows)
+            except _ROW_ERRORS as write_error:
+                if len(rows) == 1:
+                    failures.setdefault(str(rows[0]["execution_id"]), write_error)
+                    return
+                # Bisect to isolate the failing rows; the rest are still written.
+                middle = len(rows) // 2
+                _append(rows[:middle])
+                _append(rows[middle:])
+            except Exception as write_error:  # noqa: BLE001
+                for execution_id in {str(row["execution_id"]) for row in rows}:
+                    failures.setdefault(execution_id, write_error)
+            else:
+                metrics.db_write_latency.labels("append_events").observe(time.perf_counter() - started)
+                metrics.events_ingested.inc(len(rows))
+
+        def _flush_buffer() -> None:
+            if not buffer:
+                return
+            _append(buffer)
+            self._release(len(buffer))
+            buffer.clear()
+
+        def _take_failure(execution_id: str | None) -> BaseException | None:
+            if execution_id is not None:
+                return failures.pop(execution_id, None)
+            first = next(iter(failures.values()), None)
+            failures.clear()
+            return first
+
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0) if buffer else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                _flush_buffer()
+                continue
+
+            if item is _STOP:
+                _flush_buffer()
+                return
+            if isinstance(item, _FlushRequest):
+                _flush_buffer()
+                item.error = _take_failure(item.execution_id)
+                item.done.set()
+                continue
+
+            if not buffer:
+                deadline = time.monotonic() + self.flush_interval_seconds
+            if isinstance(item, list):
+                buffer.extend(item)
+            else:
+                assert isinstance(item, dict)
+                buffer.append(item)
+            if len(buffer) >= self.max_batch_size or time.monotonic() >= deadline:
+                _flush_buffer()
@@ -1,33 +1,149 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from functools import wraps
+import json
+import os
 from pathlib import Path
+import socket
+import time
+from typing import Callable, Mapping, ParamSpec, Sequence, TypeVar, cast
+from uuid import uuid4
 
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Update,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy import cast as sql_cast
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
-from agent_fleet.domain.models import Execution, ExecutionEvent, Task, TaskStatus
+from agent_fleet.config import SQLiteSettings
+from agent_fleet.domain.models import (
+    EventArchive,
+    Execution,
+    ExecutionEvent,
+    ExecutionTiming,
+    IssueCacheEntry,
+    Task,
+    TaskStatus,
+)
+from agent_fleet.persistence.archive import event_archive_path, read_event_archive, write_event_archive
+from agent_fleet.persistence.codecs import PLAIN_CODEC, decode_payload, encode_payload
 from agent_fleet.persistence.schema import create_sqlite_engine, initialize_schema
 
 
+@dataclass(frozen=True, slots=True)
+class TaskEventRow:
+    execution_id: str
+    sequence_number: int
+    source: str
+    event_type: str
+    payload: str
+
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+DEFAULT_LEASE_SECONDS = 300.0
+
+
 def utc_now() -> str:
     return datetime.now(tz=UTC).isoformat(timespec="microseconds")
 
 
+def utc_after(seconds: float) -> str:
+    return (datetime.now(tz=UTC) + timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def task_cursor(task: Task) -> str:
+    """Opaque keyset cursor pointing just past `task` in `list_tasks` order."""
+    return f"{task.created_at},{task.id}"
+
+
+def parse_task_cursor(cursor: str) -> tuple[str, str]:
+    created_at, separator, task_id = cursor.partition(",")
+    if not separator or not created_at or not task_id:
+        raise ValueError(f"invalid task cursor: {cursor!r}")
+    return created_at, task_id
+
+
+def is_sqlite_busy_error(error: BaseException) -> bool:
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig if error.orig is not None else error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def _retry_on_busy(method: Callable[_P, _R]) -> Callable[_P, _R]:
+    """Re-run a whole write transaction with exponential backoff on SQLITE_BUSY."""
+
+    @wraps(method)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        repository = args[0]
+        assert isinstance(repository, SQLiteRepository)
+        settings = repository.sqlite_settings
+        attempt = 0
+        while True:
+            try:
+                return method(*args, **kwargs)
+            except OperationalError as error:
+                if attempt >= settings.busy_retries or not is_sqlite_busy_error(error):
+                    raise
+                time.sleep(settings.busy_retry_delay_seconds * (2**attempt))
+                attempt += 1
+
+    return wrapper
+
+
 class SQLiteRepository:
-    def __init__(self, database_path: str | Path):
+    def __init__(
+        self,
+        database_path: str | Path,
+        *,
+        sqlite_settings: SQLiteSettings | None = None,
+        event_codec: str = PLAIN_CODEC,
+        archive_dir: str | Path | None = None,
+    ):
         self.database_path = Path(database_path)
-        self.engine = create_sqlite_engine(self.database_path)
+        self.sqlite_settings = sqlite_settings or SQLiteSettings()
+        self.event_codec = event_codec
+        self.archive_dir = (
+            Path(archive_dir)
+            if archive_dir is not None
+            else self.database_path.with_name(f"{self.database_path.name}.archive")
+        )
+        self.engine = create_sqlite_engine(self.database_path, self.sqlite_settings)
 
     def initialize(self) -> None:
         self.database_path.parent.mkdir(parents=True, exist_ok=True)
         initialize_schema(self.engine)
 
-    def enqueue_task(self, *, kind: str, payload: str) -> Task:
+    @_retry_on_busy
+    def enqueue_task(self, *, kind: str, payload: str, priority: int = 0) -> Task:
         timestamp = utc_now()
         task = Task(
             kind=kind,
             payload=payload,
             status=TaskStatus.QUEUED,
+            priority=priority,
+            working_dir=working_dir_from_payload(payload),
             created_at=timestamp,
             updated_at=timestamp,
             queued_at=timestamp,
@@ -38,47 +154,271 @@ class SQLiteRepository:
             session.refresh(task)
         return task
 
+    @_retry_on_busy
+    def enqueue_tasks(self, tasks: Sequence[Mapping[str, object]]) -> list[str]:
+        """Insert many tasks (`kind`, `payload`, optional `priority`) in one transaction.
+
+        Returns the new task ids in input order.
+        """
+        if not tasks:
+            return []
+        timestamp = utc_now()
+        rows = []
+        for task in tasks:
+            payload = cast(str, task["payload"])
+            rows.append(
+                {
+                    "id": str(uuid4()),
+                    "kind": task["kind"],
+                    "payload": payload,
+                    "status": TaskStatus.QUEUED,
+                    "priority": task.get("priority") or 0,
+                    "working_dir": working_dir_from_payload(payload),
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                    "queued_at": timestamp,
+                }
+            )
+        with Session(self.engine) as session:
+            session.execute(insert(Task), rows)
+            session.commit()
+        return [cast(str, row["id"]) for row in rows]
+
     def dequeue_next_task(self) -> Task | None:
+        tasks = self.claim_tasks(worker_id=default_worker_id(), limit=1)
+        return tasks[0] if tasks else None
+
+    @_retry_on_busy
+    def claim_tasks(
+        self,
+        *,
+        worker_id: str,
+        limit: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        by_priority: bool = False,
+        aging_interval_seconds: float | None = None,
+        max_aging_boost: int | None = None,
+        max_per_working_dir: int | None = None,
+    ) -> list[Task]:
+        """Atomically move up to `limit` queued tasks to running and lease them to `worker_id`.
+
+        Candidate selection and the status transition happen in one
+        `UPDATE ... RETURNING` statement guarded by `status = 'queued'`, so
+        concurrent dispatchers (threads or processes) can never claim the same task.
+        With `by_priority`, higher `priority` values are claimed first and
+        `queued_at` breaks ties. `aging_interval_seconds` adds one level to a
+        task's effective priority per interval it has waited (at most
+        `max_aging_boost` levels, when set); the boost is computed at claim
+        time, so the stored `priority` is never rewritten.
+
+        With `max_per_working_dir`, tasks whose `working_dir` already has that
+        many running tasks (across every process sharing the database) are
+        skipped in favour of the next runnable task. Each task is then claimed
+        by its own statement so later claims see earlier ones, but the whole
+        batch still commits as one transaction.
+        """
+        if limit < 1:
+            return []
+        started_at = utc_now()
+        aging = None
+        if by_priority and aging_interval_seconds:
+            aging = _Aging(started_at, aging_interval_seconds, max_aging_boost)
+        values = {
+            "status": TaskStatus.RUNNING,
+            "updated_at": started_at,
+            "started_at": started_at,
+            "claimed_by": worker_id,
+            "lease_expires_at": utc_after(lease_seconds),
+        }
+        with Session(self.engine, expire_on_commit=False) as session:
+            if max_per_working_dir is None:
+                tasks = list(
+                    session.execute(
+                        _claim_statement(limit=limit, by_priority=by_priority, aging=aging, values=values)
+                    ).scalars()
+                )
+            else:
+                tasks = []
+                for _ in range(limit):
+                    claimed = session.execute(
+                        _claim_statement(
+                            limit=1,
+                            by_priority=by_priority,
+                            aging=aging,
+                            values=values,
+                            max_per_working_dir=max_per_working_dir,
+                        )
+                    ).scalar_one_or_none()
+                    if claimed is None:
+                        break
+                    tasks.append(claimed)
+            session.commit()
+        if by_priority:
+            tasks.sort(
+                key=lambda task: (-_effective_priority(task, aging), task.queued_at, task.id)
+            )
+        else:
+            tasks.sort(key=lambda task: (task.queued_at, task.id))
+        return tasks
+
+    @_retry_on_busy
+    def renew_task_leases(
+        self,
+        *,
+        worker_id: str,
+        task_ids: Sequence[str],
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ) -> int:
+        if not task_ids:
+            return 0
+        statement = (
+            update(Task)
+            .where(
+                Task.id.in_(list(task_ids)),
+                Task.claimed_by == worker_id,
+                Task.status == TaskStatus.RUNNING,
+            )
+            .values(lease_expires_at=utc_after(lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
         with Session(self.engine) as session:
-            task = session.exec(
-                select(Task)
-                .where(Task.status == TaskStatus.QUEUED)
-                .order_by(Task.queued_at.asc(), Task.id.asc())
-                .limit(1)
-            ).first()
-            if task is None:
-                return None
-
-            started_at = utc_now()
-            task.status = TaskStatus.RUNNING
-            task.updated_at = started_at
-            task.started_at = started_at
-            session.add(task)
+            result = session.execute(statement)
             session.commit()
-            session.refresh(task)
-            return task
+            return result.rowcount
+
+    @_retry_on_busy
+    def requeue_expired_tasks(self) -> list[str]:
+        """Return running tasks whose lease has lapsed to the queue; their open executions fail."""
+        timestamp = utc_now()
+        statement = (
+            update(Task)
+            .where(
+                Task.status == TaskStatus.RUNNING,
+                Task.lease_expires_at.is_not(None),
+                Task.lease_expires_at < timestamp,
+            )
+            .values(
+                status=TaskStatus.QUEUED,
+                updated_at=timestamp,
+                started_at=None,
+                claimed_by=None,
+                lease_expires_at=None,
+            )
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        with Session(self.engine) as session:
+            task_ids = list(session.execute(statement).scalars())
+            if task_ids:
+                session.execute(
+                    update(Execution)
+                    .where(
+                        Execution.task_id.in_(task_ids),
+                        Execution.status.in_([TaskStatus.QUEUED, TaskStatus.RUNNING]),
+                    )
+                    .values(status=TaskStatus.FAILED, finished_at=timestamp)
+                    .execution_options(synchronize_session=False)
+                )
+            session.commit()
+        return task_ids
 
-    def mark_task_succeeded(self, task_id: str) -> Task:
-        return self._update_task_status(task_id, TaskStatus.SUCCEEDED)
+    def mark_task_succeeded(self, task_id: str, *, worker_id: str | None = None) -> Task | None:
+        return self._update_task_status(task_id, TaskStatus.SUCCEEDED, worker_id=worker_id)
 
-    def mark_task_failed(self, task_id: str) -> Task:
-        return self._update_task_status(task_id, TaskStatus.FAILED)
+    def mark_task_failed(self, task_id: str, *, worker_id: str | None = None) -> Task | None:
+        return self._update_task_status(task_id, TaskStatus.FAILED, worker_id=worker_id)
 
-    def mark_task_canceled(self, task_id: str) -> Task:
+    def mark_task_canceled(self, task_id: str) -> Task | None:
         return self._update_task_status(task_id, TaskStatus.CANCELED)
 
     def get_task(self, task_id: str) -> Task | None:
         with Session(self.engine) as session:
             return session.get(Task, task_id)
 
-    def list_tasks(self, *, limit: int = 20) -> list[Task]:
+    def list_tasks(
+        self,
+        *,
+        limit: int = 20,
+        status: TaskStatus | None = None,
+        kind: str | None = None,
+        after: str | None = None,
+    ) -> list[Task]:
+        """Newest tasks first, optionally filtered, one keyset page at a time.
+
+        Pass `task_cursor(tasks[-1])` as `after` to fetch the next page; each
+        page is an index range scan on `(created_at, id)` (prefixed by the
+        filter column), so deep pages cost the same as the first one.
+        """
+        statement = select(Task)
+        if status is not None:
+            statement = statement.where(Task.status == status)
+        if kind is not None:
+            statement = statement.where(Task.kind == kind)
+        if after is not None:
+            created_at, task_id = parse_task_cursor(after)
+            statement = statement.where(tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id))
+        statement = statement.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
         with Session(self.engine) as session:
-            return list(
-                session.exec(
-                    select(Task).order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
-                )
+            return list(session.exec(statement))
+
+    def count_tasks_by_status(self) -> dict[TaskStatus, int]:
+        with Session(self.engine) as session:
+            rows = session.execute(select(Task.status, func.count()).group_by(Task.status)).all()
+        counts = {status: 0 for status in TaskStatus}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def oldest_queued_at(self) -> str | None:
+        """`queued_at` of the longest-waiting queued task, or None when the queue is empty."""
+        with Session(self.engine) as session:
+            return session.execute(
+                select(func.min(Task.queued_at)).where(Task.status == TaskStatus.QUEUED)
+            ).scalar_one_or_none()
+
+    @_retry_on_busy
+    def record_execution_timing(
+        self,
+        *,
+        execution_id: str,
+        task_id: str,
+        durations: Mapping[str, float],
+    ) -> ExecutionTiming:
+        """Store an execution's stage durations; `durations` maps stage name to seconds."""
+        columns = {
+            f"{stage}_seconds": seconds
+            for stage, seconds in durations.items()
+            if f"{stage}_seconds" in ExecutionTiming.model_fields
+        }
+        timing = ExecutionTiming(
+            execution_id=execution_id,
+            task_id=task_id,
+            recorded_at=utc_now(),
+            **columns,
+        )
+        with Session(self.engine, expire_on_commit=False) as session:
+            session.merge(timing)
+            session.commit()
+        return timing
+
+    def list_execution_timings(self, task_id: str) -> list[ExecutionTiming]:
+        with Session(self.engine) as session:
+            statement = (
+                select(ExecutionTiming)
+                .where(ExecutionTiming.task_id == task_id)
+                .order_by(ExecutionTiming.recorded_at)
             )
+            return list(session.exec(statement).all())
+
+    def recent_execution_timings(self, *, limit: int = 1000, kind: str | None = None) -> list[ExecutionTiming]:
+        """The newest `limit` timing records, optionally only for tasks of `kind`."""
+        with Session(self.engine) as session:
+            statement = select(ExecutionTiming)
+            if kind is not None:
+                statement = statement.join(Task, Task.id == ExecutionTiming.task_id).where(Task.kind == kind)
+            statement = statement.order_by(ExecutionTiming.recorded_at.desc()).limit(limit)
+            return list(session.exec(statement).all())
 
+    @_retry_on_busy
     def create_execution(self, *, task_id: str, agent_name: str) -> Execution:
         execution = Execution(
             task_id=task_id,
@@ -92,6 +432,7 @@ class SQLiteRepository:
             session.refresh(execution)
         return execution
 
+    @_retry_on_busy
     def mark_execution_running(self, *, execution_id: str, process_id: int | None) -> Execution:
         with Session(self.engine) as session:
             execution = self._require_execution(session, execution_id)
@@ -104,14 +445,14 @@ class SQLiteRepository:
             session.refresh(execution)
             return execution
 
-    def mark_execution_succeeded(self, *, execution_id: str, exit_code: int) -> Execution:
+    def mark_execution_succeeded(self, *, execution_id: str, exit_code: int) -> Execution | None:
         return self._finish_execution(
             execution_id=execution_id,
             status=TaskStatus.SUCCEEDED,
             exit_code=exit_code,
         )
 
-    def mark_execution_failed(self, *, execution_id: str, exit_code: int | None) -> Execution:
+    def mark_execution_failed(self, *, execution_id: str, exit_code: int | None) -> Execution | None:
         return self._finish_execution(
             execution_id=execution_id,
             status=TaskStatus.FAILED,
@@ -132,6 +473,7 @@ class SQLiteRepository:
                 )
             )
 
+    @_retry_on_busy
     def append_execution_event(
         self,
         *,
@@ -141,29 +483,276 @@ class SQLiteRepository:
         event_type: str,
         payload: str,
     ) -> ExecutionEvent:
+        stored_payload, payload_codec, payload_data = encode_payload(payload, self.event_codec)
         event = ExecutionEvent(
             execution_id=execution_id,
             sequence_number=sequence_number,
             source=source,
             event_type=event_type,
-            payload=payload,
+            payload=stored_payload,
+            payload_codec=payload_codec,
+            payload_data=payload_data,
             created_at=utc_now(),
         )
         with Session(self.engine) as session:
             session.add(event)
             session.commit()
             session.refresh(event)
-        return event
+        return _decoded_event(event)
+
+    @_retry_on_busy
+    def append_execution_events(self, events: Sequence[Mapping[str, object]]) -> int:
+        """Insert many events in a single transaction; returns the number of rows written."""
+        if not events:
+            return 0
+        rows = []
+        for event in events:
+            payload, payload_codec, payload_data = encode_payload(
+                cast(str, event["payload"]),
+                self.event_codec,
+            )
+            rows.append(
+                {
+                    "execution_id": event["execution_id"],
+                    "sequence_number": event["sequence_number"],
+                    "source": event["source"],
+                    "event_type": event["event_type"],
+                    "payload": payload,
+                    "payload_codec": payload_codec,
+                    "payload_data": payload_data,
+                    "created_at": event.get("created_at") or utc_now(),
+                }
+            )
+        with Session(self.engine) as session:
+            session.execute(insert(ExecutionEvent), rows)
+            session.commit()
+        return len(rows)
+
+    def last_event_sequence(self, execution_id: str) -> int:
+        """Highest stored `sequence_number` of an execution's live events, or 0 when none."""
+        with Session(self.engine) as session:
+            last = session.execute(
+                select(func.max(ExecutionEvent.sequence_number)).where(
+                    ExecutionEvent.execution_id == execution_id
+                )
+            ).scalar_one()
+        return last or 0
 
     def list_execution_events(self, execution_id: str) -> list[ExecutionEvent]:
         with Session(self.engine) as session:
-            return list(
+            events = list(
                 session.exec(
                     select(ExecutionEvent)
                     .where(ExecutionEvent.execution_id == execution_id)
                     .order_by(ExecutionEvent.sequence_number.asc(), ExecutionEvent.id.asc())
                 )
             )
+            if not events:
+                archive = session.get(EventArchive, execution_id)
+                if archive is not None:
+                    return self._read_archive(archive)
+        return [_decoded_event(event) for event in events]
+
+    def list_execution_events_after(
+        self,
+        execution_id: str,
+        *,
+        after_sequence: int = 0,
+        limit: int = 500,
+    ) -> list[ExecutionEvent]:
+        """Events of one execution with `sequence_number > after_sequence`, oldest first.
+
+        Backed by the `(execution_id, sequence_number)` index, so polling with a
+        moving cursor costs the same however long the execution already is.
+        """
+        with Session(self.engine) as session:
+            events = list(
+                session.exec(
+                    select(ExecutionEvent)
+                    .where(
+                        ExecutionEvent.execution_id == execution_id,
+                        ExecutionEvent.sequence_number > after_sequence,
+                    )
+                    .order_by(ExecutionEvent.sequence_number.asc(), ExecutionEvent.id.asc())
+                    .limit(limit)
+                )
+            )
+            if not events:
+                archive = session.get(EventArchive, execution_id)
+                if archive is not None:
+                    archived = self._read_archive(archive)
+                    return [event for event in archived if event.sequence_number > after_sequence][:limit]
+        return [_decoded_event(event) for event in events]
+
+    def archive_execution_events(
+        self,
+        *,
+        older_than_seconds: float,
+        limit: int | None = None,
+    ) -> dict[str, int]:
+        """Move events of executions finished before the cutoff into per-execution archive files.
+
+        Each execution's events are written to a gzip JSON-lines file under
+        `archive_dir`, then an `event_archives` manifest row is inserted and the
+        rows are deleted in one transaction. Reads fall back to the archive
+        file, so archived executions stay visible to `list_execution_events`.
+        """
+        cutoff = utc_after(-older_than_seconds)
+        with Session(self.engine) as session:
+            statement = (
+                select(Execution.id)
+                .where(
+                    Execution.status.in_([TaskStatus.SUCCEEDED, TaskStatus.FAILED]),
+                    Execution.finished_at.is_not(None),
+                    Execution.finished_at < cutoff,
+                    ~exists().where(EventArchive.execution_id == Execution.id),
+                )
+                .order_by(Execution.finished_at.asc(), Execution.id.asc())
+            )
+            if limit is not None:
+                statement = statement.limit(limit)
+            execution_ids = list(session.exec(statement))
+
+        stats = {"executions": 0, "events": 0, "archive_bytes": 0}
+        for execution_id in execution_ids:
+            archive = self._archive_execution(execution_id)
+            stats["executions"] += 1
+            stats["events"] += archive.event_count
+            stats["archive_bytes"] += archive.compressed_bytes
+        return stats
+
+    def reclaim_free_pages(self) -> int:
+        """Return free pages to the filesystem; returns the number of pages released.
+
+        Only runs `incremental_vacuum`, which is cheap enough for background
+        loops. Databases created before `auto_vacuum` was enabled keep their
+        free pages for reuse until `vacuum` converts them.
+        """
+        with self.engine.connect() as connection:
+            if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+                return 0
+            free_pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+            connection.exec_driver_sql("PRAGMA incremental_vacuum")
+            remaining = connection.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        return free_pages - remaining
+
+    def vacuum(self) -> int:
+        """Rebuild the whole database file with `VACUUM`; returns the number of pages released.
+
+        This also applies the configured `auto_vacuum` mode to older databases.
+        It rewrites every page and holds an exclusive lock throughout, so it is
+        only run on request, never from background maintenance.
+        """
+        with self.engine.connect() as connection:
+            pages_before = connection.exec_driver_sql("PRAGMA page_count").scalar() or 0
+            connection.exec_driver_sql("VACUUM")
+            pages_after = connection.exec_driver_sql("PRAGMA page_count").scalar() or 0
+        return pages_before - pages_after
+
+    def compress_event_payloads(self, *, codec: str, batch_size: int = 1000) -> dict[str, int]:
+        """Re-encode existing plain-text event payloads with `codec`, one batch per transaction."""
+        stats = {"scanned": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0}
+        last_id: int | None = 0
+        while last_id is not None:
+            last_id, batch_stats = self._compress_event_batch(
+                after_id=last_id, codec=codec, batch_size=batch_size
+            )
+            for key, value in batch_stats.items():
+                stats[key] += value
+        return stats
+
+    @_retry_on_busy
+    def _compress_event_batch(
+        self, *, after_id: int, codec: str, batch_size: int
+    ) -> tuple[int | None, dict[str, int]]:
+        """Compress one batch after `after_id`; returns its last event id (None when done).
+
+        Each batch is its own retried transaction, so a busy database only
+        re-runs the batch in hand, never the batches already committed.
+        """
+        stats = {"scanned": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0}
+        with Session(self.engine) as session:
+            rows = session.execute(
+                select(ExecutionEvent.id, ExecutionEvent.payload)
+                .where(ExecutionEvent.id > after_id, ExecutionEvent.payload_codec.is_(None))
+                .order_by(ExecutionEvent.id.asc())
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return None, stats
+            updates = []
+            for event_id, payload in rows:
+                stats["scanned"] += 1
+                stored_payload, payload_codec, payload_data = encode_payload(payload, codec)
+                if payload_codec is None or payload_data is None:
+                    continue
+                stats["compressed"] += 1
+                stats["bytes_before"] += len(payload.encode("utf-8"))
+                stats["bytes_after"] += len(payload_data)
+                updates.append(
+                    {
+                        "event_id": event_id,
+                        "payload": stored_payload,
+                        "payload_codec": payload_codec,
+                        "payload_data": payload_data,
+                    }
+                )
+            if updates:
+                session.execute(
+                    text(
+                        "UPDATE execution_events "
+                        "SET payload = :payload, payload_codec = :payload_codec, payload_data = :payload_data "
+                        "WHERE id = :event_id AND payload_codec IS NULL"
+                    ),
+                    updates,
+                )
+                session.commit()
+            return rows[-1][0], stats
+
+    def get_cached_issues(self, keys: Sequence[str]) -> dict[str, IssueCacheEntry]:
+        if not keys:
+            return {}
+        with Session(self.engine) as session:
+            entries = session.exec(select(IssueCacheEntry).where(IssueCacheEntry.key.in_(list(keys))))
+            return {entry.key: entry for entry in entries}
+
+    @_retry_on_busy
+    def store_cached_issues(self, entries: Sequence[IssueCacheEntry]) -> None:
+        if not entries:
+            return
+        rows = [entry.model_dump() for entry in entries]
+        statement = sqlite_insert(IssueCacheEntry).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[IssueCacheEntry.key],
+            set_={
+                column: statement.excluded[column]
+                for column in ("updated_at", "url", "title", "body", "fetched_at")
+            },
+        )
+        with Session(self.engine) as session:
+            session.execute(statement)
+            session.commit()
+
+    @_retry_on_busy
+    def evict_cached_issues(self, *, fetched_before: str | None = None, max_entries: int | None = None) -> int:
+        """Drop cache entries fetched before `fetched_before`, then the oldest beyond `max_entries`."""
+        deleted = 0
+        with Session(self.engine) as session:
+            if fetched_before is not None:
+                result = session.execute(
+                    delete(IssueCacheEntry).where(IssueCacheEntry.fetched_at < fetched_before)
+                )
+                deleted += result.rowcount or 0
+            if max_entries is not None:
+                keep = (
+                    select(IssueCacheEntry.key)
+                    .order_by(IssueCacheEntry.fetched_at.desc(), IssueCacheEntry.key.desc())
+                    .limit(max_entries)
+                )
+                result = session.execute(delete(IssueCacheEntry).where(IssueCacheEntry.key.not_in(keep)))
+                deleted += result.rowcount or 0
+            session.commit()
+        return deleted
 
     def get_task_history(self, task_id: str) -> dict[str, object] | None:
         task = self.get_task(task_id)
@@ -171,45 +760,210 @@ class SQLiteRepository:
             return None
 
         executions = self.list_executions_for_task(task_id)
-        history = []
-        for execution in executions:
-            history.append(
-                {
-                    "execution": execution,
-                    "events": self.list_execution_events(execution.id),
-                }
+        events_by_execution: dict[str, list[ExecutionEvent]] = {execution.id: [] for execution in executions}
+        with Session(self.engine) as session:
+            events = session.exec(
+                select(ExecutionEvent)
+                .join(Execution, Execution.id == ExecutionEvent.execution_id)
+                .where(Execution.task_id == task_id)
+                .order_by(
+                    ExecutionEvent.execution_id,
+                    ExecutionEvent.sequence_number.asc(),
+                    ExecutionEvent.id.asc(),
+                )
             )
+            for event in events:
+                events_by_execution[event.execution_id].append(_decoded_event(event))
+            archived_ids = [execution_id for execution_id, rows in events_by_execution.items() if not rows]
+            if archived_ids:
+                for archive in session.exec(
+                    select(EventArchive).where(EventArchive.execution_id.in_(archived_ids))
+                ):
+                    events_by_execution[archive.execution_id] = self._read_archive(archive)
+
+        history = [
+            {"execution": execution, "events": events_by_execution[execution.id]}
+            for execution in executions
+        ]
         return {"task": task, "executions": history}
 
-    def _update_task_status(self, task_id: str, status: TaskStatus) -> Task:
+    def tail_task_events(
+        self,
+        task_id: str,
+        *,
+        limit: int | None = 50,
+        max_payload_chars: int | None = None,
+    ) -> list[TaskEventRow]:
+        """The last `limit` events across all of a task's executions, oldest first.
+
+        Executions are walked newest first and each is read with an indexed
+        `ORDER BY sequence_number DESC LIMIT` for just the rows still needed,
+        so the usual case is a single events query that touches `limit` rows
+        however long the execution is. (A single join over executions and
+        events makes SQLite sort every event of the newest execution.)
+        `max_payload_chars` truncates plain payloads inside SQLite so large
+        outputs are never copied out of the database.
+        """
+        payload_column = (
+            ExecutionEvent.payload
+            if max_payload_chars is None
+            else func.substr(ExecutionEvent.payload, 1, max_payload_chars)
+        )
+        rows: list[TaskEventRow] = []
         with Session(self.engine) as session:
-            task = self._require_task(session, task_id)
-            timestamp = utc_now()
-            task.status = status
-            task.updated_at = timestamp
-            if status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.CANCELED}:
-                task.finished_at = timestamp
-            session.add(task)
+            executions = session.execute(
+                select(Execution.id, EventArchive.execution_id)
+                .outerjoin(EventArchive, EventArchive.execution_id == Execution.id)
+                .where(Execution.task_id == task_id)
+                .order_by(Execution.created_at.desc(), Execution.id.desc())
+            ).all()
+            for execution_id, archived_id in executions:
+                remaining = None if limit is None else limit - len(rows)
+                if remaining is not None and remaining <= 0:
+                    break
+                if archived_id is not None:
+                    archive = session.get(EventArchive, archived_id)
+                    assert archive is not None
+                    events = self._read_archive(archive)
+                    chunk = [
+                        TaskEventRow(
+                            execution_id=execution_id,
+                            sequence_number=event.sequence_number,
+                            source=event.source,
+                            event_type=event.event_type,
+                            payload=_truncated(event.payload, max_payload_chars),
+                        )
+                        for event in (events if remaining is None else events[-remaining:])
+                    ]
+                    rows.extend(reversed(chunk))
+                    continue
+                statement = (
+                    select(
+                        ExecutionEvent.sequence_number,
+                        ExecutionEvent.source,
+                        ExecutionEvent.event_type,
+                        payload_column,
+                        ExecutionEvent.payload_codec,
+                        ExecutionEvent.payload_data,
+                    )
+                    .where(ExecutionEvent.execution_id == execution_id)
+                    .order_by(ExecutionEvent.sequence_number.desc(), ExecutionEvent.id.desc())
+                )
+                if remaining is not None:
+                    statement = statement.limit(remaining)
+                rows.extend(
+                    TaskEventRow(
+                        execution_id=execution_id,
+                        sequence_number=sequence_number,
+                        source=source,
+                        event_type=event_type,
+                        payload=_truncated(
+                            decode_payload(payload, payload_codec, payload_data),
+                            max_payload_chars,
+                        ),
+                    )
+                    for sequence_number, source, event_type, payload, payload_codec, payload_data in (
+                        session.execute(statement)
+                    )
+                )
+        rows.reverse()
+        return rows
+
+    def _archive_execution(self, execution_id: str) -> EventArchive:
+        events = self.list_execution_events(execution_id)
+        path = event_archive_path(self.archive_dir, execution_id)
+        compressed_bytes = write_event_archive(path, events) if events else 0
+        archive = EventArchive(
+            execution_id=execution_id,
+            path=path.relative_to(self.archive_dir).as_posix() if events else "",
+            event_count=len(events),
+            compressed_bytes=compressed_bytes,
+            archived_at=utc_now(),
+        )
+        self._commit_archive(archive)
+        return archive
+
+    @_retry_on_busy
+    def _commit_archive(self, archive: EventArchive) -> None:
+        with Session(self.engine) as session:
+            session.add(archive)
+            session.execute(
+                delete(ExecutionEvent).where(ExecutionEvent.execution_id == archive.execution_id)
+            )
             session.commit()
-            session.refresh(task)
-            return task
+            session.refresh(archive)
+
+    def _read_archive(self, archive: EventArchive) -> list[ExecutionEvent]:
+        if not archive.path:
+            return []
+        return read_event_archive(self.archive_dir / archive.path, archive.execution_id)
 
+    @_retry_on_busy
+    def _update_task_status(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        *,
+        worker_id: str | None = None,
+    ) -> Task | None:
+        """Set a task's status; with `worker_id`, only while that worker still holds it.
+
+        A worker finishing a task guards the write with `claimed_by = worker_id
+        AND status = 'running'` in the UPDATE itself, so a task whose lease
+        lapsed and was requeued (or claimed by another worker) is left alone.
+        Returns None when that guard matched no row.
+        """
+        timestamp = utc_now()
+        values: dict[str, object] = {"status": status, "updated_at": timestamp}
+        if status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.CANCELED}:
+            values["finished_at"] = timestamp
+            values["lease_expires_at"] = None
+        conditions = [Task.id == task_id]
+        if worker_id is not None:
+            conditions += [Task.claimed_by == worker_id, Task.status == TaskStatus.RUNNING]
+        statement = (
+            update(Task)
+            .where(*conditions)
+            .values(**values)
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        with Session(self.engine, expire_on_commit=False) as session:
+            task = session.execute(statement).scalar_one_or_none()
+            session.commit()
+            if task is None and worker_id is None:
+                self._require_task(session, task_id)
+        return task
+
+    @_retry_on_busy
     def _finish_execution(
         self,
         *,
         execution_id: str,
         status: TaskStatus,
         exit_code: int | None,
-    ) -> Execution:
-        with Session(self.engine) as session:
-            execution = self._require_execution(session, execution_id)
-            execution.status = status
-            execution.exit_code = exit_code
-            execution.finished_at = utc_now()
-            session.add(execution)
+    ) -> Execution | None:
+        """Close an open execution; returns None if it was already closed.
+
+        `requeue_expired_tasks` fails the open executions of a reclaimed task,
+        so the guard keeps a stale worker from overwriting that outcome.
+        """
+        statement = (
+            update(Execution)
+            .where(
+                Execution.id == execution_id,
+                Execution.status.in_([TaskStatus.QUEUED, TaskStatus.RUNNING]),
+            )
+            .values(status=status, exit_code=exit_code, finished_at=utc_now())
+            .returning(Execution)
+            .execution_options(synchronize_session=False)
+        )
+        with Session(self.engine, expire_on_commit=False) as session:
+            execution = session.execute(statement).scalar_one_or_none()
             session.commit()
-            session.refresh(execution)
-            return execution
+            if execution is None:
+                self._require_execution(session, execution_id)
+        return execution
 
     @staticmethod
     def _require_task(session: Session, task_id: str) -> Task:
@@ -224,3 +978,97 @@ class SQLiteRepository:
         if execution is None:
             raise ValueError(f"execution not found: {execution_id}")
         return execution
+
+
+def _truncated(payload: str, max_chars: int | None) -> str:
+    return payload if max_chars is None else payload[:max_chars]
+
+
+def _decoded_event(event: ExecutionEvent) -> ExecutionEvent:
+    if event.payload_codec is not None:
+        event.payload = decode_payload(event.payload, event.payload_codec, event.payload_data)
+        event.payload_codec = None
+        event.payload_data = None
+    return event
+
+
+@dataclass(frozen=True, slots=True)
+class _Aging:
+    now: str
+    interval_seconds: float
+    max_boost: int | None
+
+
+def _aging_boost(queued_at: ColumnElement[str], aging: _Aging) -> ColumnElement[int]:
+    waited = (func.julianday(aging.now) - func.julianday(queued_at)) * 86400.0
+    boost = sql_cast(waited / aging.interval_seconds, Integer)
+    if aging.max_boost is not None:
+        boost = func.min(boost, aging.max_boost)
+    return boost
+
+
+def _effective_priority(task: Task, aging: _Aging | None) -> int:
+    if aging is None:
+        return task.priority
+    waited = datetime.fromisoformat(aging.now) - datetime.fromisoformat(task.queued_at)
+    boost = max(int(waited.total_seconds() // aging.interval_seconds), 0)
+    if aging.max_boost is not None:
+        boost = min(boost, aging.max_boost)
+    return task.priority + boost
+
+
+def _claim_statement(
+    *,
+    limit: int,
+    by_priority: bool,
+    values: Mapping[str, object],
+    aging: _Aging | None = None,
+    max_per_working_dir: int | None = None,
+) -> Update:
+    candidate = aliased(Task, name="candidate")
+    ordering = (candidate.queued_at.asc(), candidate.id.asc())
+    if by_priority:
+        priority = candidate.priority
+        if aging is not None:
+            priority = priority + _aging_boost(candidate.queued_at, aging)
+        ordering = (priority.desc(), *ordering)
+    conditions = [candidate.status == TaskStatus.QUEUED]
+    if max_per_working_dir is not None:
+        running = aliased(Task, name="running_task")
+        running_in_dir = (
+            select(func.count())
+            .select_from(running)
+            .where(
+                running.status == TaskStatus.RUNNING,
+                running.working_dir == candidate.working_dir,
+            )
+            .scalar_subquery()
+        )
+        conditions.append(
+            or_(candidate.working_dir.is_(None), running_in_dir < max_per_working_dir)
+        )
+    candidates = (
+        select(candidate.id)
+        .where(*conditions)
+        .order_by(*ordering)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    return (
+        update(Task)
+        .where(Task.id.in_(candidates), Task.status == TaskStatus.QUEUED)
+        .values(**values)
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def working_dir_from_payload(payload: str) -> str | None:
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    working_dir = data.get("working_dir")
+    return str(working_dir) if working_dir else None
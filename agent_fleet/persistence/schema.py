@@ -2,16 +2,45 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlmodel import SQLModel, create_engine
 from sqlalchemy.engine import Engine
 
+from agent_fleet.config import SQLiteSettings
 from agent_fleet.domain import models as _models  # noqa: F401  # ensure model metadata is loaded
 
 
-def create_sqlite_engine(database_path: str | Path) -> Engine:
+def create_sqlite_engine(database_path: str | Path, settings: SQLiteSettings | None = None) -> Engine:
     path = Path(database_path)
-    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    profile = settings or SQLiteSettings()
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={
+            "check_same_thread": False,
+            "timeout": profile.busy_timeout_ms / 1000,
+        },
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_connection_profile(dbapi_connection, _connection_record):  # type: ignore[no-untyped-def]
+        for statement in sqlite_pragma_statements(profile):
+            dbapi_connection.execute(statement)
+
+    return engine
+
+
+def sqlite_pragma_statements(settings: SQLiteSettings) -> tuple[str, ...]:
+    return (
+        # Only takes effect when the database is created or on the next VACUUM.
+        f"PRAGMA auto_vacuum = {settings.auto_vacuum.upper()}",
+        f"PRAGMA journal_mode = {settings.journal_mode.upper()}",
+        f"PRAGMA synchronous = {settings.synchronous.upper()}",
+        f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}",
+        # Negative cache_size is interpreted by SQLite as KiB rather than pages.
+        f"PRAGMA cache_size = {-int(settings.cache_size_kib)}",
+        f"PRAGMA mmap_size = {int(settings.mmap_size_bytes)}",
+        f"PRAGMA temp_store = {settings.temp_store.upper()}",
+    )
 
 
 def initialize_schema(engine: Engine) -> None:
@@ -19,10 +48,17 @@ def initialize_schema(engine: Engine) -> None:
     _ensure_columns(engine)
     _create_indexes(engine)
     _backfill_execution_events(engine)
+    _backfill_task_working_dirs(engine)
 
 
 def _ensure_columns(engine: Engine) -> None:
     migration_columns = {
+        "tasks": (
+            ("priority", "INTEGER NOT NULL DEFAULT 0"),
+            ("working_dir", "TEXT"),
+            ("claimed_by", "TEXT"),
+            ("lease_expires_at", "TEXT"),
+        ),
         "executions": (
             ("process_id", "INTEGER"),
             ("exit_code", "INTEGER"),
@@ -30,6 +66,8 @@ def _ensure_columns(engine: Engine) -> None:
         "execution_events": (
             ("sequence_number", "INTEGER"),
             ("source", "TEXT"),
+            ("payload_codec", "TEXT"),
+            ("payload_data", "BLOB"),
         ),
     }
 
@@ -49,8 +87,19 @@ def _ensure_columns(engine: Engine) -> None:
 def _create_indexes(engine: Engine) -> None:
     statements = (
         "CREATE INDEX IF NOT EXISTS idx_tasks_status_queued_at ON tasks(status, queued_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_priority_queued_at "
+        "ON tasks(status, priority DESC, queued_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_working_dir ON tasks(status, working_dir)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_lease ON tasks(status, lease_expires_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_created_at ON tasks(status, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_kind_created_at ON tasks(kind, created_at, id)",
         "CREATE INDEX IF NOT EXISTS idx_executions_task_id ON executions(task_id)",
+        "CREATE INDEX IF NOT EXISTS idx_executions_task_created_at ON executions(task_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_executions_status_finished_at ON executions(status, finished_at)",
         "CREATE INDEX IF NOT EXISTS idx_execution_events_execution_id ON execution_events(execution_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_execution_events_execution_sequence "
+        "ON execution_events(execution_id, sequence_number, id)",
     )
     with engine.begin() as connection:
         for statement in statements:
@@ -93,3 +142,19 @@ def _backfill_execution_events(engine: Engine) -> None:
                     """
                 )
             )
+
+
+def _backfill_task_working_dirs(engine: Engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                """
+                UPDATE tasks
+                SET working_dir = json_extract(payload, '$.working_dir')
+                WHERE working_dir IS NULL
+                  AND status IN ('QUEUED', 'RUNNING')
+                  AND json_valid(payload)
+                  AND json_type(payload) = 'object'
+                """
+            )
+        )
@@ -1,18 +1,38 @@
 from __future__ import annotations
 
 import re
-import subprocess
 from pathlib import Path
 
+from agent_fleet.workspace.git_facts import git_facts
+
+from .registry import TemplateRegistry
 from .task_types import TaskType, normalize_task_type
 
-_TEMPLATE_PATTERN = re.compile(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}")
 _TEMPLATE_ROOT = Path(__file__).parent / "templates"
+# Every separator str.splitlines() recognises, so the passes below see the same lines.
+_LINE_BREAKS = re.compile(r"\r\n|[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+_TRAILING_WHITESPACE = re.compile(r"[^\S\n]+$", re.MULTILINE)
+_BLANK_LINE_RUNS = re.compile(r"\n{3,}")
 
 TASK_TYPE_TEMPLATES: dict[TaskType, str] = {
     TaskType.FEATURE_IMPLEMENTATION: "feature_implementation.md",
 }
 
+PROMPT_CONTEXT_VARIABLES = (
+    "working_dir",
+    "task_type",
+    "task_background_block",
+    "git_repo_block",
+    "git_remote_block",
+    "pr_workflow_block",
+)
+
+_REGISTRY = TemplateRegistry(_TEMPLATE_ROOT, variables=PROMPT_CONTEXT_VARIABLES)
+
+
+def template_registry() -> TemplateRegistry:
+    return _REGISTRY
+
 
 def build_prompt(
     *,
@@ -35,18 +55,19 @@ def build_prompt(
     git_remote_block = ""
     pr_workflow_block = ""
 
-    if _is_git_repo(path):
+    facts = git_facts(path)
+    if facts.is_repo:
         git_repo_block = (
             "This working directory is a git repository.\n"
             "- Stage all relevant changes and create a commit before finishing\n"
             "- Use a concise commit message that describes what changed"
         )
-        if _has_remote(path):
+        if facts.has_remote:
             git_remote_block = (
                 "A git remote is configured.\n"
                 "- Push your branch to the configured remote when push permissions are available"
             )
-            if _suggests_pull_request_workflow(path):
+            if _suggests_pull_request_workflow(facts.origin_url):
                 pr_workflow_block = (
                     "Remote workflow supports PR/MR collaboration.\n"
                     "- Create a pull request/merge request with a short summary of what was implemented"
@@ -62,7 +83,7 @@ def build_prompt(
     }
 
     template_name = TASK_TYPE_TEMPLATES[normalized_task_type]
-    rendered = _render_template_file(template_name, context)
+    rendered = _REGISTRY.render(template_name, context)
     return _normalize_blank_lines(rendered)
 
 
@@ -110,59 +131,12 @@ def _build_task_background_block(
     return f"Input mode: plain_task\nTask request:\n{plain_instruction}"
 
 
-def _render_template_file(relative_path: str, context: dict[str, str]) -> str:
-    template_path = _TEMPLATE_ROOT / relative_path
-    template = template_path.read_text(encoding="utf-8")
-    return _render_template(template, context)
-
-
-def _render_template(template: str, context: dict[str, str]) -> str:
-    def _replace(match: re.Match[str]) -> str:
-        key = match.group(1)
-        if key not in context:
-            raise ValueError(f"missing template variable: {key}")
-        return context[key]
-
-    return _TEMPLATE_PATTERN.sub(_replace, template)
-
-
 def _normalize_blank_lines(text: str) -> str:
-    lines = text.splitlines()
-    out: list[str] = []
-    blank_count = 0
-    for line in lines:
-        if line.strip() == "":
-            blank_count += 1
-            if blank_count <= 1:
-                out.append("")
-        else:
-            blank_count = 0
-            out.append(line.rstrip())
-    return "\n".join(out).strip() + "\n"
-
-
-def _is_git_repo(working_dir: Path) -> bool:
-    return _run_git(working_dir, "rev-parse", "--is-inside-work-tree") == "true"
-
+    text = _LINE_BREAKS.sub("\n", text)
+    text = _TRAILING_WHITESPACE.sub("", text)
+    text = _BLANK_LINE_RUNS.sub("\n\n", text)
+    return text.strip() + "\n"
 
-def _has_remote(working_dir: Path) -> bool:
-    remotes = _run_git(working_dir, "remote")
-    return bool(remotes)
 
-
-def _suggests_pull_request_workflow(working_dir: Path) -> bool:
-    remote_url = _run_git(working_dir, "remote", "get-url", "origin")
+def _suggests_pull_request_workflow(remote_url: str) -> bool:
     return "github.com" in remote_url or "gitlab.com" in remote_url
-
-
-def _run_git(working_dir: Path, *args: str) -> str:
-    completed = subprocess.run(
-        ["git", *args],
-        cwd=working_dir,
-        check=False,
-        capture_output=True,
-        text=True,
-    )
-    if completed.returncode != 0:
-        return ""
-    return completed.stdout.strip()
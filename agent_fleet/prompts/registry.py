@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Iterable, Mapping
+
+TEMPLATE_PATTERN = re.compile(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}")
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    """Template parsed into alternating literal and variable-name segments.
+
+    Even indexes of `segments` hold literal text, odd indexes hold variable
+    names, so rendering is a single join with no regex work.
+    """
+
+    name: str
+    segments: tuple[str, ...]
+    variables: frozenset[str]
+    mtime_ns: int
+
+    def render(self, context: Mapping[str, str]) -> str:
+        missing = self.variables.difference(context)
+        if missing:
+            raise ValueError(f"missing template variable: {sorted(missing)[0]}")
+        parts = list(self.segments)
+        parts[1::2] = [context[name] for name in self.segments[1::2]]
+        return "".join(parts)
+
+
+def compile_template(name: str, source: str, *, mtime_ns: int = 0) -> CompiledTemplate:
+    segments: list[str] = []
+    position = 0
+    for match in TEMPLATE_PATTERN.finditer(source):
+        segments.append(source[position : match.start()])
+        segments.append(match.group(1))
+        position = match.end()
+    segments.append(source[position:])
+    return CompiledTemplate(
+        name=name,
+        segments=tuple(segments),
+        variables=frozenset(segments[1::2]),
+        mtime_ns=mtime_ns,
+    )
+
+
+@dataclass(slots=True)
+class RenderTimings:
+    renders: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    loads: int = 0
+
+
+class TemplateRegistry:
+    """Compiled-template cache for a directory of prompt templates.
+
+    Each template is read and parsed once; later renders only `stat` the file
+    and recompile when its mtime changes, so edits are picked up without a
+    restart. When `variables` is given, a template referencing anything else
+    is rejected as soon as it is (re)loaded rather than at render time.
+    """
+
+    def __init__(self, root: str | Path, *, variables: Iterable[str] | None = None) -> None:
+        self.root = Path(root)
+        self.variables = frozenset(variables) if variables is not None else None
+        self._lock = threading.Lock()
+        self._templates: dict[str, CompiledTemplate] = {}
+        self._timings: dict[str, RenderTimings] = {}
+
+    def get(self, name: str) -> CompiledTemplate:
+        path = self.root / name
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            template = self._templates.get(name)
+        if template is not None and template.mtime_ns == mtime_ns:
+            return template
+
+        template = compile_template(name, path.read_text(encoding="utf-8"), mtime_ns=mtime_ns)
+        if self.variables is not None:
+            unknown = template.variables - self.variables
+            if unknown:
+                raise ValueError(
+                    f"template {name} references unknown variables: {', '.join(sorted(unknown))}"
+                )
+        with self._lock:
+            self._templates[name] = template
+            self._timings.setdefault(name, RenderTimings()).loads += 1
+        return template
+
+    def render(self, name: str, context: Mapping[str, str]) -> str:
+        started = time.perf_counter()
+        rendered = self.get(name).render(context)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            timings = self._timings.setdefault(name, RenderTimings())
+            timings.renders += 1
+            timings.total_seconds += elapsed
+            timings.max_seconds = max(timings.max_seconds, elapsed)
+        return rendered
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Compile (and validate) templates ahead of the first render."""
+        for name in names:
+            self.get(name)
+
+    def timings(self) -> dict[str, RenderTimings]:
+        with self._lock:
+            return {
+                name: RenderTimings(
+                    renders=timings.renders,
+                    total_seconds=timings.total_seconds,
+                    max_seconds=timings.max_seconds,
+                    loads=timings.loads,
+                )
+                for name, timings in self._timings.items()
+            }
@@ -1,3 +1,5 @@
+from .base import TaskQueue
 from .fifo import FIFOQueue
+from .priority import PriorityQueue
 
-__all__ = ["FIFOQueue"]
+__all__ = ["FIFOQueue", "PriorityQueue", "TaskQueue"]
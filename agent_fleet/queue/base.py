@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Mapping, Protocol, Sequence
+
+from agent_fleet.domain.models import Task
+
+
+class TaskQueue(Protocol):
+    """Queue interface the orchestrator dispatches from."""
+
+    def enqueue(self, *, kind: str, payload: str, priority: int = 0) -> Task: ...
+
+    def enqueue_many(self, tasks: Sequence[Mapping[str, object]]) -> list[str]:
+        """Enqueue `kind`/`payload`/`priority` mappings in one transaction; returns task ids."""
+        ...
+
+    def dequeue(self) -> Task | None: ...
+
+    def claim(self, *, worker_id: str, limit: int = 1, lease_seconds: float = ...) -> list[Task]: ...
+
+    def maintain(self) -> None:
+        """Periodic housekeeping, called by the dispatcher loop between claims."""
+        ...
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
+from typing import Mapping, Sequence
+
 from agent_fleet.domain.models import Task
-from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.persistence.repository import DEFAULT_LEASE_SECONDS, SQLiteRepository
 
 
 class FIFOQueue:
-    def __init__(self, repository: SQLiteRepository):
+    def __init__(self, repository: SQLiteRepository, *, max_per_working_dir: int | None = None):
         self.repository = repository
+        self.max_per_working_dir = max_per_working_dir
+
+    def enqueue(self, *, kind: str, payload: str, priority: int = 0) -> Task:
+        return self.repository.enqueue_task(kind=kind, payload=payload, priority=priority)
 
-    def enqueue(self, *, kind: str, payload: str) -> Task:
-        return self.repository.enqueue_task(kind=kind, payload=payload)
+    def enqueue_many(self, tasks: Sequence[Mapping[str, object]]) -> list[str]:
+        return self.repository.enqueue_tasks(tasks)
 
     def dequeue(self) -> Task | None:
         return self.repository.dequeue_next_task()
+
+    def claim(
+        self,
+        *,
+        worker_id: str,
+        limit: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ) -> list[Task]:
+        return self.repository.claim_tasks(
+            worker_id=worker_id,
+            limit=limit,
+            lease_seconds=lease_seconds,
+            max_per_working_dir=self.max_per_working_dir,
+        )
+
+    def maintain(self) -> None:
+        return None
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+from agent_fleet.domain.models import Task
+from agent_fleet.persistence.repository import (
+    DEFAULT_LEASE_SECONDS,
+    SQLiteRepository,
+    default_worker_id,
+)
+
+DEFAULT_AGING_INTERVAL_SECONDS = 600.0
+
+
+class PriorityQueue:
+    """Highest `priority` first, FIFO within a priority level.
+
+    Queued tasks gain one priority level per `aging_interval_seconds` of waiting
+    (at most `max_aging_boost` levels, when set), so low-priority work cannot
+    starve. The boost is applied when tasks are claimed; stored priorities are
+    left as enqueued. Pass `aging_interval_seconds=None` to disable aging.
+    `max_per_working_dir` caps how many tasks may run in the same working
+    directory at once.
+    """
+
+    def __init__(
+        self,
+        repository: SQLiteRepository,
+        *,
+        aging_interval_seconds: float | None = DEFAULT_AGING_INTERVAL_SECONDS,
+        max_aging_boost: int | None = None,
+        max_per_working_dir: int | None = None,
+    ):
+        self.repository = repository
+        self.max_per_working_dir = max_per_working_dir
+        self.aging_interval_seconds = aging_interval_seconds
+        self.max_aging_boost = max_aging_boost
+
+    def enqueue(self, *, kind: str, payload: str, priority: int = 0) -> Task:
+        return self.repository.enqueue_task(kind=kind, payload=payload, priority=priority)
+
+    def enqueue_many(self, tasks: Sequence[Mapping[str, object]]) -> list[str]:
+        return self.repository.enqueue_tasks(tasks)
+
+    def dequeue(self) -> Task | None:
+        tasks = self.claim(worker_id=default_worker_id(), limit=1)
+        return tasks[0] if tasks else None
+
+    def claim(
+        self,
+        *,
+        worker_id: str,
+        limit: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ) -> list[Task]:
+        return self.repository.claim_tasks(
+            worker_id=worker_id,
+            limit=limit,
+            lease_seconds=lease_seconds,
+            by_priority=True,
+            aging_interval_seconds=self.aging_interval_seconds,
+            max_aging_boost=self.max_aging_boost,
+            max_per_working_dir=self.max_per_working_dir,
+        )
+
+    def maintain(self) -> None:
+        return None
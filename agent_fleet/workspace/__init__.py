@@ -0,0 +1,11 @@
+from .git_facts import GitFacts, GitFactsCache, git_facts
+from .worktrees import WorktreeError, WorktreePool, repository_root
+
+__all__ = [
+    "GitFacts",
+    "GitFactsCache",
+    "WorktreeError",
+    "WorktreePool",
+    "git_facts",
+    "repository_root",
+]
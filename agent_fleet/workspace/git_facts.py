@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import re
+import threading
+
+_SECTION_PATTERN = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_KEY_VALUE_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$")
+
+
+@dataclass(frozen=True, slots=True)
+class GitFacts:
+    is_repo: bool
+    root: Path | None = None
+    git_dir: Path | None = None
+    remotes: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def has_remote(self) -> bool:
+        return bool(self.remotes)
+
+    @property
+    def origin_url(self) -> str:
+        return self.remotes.get("origin", "")
+
+
+_NOT_A_REPO = GitFacts(is_repo=False)
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheEntry:
+    facts: GitFacts
+    watched: tuple[str, ...]
+    mtimes: tuple[int, ...]
+
+
+class GitFactsCache:
+    """Repository facts read straight from `.git` files, cached per working directory.
+
+    A cache hit costs a couple of `stat` calls: entries are re-validated
+    against the mtimes of `.git/config` and `HEAD` (or, outside a repository,
+    of the working directory itself, which changes when `git init` runs there).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, _CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def facts(self, working_dir: str | Path) -> GitFacts:
+        key = os.path.abspath(working_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and _mtimes(entry.watched) == entry.mtimes:
+            with self._lock:
+                self.hits += 1
+            return entry.facts
+
+        facts, watched = _discover(Path(key))
+        entry = _CacheEntry(facts=facts, watched=watched, mtimes=_mtimes(watched))
+        with self._lock:
+            self._entries[key] = entry
+            self.misses += 1
+        return facts
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_default_cache = GitFactsCache()
+
+
+def git_facts(working_dir: str | Path) -> GitFacts:
+    return _default_cache.facts(working_dir)
+
+
+def default_git_facts_cache() -> GitFactsCache:
+    return _default_cache
+
+
+def _mtimes(paths: tuple[str, ...]) -> tuple[int, ...]:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(-1)
+    return tuple(mtimes)
+
+
+def _discover(start: Path) -> tuple[GitFacts, tuple[str, ...]]:
+    if not start.is_dir():
+        return _NOT_A_REPO, (str(start),)
+
+    for directory in (start, *start.parents):
+        marker = directory / ".git"
+        if not (marker.is_dir() or marker.is_file()):
+            continue
+        git_dir = _resolve_git_dir(marker)
+        if git_dir is None or not (git_dir / "HEAD").is_file():
+            continue
+        common_dir = _resolve_common_dir(git_dir)
+        config_path = common_dir / "config"
+        facts = GitFacts(
+            is_repo=True,
+            root=directory,
+            git_dir=git_dir,
+            remotes=_read_remotes(config_path),
+        )
+        return facts, (str(config_path), str(git_dir / "HEAD"))
+    return _NOT_A_REPO, (str(start),)
+
+
+def _resolve_git_dir(marker: Path) -> Path | None:
+    if marker.is_dir():
+        return marker
+    # Worktrees and submodules use a `.git` file pointing at the real git dir.
+    try:
+        content = marker.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    git_dir = Path(content.removeprefix("gitdir:").strip())
+    if not git_dir.is_absolute():
+        git_dir = marker.parent / git_dir
+    return git_dir
+
+
+def _resolve_common_dir(git_dir: Path) -> Path:
+    commondir_file = git_dir / "commondir"
+    try:
+        common = Path(commondir_file.read_text(encoding="utf-8").strip())
+    except OSError:
+        return git_dir
+    return common if common.is_absolute() else git_dir / common
+
+
+def _read_remotes(config_path: Path) -> dict[str, str]:
+    try:
+        lines = config_path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return {}
+
+    remotes: dict[str, str] = {}
+    current_remote: str | None = None
+    for line in lines:
+        section = _SECTION_PATTERN.match(line)
+        if section is not None:
+            name, subsection = section.group(1).lower(), section.group(2)
+            current_remote = subsection if name == "remote" and subsection is not None else None
+            if current_remote is not None:
+                remotes.setdefault(current_remote, "")
+            continue
+        if current_remote is None or remotes[current_remote]:
+            # Git keeps the first url of a remote for fetching.
+            continue
+        key_value = _KEY_VALUE_PATTERN.match(line)
+        if key_value is None or key_value.group(1).lower() != "url":
+            continue
+        remotes[current_remote] = _config_value(key_value.group(2) or "")
+    return remotes
+
+
+def _config_value(raw: str) -> str:
+    value = raw.strip()
+    if value.startswith('"'):
+        return value[1:].split('"', 1)[0]
+    for comment_marker in (" #", " ;", "\t#", "\t;"):
+        value = value.split(comment_marker, 1)[0]
+    return value.strip()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import threading
+import time
+from uuid import uuid4
+
+
+class WorktreeError(RuntimeError):
+    pass
+
+
+BRANCH_PREFIX = "agent-fleet/"
+
+
+@dataclass(slots=True)
+class _PooledWorktree:
+    path: Path
+    source: Path
+    in_use: bool
+    last_used: float
+    branch: str | None = None
+    base: str | None = None
+
+
+class WorktreePool:
+    """Warm pool of `git worktree`s per source repository.
+
+    `acquire` hands out an idle worktree for the repository (creating one when
+    none is free) on a new branch started at the source repository's current
+    HEAD, so commits made in it stay reachable after the worktree is reused.
+    `release` resets and cleans it, detaches it from the branch and returns it
+    to the pool; the branch is deleted only if nothing was committed on it.
+    Idle worktrees beyond `max_idle_per_repo`, or beyond `max_total` across
+    all repositories, are removed least-recently-used first.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        *,
+        max_idle_per_repo: int = 4,
+        max_total: int = 16,
+    ) -> None:
+        self.root = Path(root)
+        self.max_idle_per_repo = max_idle_per_repo
+        self.max_total = max_total
+        self._lock = threading.Lock()
+        self._repo_locks: dict[Path, threading.RLock] = {}
+        self._worktrees: dict[Path, _PooledWorktree] = {}
+
+    def acquire(self, source_repo: str | Path, *, branch: str | None = None) -> Path:
+        """Check out a worktree of `source_repo` on the new branch `branch`.
+
+        `branch` defaults to a unique `agent-fleet/...` name; an existing
+        branch of that name is never reset.
+        """
+        source = _repository_root(Path(source_repo))
+        branch = branch or f"{BRANCH_PREFIX}{uuid4().hex[:12]}"
+        with self._lock:
+            idle = [
+                worktree
+                for worktree in self._worktrees.values()
+                if worktree.source == source and not worktree.in_use
+            ]
+            pooled = max(idle, key=lambda worktree: worktree.last_used) if idle else None
+            if pooled is not None:
+                pooled.in_use = True
+        with self._repo_lock(source):
+            head = _git(source, "rev-parse", "HEAD")
+            if pooled is None:
+                path = self.root / _repository_slug(source) / uuid4().hex[:12]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _git(source, "worktree", "add", "-b", branch, str(path), head)
+                pooled = _PooledWorktree(path=path, source=source, in_use=True, last_used=time.monotonic())
+                with self._lock:
+                    self._worktrees[path] = pooled
+            else:
+                try:
+                    _git(pooled.path, "checkout", "--force", "-b", branch, head)
+                except WorktreeError:
+                    self._discard(pooled)
+                    raise
+            pooled.branch = branch
+            pooled.base = head
+
+        self._evict()
+        return pooled.path
+
+    def release(self, worktree_path: str | Path) -> None:
+        path = Path(worktree_path)
+        with self._lock:
+            pooled = self._worktrees.get(path)
+        if pooled is None:
+            return
+        try:
+            _git(path, "reset", "--hard")
+            _git(path, "clean", "-ffdx")
+            self._retire_branch(pooled)
+        except WorktreeError:
+            self._discard(pooled)
+            return
+        with self._lock:
+            pooled.in_use = False
+            pooled.last_used = time.monotonic()
+        self._evict()
+
+    def close(self) -> None:
+        with self._lock:
+            worktrees = list(self._worktrees.values())
+        for pooled in worktrees:
+            self._discard(pooled)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            busy = sum(1 for worktree in self._worktrees.values() if worktree.in_use)
+            return {"total": len(self._worktrees), "busy": busy, "idle": len(self._worktrees) - busy}
+
+    def _evict(self) -> None:
+        with self._lock:
+            idle = sorted(
+                (worktree for worktree in self._worktrees.values() if not worktree.in_use),
+                key=lambda worktree: worktree.last_used,
+            )
+            idle_per_repo: dict[Path, int] = {}
+            for worktree in idle:
+                idle_per_repo[worktree.source] = idle_per_repo.get(worktree.source, 0) + 1
+            overflow = max(len(self._worktrees) - self.max_total, 0)
+            victims = []
+            for worktree in idle:
+                if overflow > 0 or idle_per_repo[worktree.source] > self.max_idle_per_repo:
+                    victims.append(worktree)
+                    overflow = max(overflow - 1, 0)
+                    idle_per_repo[worktree.source] -= 1
+            for worktree in victims:
+                del self._worktrees[worktree.path]
+        for worktree in victims:
+            self._remove(worktree)
+
+    def _retire_branch(self, pooled: _PooledWorktree) -> None:
+        # Detach so the branch is free to be checked out elsewhere; keep it
+        # whenever the execution committed anything on it.
+        if pooled.branch is None:
+            return
+        with self._repo_lock(pooled.source):
+            _git(pooled.path, "checkout", "--detach")
+            try:
+                tip = _git(pooled.source, "rev-parse", "--verify", f"refs/heads/{pooled.branch}")
+            except WorktreeError:
+                tip = None  # The agent renamed or deleted it.
+            if tip == pooled.base:
+                _git(pooled.source, "branch", "-D", pooled.branch)
+        pooled.branch = None
+        pooled.base = None
+
+    def _discard(self, pooled: _PooledWorktree) -> None:
+        with self._lock:
+            self._worktrees.pop(pooled.path, None)
+        self._remove(pooled)
+
+    def _repo_lock(self, source: Path) -> threading.RLock:
+        # Serialises git worktree bookkeeping per source repository.
+        with self._lock:
+            return self._repo_locks.setdefault(source, threading.RLock())
+
+    def _remove(self, pooled: _PooledWorktree) -> None:
+        with self._repo_lock(pooled.source):
+            try:
+                _git(pooled.source, "worktree", "remove", "--force", str(pooled.path))
+            except WorktreeError:
+                shutil.rmtree(pooled.path, ignore_errors=True)
+                subprocess.run(
+                    ["git", "worktree", "prune"],
+                    cwd=pooled.source,
+                    check=False,
+                    capture_output=True,
+                )
+
+
+def repository_root(path: str | Path) -> Path | None:
+    """Top-level directory of the git checkout containing `path`, or None outside git."""
+    try:
+        return _repository_root(Path(path))
+    except WorktreeError:
+        return None
+
+
+def _repository_root(path: Path) -> Path:
+    return Path(_git(path, "rev-parse", "--show-toplevel")).resolve()
+
+
+def _repository_slug(source: Path) -> str:
+    digest = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:8]
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "-", source.name) or "repo"
+    return f"{name}-{digest}"
+
+
+def _git(cwd: Path, *args: str) -> str:
+    completed = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        error_text = (completed.stderr or completed.stdout).strip() or "unknown git error"
+        raise WorktreeError(f"git {' '.join(args)} failed in {cwd}: {error_text}")
+    return completed.stdout.strip()
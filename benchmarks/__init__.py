@@ -0,0 +1,4 @@
+"""Micro-benchmarks for the repository, runner and prompt hot paths.
+
+Run with `python -m benchmarks --help`.
+"""
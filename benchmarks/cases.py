@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import itertools
+import json
+from pathlib import Path
+import shutil
+import subprocess
+from typing import Callable, Iterator
+
+from agent_fleet.agents.codex_runner import CodexRunner
+from agent_fleet.agents.json_codec import json_codec
+from agent_fleet.persistence.repository import SQLiteRepository, utc_now
+from agent_fleet.prompts.policy import build_prompt
+from benchmarks.harness import BenchmarkCase
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+EVENTS_PER_EXECUTION = 1_000
+# Enough queued tasks for every dequeue the suite performs at full length.
+QUEUED_BACKLOG = 2_000
+
+_EVENT_LINE = json.dumps(
+    {
+        "type": "item.completed",
+        "item": {
+            "id": "item_42",
+            "type": "command_execution",
+            "command": "bash -lc 'python -m pytest -q tests/test_repository.py'",
+            "aggregated_output": "........................................ [100%]\n40 passed in 1.92s\n",
+            "exit_code": 0,
+            "status": "completed",
+        },
+    },
+    separators=(",", ":"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SeededDatabase:
+    repository: SQLiteRepository
+    size: str
+    execution_ids: list[str]
+    task_ids: list[str]
+
+
+def seed_database(path: Path, size: str) -> SeededDatabase:
+    """Create a database holding `SIZES[size]` events spread over executions of 1000 events.
+
+    The tasks owning those executions are already claimed; `QUEUED_BACKLOG`
+    further tasks are left queued for the dequeue benchmark.
+    """
+    events = SIZES[size]
+    repository = SQLiteRepository(path)
+    repository.initialize()
+    executions = max(events // EVENTS_PER_EXECUTION, 1)
+    task_ids = repository.enqueue_tasks([{"kind": "codex", "payload": "{}"} for _ in range(executions)])
+    repository.claim_tasks(worker_id="benchmark-seed", limit=executions)
+    execution_ids = [
+        repository.create_execution(task_id=task_id, agent_name="codex").id for task_id in task_ids
+    ]
+    created_at = utc_now()
+    batch: list[dict[str, object]] = []
+    for index in range(events):
+        batch.append(
+            {
+                "execution_id": execution_ids[index // EVENTS_PER_EXECUTION % executions],
+                "sequence_number": index % EVENTS_PER_EXECUTION + 1,
+                "source": "json",
+                "event_type": "item_completed",
+                "payload": _EVENT_LINE,
+                "created_at": created_at,
+            }
+        )
+        if len(batch) == 10_000:
+            repository.append_execution_events(batch)
+            batch.clear()
+    if batch:
+        repository.append_execution_events(batch)
+    repository.enqueue_tasks([{"kind": "codex", "payload": "{}"} for _ in range(QUEUED_BACKLOG)])
+    return SeededDatabase(repository=repository, size=size, execution_ids=execution_ids, task_ids=task_ids)
+
+
+def repository_benchmarks(seeded: SeededDatabase) -> Iterator[BenchmarkCase]:
+    repository = seeded.repository
+    size = seeded.size
+
+    yield BenchmarkCase(
+        "repository.enqueue_task",
+        size,
+        lambda: repository.enqueue_task(kind="codex", payload="{}"),
+        calls=200,
+    )
+    yield BenchmarkCase(
+        "repository.dequeue_next_task",
+        size,
+        repository.dequeue_next_task,
+        calls=100,
+    )
+
+    target = repository.create_execution(task_id=seeded.task_ids[0], agent_name="codex").id
+    sequence = itertools.count(1)
+    yield BenchmarkCase(
+        "repository.append_execution_event",
+        size,
+        lambda: repository.append_execution_event(
+            execution_id=target,
+            sequence_number=next(sequence),
+            source="json",
+            event_type="item_completed",
+            payload=_EVENT_LINE,
+        ),
+        calls=200,
+    )
+
+    def append_batch() -> None:
+        repository.append_execution_events(
+            [
+                {
+                    "execution_id": target,
+                    "sequence_number": next(sequence),
+                    "source": "json",
+                    "event_type": "item_completed",
+                    "payload": _EVENT_LINE,
+                }
+                for _ in range(500)
+            ]
+        )
+
+    yield BenchmarkCase(
+        "repository.append_execution_events[500]",
+        size,
+        append_batch,
+        calls=5,
+    )
+
+    # Read from an execution in the middle of the table rather than at either end.
+    execution_id = seeded.execution_ids[len(seeded.execution_ids) // 2]
+    task_id = seeded.task_ids[len(seeded.task_ids) // 2]
+    yield BenchmarkCase(
+        f"repository.list_execution_events[{min(SIZES[size], EVENTS_PER_EXECUTION)}]",
+        size,
+        lambda: repository.list_execution_events(execution_id),
+        calls=5,
+    )
+    yield BenchmarkCase(
+        "repository.tail_task_events[50]",
+        size,
+        lambda: repository.tail_task_events(task_id, limit=50),
+        calls=50,
+    )
+
+
+def runner_benchmarks(work_dir: Path) -> Iterator[BenchmarkCase]:
+    """Size-independent benchmarks: event parsing and prompt building."""
+
+    repository = SQLiteRepository(work_dir / "runner.db")
+    codec = json_codec("json")
+    for mode in ("normalized", "verbatim"):
+        runner = CodexRunner(repository, event_payloads=mode, codec=codec)
+        yield BenchmarkCase(
+            f"runner.parse_event_line[{mode}]",
+            "-",
+            _bind(runner._parse_event_line, source="stdout", line=_EVENT_LINE + "\n"),
+            calls=20_000,
+        )
+    runner = CodexRunner(repository, codec=codec)
+    yield BenchmarkCase(
+        "runner.parse_event_line[raw]",
+        "-",
+        _bind(runner._parse_event_line, source="stdout", line="Compiling agent_fleet v0.1.0\n"),
+        calls=20_000,
+    )
+
+    repo_dir = work_dir / "prompt-repo"
+    repo_dir.mkdir(exist_ok=True)
+    if shutil.which("git"):
+        subprocess.run(["git", "init", "-q", str(repo_dir)], check=True)
+    yield BenchmarkCase(
+        "prompts.build_prompt",
+        "-",
+        _bind(
+            build_prompt,
+            task_type="feature_implementation",
+            working_dir=repo_dir,
+            instruction="Add pagination to the task list",
+        ),
+        calls=200,
+    )
+
+
+def _bind(function: Callable[..., object], **kwargs: object) -> Callable[[], object]:
+    return lambda: function(**kwargs)
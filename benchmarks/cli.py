@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from pathlib import Path
+import tempfile
+import time
+from typing import Iterable
+
+import click
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from benchmarks.cases import SIZES, repository_benchmarks, runner_benchmarks, seed_database
+from benchmarks.harness import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    BenchmarkCase,
+    BenchmarkResult,
+    compare,
+    measure,
+    read_results,
+    write_results,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default="1k,100k",
+    show_default=True,
+    help=f"Comma-separated seeded database sizes in events ({', '.join(SIZES)})",
+)
+@click.option("--filter", "name_filter", default=None, help="Only run benchmarks whose name contains this")
+@click.option("--rounds", default=5, show_default=True, type=click.IntRange(min=1))
+@click.option(
+    "--scale",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0.01),
+    help="Multiply the calls per round (lower for a quick smoke run)",
+)
+@click.option(
+    "--output",
+    default=DEFAULT_OUTPUT,
+    show_default=True,
+    type=click.Path(path_type=Path, dir_okay=False),
+    help="Write JSON results here",
+)
+@click.option(
+    "--baseline",
+    default=DEFAULT_BASELINE,
+    show_default=True,
+    type=click.Path(path_type=Path, dir_okay=False),
+    help="Compare against these results when the file exists",
+)
+@click.option("--save-baseline", is_flag=True, help="Also write the results to --baseline")
+@click.option(
+    "--threshold",
+    default=DEFAULT_REGRESSION_THRESHOLD,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Fail when a median is this fraction slower than the baseline",
+)
+@click.option(
+    "--work-dir",
+    default=None,
+    type=click.Path(path_type=Path, file_okay=False),
+    help="Where to build the seeded databases (a temporary directory by default)",
+)
+def main(
+    sizes: str,
+    name_filter: str | None,
+    rounds: int,
+    scale: float,
+    output: Path,
+    baseline: Path,
+    save_baseline: bool,
+    threshold: float,
+    work_dir: Path | None,
+) -> None:
+    """Time the hot repository, runner and prompt operations."""
+    console = Console()
+    size_names = [size.strip().lower() for size in sizes.split(",") if size.strip()]
+    unknown = [size for size in size_names if size not in SIZES]
+    if unknown:
+        raise click.BadParameter(f"unknown sizes: {', '.join(unknown)}", param_hint="--sizes")
+
+    results: list[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory(prefix="agent-fleet-bench-") as temporary:
+        root = work_dir or Path(temporary)
+        root.mkdir(parents=True, exist_ok=True)
+        for size in size_names:
+            database = root / f"bench-{size}.db"
+            for leftover in root.glob(f"bench-{size}.db*"):
+                leftover.unlink()
+            started = time.perf_counter()
+            seeded = seed_database(database, size)
+            console.print(f"seeded {size} events in {time.perf_counter() - started:.1f} s", highlight=False)
+            results.extend(_run(repository_benchmarks(seeded), name_filter, rounds=rounds, scale=scale))
+        results.extend(_run(runner_benchmarks(root), name_filter, rounds=rounds, scale=scale))
+
+    comparisons = {}
+    if baseline.exists() and not save_baseline:
+        comparisons = {(item.name, item.size): item for item in compare(read_results(baseline), results)}
+
+    table = Table(title="benchmarks (microseconds per call)")
+    table.add_column("Benchmark", overflow="fold")
+    table.add_column("Size")
+    for column in ("Median", "Min", "Max"):
+        table.add_column(column, justify="right")
+    if comparisons:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right")
+    regressions = []
+    for result in results:
+        row = [escape(result.name), result.size, *(f"{value:,.1f}" for value in _timings(result))]
+        comparison = comparisons.get(result.key)
+        if comparisons:
+            if comparison is None:
+                row.extend(["-", "new"])
+            else:
+                change = f"{(comparison.ratio - 1) * 100:+.1f}%"
+                if comparison.regressed(threshold):
+                    regressions.append(comparison)
+                    change = f"[red]{change}[/red]"
+                row.extend([f"{comparison.baseline_us:,.1f}", change])
+        table.add_row(*row)
+    console.print(table)
+
+    write_results(output, results)
+    console.print(f"results written to {output}", highlight=False)
+    if save_baseline:
+        write_results(baseline, results)
+        console.print(f"baseline written to {baseline}", highlight=False)
+    if regressions:
+        names = ", ".join(f"{item.name}@{item.size}" for item in regressions)
+        raise click.ClickException(f"{len(regressions)} regression(s) over {threshold:.0%}: {names}")
+
+
+def _run(
+    cases: Iterable[BenchmarkCase],
+    name_filter: str | None,
+    *,
+    rounds: int,
+    scale: float,
+) -> list[BenchmarkResult]:
+    # Cases are generated lazily, so each one's setup runs just before it is measured.
+    return [
+        measure(case, rounds=rounds, scale=scale)
+        for case in cases
+        if name_filter is None or name_filter in case.name
+    ]
+
+
+def _timings(result: BenchmarkResult) -> tuple[float, float, float]:
+    return result.median_us, result.min_us, result.max_us
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+import json
+from pathlib import Path
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Callable, Sequence
+
+RESULTS_SCHEMA_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkCase:
+    """One timed operation. `calls` is the number of calls per round at `--scale 1`."""
+
+    name: str
+    size: str
+    operation: Callable[[], object]
+    calls: int
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    name: str
+    size: str
+    rounds: int
+    ops_per_round: int
+    median_us: float
+    min_us: float
+    max_us: float
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.name, self.size
+
+
+@dataclass(frozen=True, slots=True)
+class Comparison:
+    name: str
+    size: str
+    baseline_us: float
+    current_us: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_us / self.baseline_us if self.baseline_us else float("inf")
+
+    def regressed(self, threshold: float) -> bool:
+        return self.ratio > 1.0 + threshold
+
+
+def measure(case: BenchmarkCase, *, rounds: int = 5, scale: float = 1.0, warmup: int = 1) -> BenchmarkResult:
+    """Time `case.operation`; each figure is microseconds per call for one round.
+
+    The median over rounds is the headline number: it ignores the odd round
+    that hits a WAL checkpoint or a GC pause.
+    """
+    ops_per_round = max(int(case.calls * scale), 1)
+    operation = case.operation
+    for _ in range(warmup * ops_per_round):
+        operation()
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(ops_per_round):
+            operation()
+        per_call.append((time.perf_counter() - started) / ops_per_round * 1e6)
+    return BenchmarkResult(
+        name=case.name,
+        size=case.size,
+        rounds=rounds,
+        ops_per_round=ops_per_round,
+        median_us=statistics.median(per_call),
+        min_us=min(per_call),
+        max_us=max(per_call),
+    )
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "executable": sys.executable,
+    }
+
+
+def write_results(path: Path, results: Sequence[BenchmarkResult]) -> None:
+    document = {
+        "schema": RESULTS_SCHEMA_VERSION,
+        "created_at": datetime.now(tz=UTC).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": [asdict(result) for result in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+
+def read_results(path: Path) -> list[BenchmarkResult]:
+    document = json.loads(path.read_text(encoding="utf-8"))
+    if document.get("schema") != RESULTS_SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported results schema {document.get('schema')!r}")
+    return [BenchmarkResult(**result) for result in document["results"]]
+
+
+def compare(baseline: Sequence[BenchmarkResult], current: Sequence[BenchmarkResult]) -> list[Comparison]:
+    """Pair results by `(name, size)`; benchmarks missing from either side are skipped."""
+    previous = {result.key: result for result in baseline}
+    return [
+        Comparison(
+            name=result.name,
+            size=result.size,
+            baseline_us=previous[result.key].median_us,
+            current_us=result.median_us,
+        )
+        for result in current
+        if result.key in previous
+    ]
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from agent_fleet.agents import async_codex_runner
+from agent_fleet.agents.async_codex_runner import AsyncCodexRunner
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.orchestrator.async_service import AsyncOrchestratorService
+from agent_fleet.persistence.event_writer import ExecutionEventWriter
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.fifo import FIFOQueue
+
+
+def _write_script(tmp_path, *lines: str):  # type: ignore[no-untyped-def]
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text("\n".join(["#!/usr/bin/env bash", *lines]) + "\n", encoding="ascii")
+    os.chmod(script_path, 0o755)
+    return script_path
+
+
+def test_async_codex_runner_persists_json_and_raw_events(tmp_path) -> None:
+    script_path = _write_script(
+        tmp_path,
+        "printf '%s\\n' '{\"type\":\"Task.Started\",\"step\":1}'",
+        "printf '%s\\r\\n' 'plain stdout line'",
+        "printf '%s\\n' 'stderr raw line' >&2",
+        "exit 3",
+    )
+    repository = SQLiteRepository(tmp_path / "runner.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    runner = AsyncCodexRunner(repository, command=(str(script_path),))
+
+    result = asyncio.run(runner.run(execution_id=execution.id, prompt="ignored", working_dir=tmp_path))
+
+    stored_execution = repository.get_execution(execution.id)
+    events = repository.list_execution_events(execution.id)
+    assert result.exit_code == 3
+    assert result.summary == {"json_events": 1, "stdout_lines": 1, "stderr_lines": 1}
+    assert stored_execution is not None
+    assert stored_execution.exit_code == 3
+    assert sorted(event.sequence_number for event in events) == [1, 2, 3]
+    assert any(event.source == "json" and event.event_type == "task_started" for event in events)
+    assert any(event.source == "stdout" and event.payload == "plain stdout line" for event in events)
+    assert any(event.source == "stderr" and event.payload == "stderr raw line" for event in events)
+
+
+def test_async_orchestrator_runs_many_tasks_on_one_thread(tmp_path) -> None:
+    script_path = _write_script(tmp_path, "sleep 0.5", "printf '%s\\n' '{\"type\":\"done\"}'")
+    repository = SQLiteRepository(tmp_path / "service.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    payload = json.dumps({"working_dir": str(tmp_path), "instruction": "do work"})
+    for _ in range(20):
+        queue.enqueue(kind="codex", payload=payload)
+    queue.enqueue(kind="codex", payload=json.dumps({"working_dir": str(tmp_path / "missing")}))
+
+    service = AsyncOrchestratorService(
+        repository,
+        queue,
+        AsyncCodexRunner(repository, command=(str(script_path),)),
+        poll_interval_seconds=0.05,
+        max_concurrency=32,
+    )
+    threads_before = threading.active_count()
+    peak_threads = threads_before
+    started = time.monotonic()
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = started + 10.0
+    while time.monotonic() < deadline:
+        peak_threads = max(peak_threads, threading.active_count())
+        tasks = repository.list_tasks(limit=21)
+        if all(task.status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED} for task in tasks):
+            break
+        time.sleep(0.02)
+    elapsed = time.monotonic() - started
+    service.stop()
+    thread.join(timeout=10.0)
+
+    assert not thread.is_alive()
+    statuses = [task.status for task in repository.list_tasks(limit=21)]
+    assert statuses.count(TaskStatus.SUCCEEDED) == 20
+    assert statuses.count(TaskStatus.FAILED) == 1
+    assert elapsed < 3.0
+    # Twenty concurrent agents would need forty pipe-reader threads with the threaded runtime.
+    assert peak_threads - threads_before < 20
+
+
+def test_async_codex_runner_kills_the_agent_when_a_reader_fails(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(async_codex_runner, "STREAM_LINE_LIMIT_BYTES", 1024)
+    script_path = _write_script(tmp_path, "head -c 4096 /dev/zero | tr '\\0' x", "sleep 30")
+    repository = SQLiteRepository(tmp_path / "async-limit.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    runner = AsyncCodexRunner(repository, command=(str(script_path),))
+
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        asyncio.run(runner.run(execution_id=execution.id, prompt="ignored", working_dir=tmp_path))
+    assert time.monotonic() - started < 10.0
+
+    process_id = repository.get_execution(execution.id).process_id
+    with pytest.raises(ProcessLookupError):
+        os.kill(process_id, 0)
+
+
+def test_async_codex_runner_hands_events_off_on_the_loop(tmp_path, monkeypatch) -> None:
+    script_path = _write_script(tmp_path, "for i in $(seq 1 50); do echo \"line $i\"; done")
+    repository = SQLiteRepository(tmp_path / "async-handoff.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    writer = ExecutionEventWriter(repository)
+    runner = AsyncCodexRunner(repository, command=(str(script_path),), event_writer=writer)
+    offloaded = []
+    original_to_thread = asyncio.to_thread
+
+    async def tracking_to_thread(function, /, *args, **kwargs):  # type: ignore[no-untyped-def]
+        offloaded.append(function)
+        return await original_to_thread(function, *args, **kwargs)
+
+    monkeypatch.setattr(async_codex_runner.asyncio, "to_thread", tracking_to_thread)
+    result = asyncio.run(runner.run(execution_id=execution.id, prompt="ignored", working_dir=tmp_path))
+
+    assert result.exit_code == 0
+    assert writer.put_many not in offloaded
+    assert len(repository.list_execution_events(execution.id)) == 50
+    writer.close()
+
+
+def test_async_codex_runner_waits_for_a_full_event_writer_off_the_loop(tmp_path, monkeypatch) -> None:
+    script_path = _write_script(tmp_path, "for i in $(seq 1 200); do echo \"line $i\"; done")
+    repository = SQLiteRepository(tmp_path / "async-backpressure.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    gate = threading.Event()
+    original = repository.append_execution_events
+
+    def gated_append(events):  # type: ignore[no-untyped-def]
+        gate.wait()
+        return original(events)
+
+    monkeypatch.setattr(repository, "append_execution_events", gated_append)
+    writer = ExecutionEventWriter(repository, flush_interval_seconds=0.01, max_pending=5)
+    runner = AsyncCodexRunner(repository, command=(str(script_path),), event_writer=writer)
+
+    async def scenario() -> int:
+        run = asyncio.ensure_future(
+            runner.run(execution_id=execution.id, prompt="ignored", working_dir=tmp_path)
+        )
+        ticks = 0
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            ticks += 1
+        gate.set()
+        result = await run
+        assert result.exit_code == 0
+        return ticks
+
+    assert asyncio.run(scenario()) == 10
+    assert len(repository.list_execution_events(execution.id)) == 200
+    writer.close()
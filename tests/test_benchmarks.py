@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+from benchmarks.cli import main
+from benchmarks.harness import BenchmarkResult, compare, read_results, write_results
+
+
+def _result(name: str, median_us: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name,
+        size="1k",
+        rounds=3,
+        ops_per_round=10,
+        median_us=median_us,
+        min_us=median_us,
+        max_us=median_us,
+    )
+
+
+def test_compare_pairs_results_and_flags_regressions(tmp_path) -> None:
+    path = tmp_path / "baseline.json"
+    write_results(path, [_result("fast", 10.0), _result("gone", 5.0)])
+    baseline = read_results(path)
+
+    comparisons = compare(baseline, [_result("fast", 13.0), _result("new", 1.0)])
+
+    [fast] = comparisons
+    assert fast.name == "fast"
+    assert fast.regressed(0.25)
+    assert not fast.regressed(0.5)
+
+
+def test_benchmark_cli_writes_results_and_fails_on_regression(tmp_path) -> None:
+    output = tmp_path / "latest.json"
+    baseline = tmp_path / "baseline.json"
+    args = [
+        "--sizes",
+        "1k",
+        "--rounds",
+        "1",
+        "--scale",
+        "0.01",
+        "--filter",
+        "repository.",
+        "--output",
+        str(output),
+        "--baseline",
+        str(baseline),
+        "--work-dir",
+        str(tmp_path / "work"),
+    ]
+
+    saved = CliRunner().invoke(main, [*args, "--save-baseline"])
+    assert saved.exit_code == 0, saved.output
+    document = json.loads(baseline.read_text(encoding="utf-8"))
+    names = {result["name"] for result in document["results"]}
+    assert "repository.dequeue_next_task" in names
+    assert not any(name.startswith("runner.") for name in names)
+
+    for result in document["results"]:
+        result["median_us"] /= 100
+    baseline.write_text(json.dumps(document), encoding="utf-8")
+    regressed = CliRunner().invoke(main, args)
+    assert regressed.exit_code == 1
+    assert "regression(s)" in regressed.output
@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import json
+import math
 import os
+import subprocess
+import threading
+import time
 
-from agent_fleet.agents.codex_runner import CodexRunner
+import pytest
+
+from agent_fleet.agents import codex_runner
+from agent_fleet.agents.codex_runner import CodexRunner, parse_event_line
+from agent_fleet.agents.json_codec import JsonCodec, json_codec
+from agent_fleet.agents.multiplexer import OutputMultiplexer
 from agent_fleet.persistence.repository import SQLiteRepository
 
 
@@ -73,3 +83,148 @@ def test_codex_runner_adds_skip_git_repo_check_outside_git(tmp_path) -> None:
 
     events = repository.list_execution_events(execution.id)
     assert any("--skip-git-repo-check" in event.payload for event in events)
+
+
+def test_verbatim_event_payloads_keep_the_original_line(tmp_path) -> None:
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text(
+        "\n".join(
+            [
+                "#!/usr/bin/env bash",
+                "printf '%s\\n' '{\"type\":\"item.completed\",\"item\":{\"type\":\"agent_message\"}}'",
+                "printf '%s\\n' '{\"event_type\":\"Turn Done\",  \"z\":1, \"a\":2}'",
+                "printf '%s\\n' '[1, 2]'",
+                "printf '%s\\n' '{not json'",
+            ]
+        )
+        + "\n",
+        encoding="ascii",
+    )
+    os.chmod(script_path, 0o755)
+
+    repository = SQLiteRepository(tmp_path / "verbatim.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    runner = CodexRunner(
+        repository,
+        command=(str(script_path),),
+        event_payloads="verbatim",
+        codec=json_codec("json"),
+    )
+
+    result = runner.run(execution_id=execution.id, prompt="ignored", working_dir=tmp_path)
+
+    events = repository.list_execution_events(execution.id)
+    assert result.summary == {"json_events": 3, "stdout_lines": 1, "stderr_lines": 0}
+    assert [(event.source, event.event_type, event.payload) for event in events] == [
+        ("json", "item_completed", '{"type":"item.completed","item":{"type":"agent_message"}}'),
+        ("json", "turn_done", '{"event_type":"Turn Done",  "z":1, "a":2}'),
+        ("json", "json_event", "[1, 2]"),
+        ("stdout", "raw_text", "{not json"),
+    ]
+
+
+def test_normalized_payloads_do_not_depend_on_the_json_backend() -> None:
+    def strict_loads(text: str) -> object:
+        raise json.JSONDecodeError("rejected by backend", text, 0)
+
+    backend = JsonCodec(name="strict", loads=strict_loads)
+    for line in ['{"b": 1, "a": "caf\u00e9"}', '{"n": 123456789012345678901234567890}', '{"x": NaN}']:
+        source, event_type, payload = parse_event_line(
+            line,
+            source="stdout",
+            event_payloads="normalized",
+            codec=backend,
+        )
+        assert (source, event_type) == ("json", "json_event")
+        assert payload == json.dumps(json.loads(line), sort_keys=True)
+
+
+def test_orjson_backend_accepts_what_the_stdlib_accepts() -> None:
+    pytest.importorskip("orjson")
+    codec = json_codec("orjson")
+
+    assert codec.loads('{"type": "a"}') == {"type": "a"}
+    assert math.isnan(codec.loads('{"x": NaN}')["x"])
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{not json")
+
+
+def test_shared_output_multiplexer_serves_concurrent_runs(tmp_path, monkeypatch) -> None:
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text(
+        "\n".join(
+            [
+                "#!/usr/bin/env bash",
+                "for i in $(seq 1 300); do printf '{\"type\":\"step\",\"i\":%d}\\n' \"$i\"; done",
+                "printf '%s\\r\\n' 'windows line'",
+                "printf '%s\\n' 'stderr raw line' >&2",
+                "printf '%s' 'no trailing newline'",
+            ]
+        )
+        + "\n",
+        encoding="ascii",
+    )
+    os.chmod(script_path, 0o755)
+
+    repository = SQLiteRepository(tmp_path / "mux.db")
+    repository.initialize()
+    multiplexer = OutputMultiplexer(read_size=512)
+    runner = CodexRunner(repository, command=(str(script_path),), multiplexer=multiplexer)
+    execution_ids = []
+    for _ in range(4):
+        task = repository.enqueue_task(kind="codex", payload="{}")
+        execution_ids.append(repository.create_execution(task_id=task.id, agent_name="codex").id)
+    # No per-execution reader threads may be started.
+    monkeypatch.setattr(codex_runner, "_enqueue_lines", None)
+
+    results = []
+    runs = [
+        threading.Thread(
+            target=lambda execution_id=execution_id: results.append(
+                runner.run(execution_id=execution_id, prompt="ignored", working_dir=tmp_path)
+            )
+        )
+        for execution_id in execution_ids
+    ]
+    for run in runs:
+        run.start()
+    for run in runs:
+        run.join(timeout=10.0)
+    multiplexer.close()
+
+    assert [result.summary for result in results] == [
+        {"json_events": 300, "stdout_lines": 2, "stderr_lines": 1}
+    ] * 4
+    for execution_id in execution_ids:
+        events = repository.list_execution_events(execution_id)
+        assert [event.sequence_number for event in events] == list(range(1, 304))
+        steps = [json.loads(event.payload)["i"] for event in events if event.source == "json"]
+        assert steps == list(range(1, 301))
+        stdout = [event.payload for event in events if event.source == "stdout"]
+        assert stdout == ["windows line", "no trailing newline"]
+
+
+def test_output_multiplexer_pauses_pipes_of_a_slow_consumer() -> None:
+    process = subprocess.Popen(
+        ["bash", "-c", "for i in $(seq 1000 1999); do echo \"line $i\"; done"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+    )
+    multiplexer = OutputMultiplexer(read_size=64, max_pending_lines=20)
+    batches = multiplexer.watch(process.stdout, process.stderr)
+
+    lines = []
+    peak_pending = 0
+    for batch in batches:
+        time.sleep(0.001)
+        peak_pending = max(peak_pending, batches._pending_lines + len(batch))
+        lines.extend(line for _source, line in batch)
+    process.wait()
+    multiplexer.close()
+
+    assert lines == [f"line {number}\n" for number in range(1000, 2000)]
+    # Past the limit: one more 64-byte read (6 lines) queued, plus the batch in hand.
+    assert peak_pending <= 20 + 12
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+from agent_fleet.cli import main
+from agent_fleet.persistence.repository import SQLiteRepository
+
+
+def test_enqueue_batch_queues_valid_lines_and_reports_bad_ones(tmp_path) -> None:
+    database = tmp_path / "batch.db"
+    lines = [
+        json.dumps({"instruction": "fix the build", "priority": 3}),
+        "",
+        "{not json",
+        json.dumps(
+            {
+                "working_dir": "/repos/other",
+                "github_issue_url": "https://github.com/acme/repo/issues/7",
+                "github_issue_title": "Crash on start",
+                "github_issue_number": 7,
+            }
+        ),
+        json.dumps({"instruction": "x", "github_issue_url": "https://example.com"}),
+        json.dumps({"instruction": "y", "colour": "blue"}),
+    ] + [json.dumps({"instruction": f"task {index}"}) for index in range(5)]
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "--database",
+            str(database),
+            "--runtime-dir",
+            str(tmp_path / "runtime"),
+            "enqueue-batch",
+            "-",
+            "--working-dir",
+            "/repos/default",
+            "--chunk-size",
+            "2",
+        ],
+        input="\n".join(lines) + "\n",
+    )
+
+    assert result.exit_code == 1
+    assert "queued 7 tasks (3 invalid lines skipped)" in result.stdout
+    assert "line 3:" in result.stderr
+    assert "line 5: Provide either a plain --instruction OR github issue fields" in result.stderr
+    assert "line 6: unknown fields: colour" in result.stderr
+
+    repository = SQLiteRepository(database)
+    tasks = repository.list_tasks(limit=20)
+    assert len(tasks) == 7
+    by_working_dir = {task.working_dir for task in tasks}
+    assert by_working_dir == {"/repos/default", "/repos/other"}
+    issue_task = next(task for task in tasks if task.working_dir == "/repos/other")
+    assert json.loads(issue_task.payload)["github_issue"]["number"] == 7
+    assert sorted(task.priority for task in tasks)[-1] == 3
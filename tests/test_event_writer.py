@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from agent_fleet.persistence.event_writer import ExecutionEventWriter
+from agent_fleet.persistence.repository import SQLiteRepository
+
+
+def _repository_with_execution(tmp_path):  # type: ignore[no-untyped-def]
+    repository = SQLiteRepository(tmp_path / "writer.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    return repository, execution
+
+
+def test_event_writer_batches_and_flushes(tmp_path, monkeypatch) -> None:
+    repository, execution = _repository_with_execution(tmp_path)
+    batch_sizes: list[int] = []
+    original = repository.append_execution_events
+
+    def recording_append(events):  # type: ignore[no-untyped-def]
+        batch_sizes.append(len(events))
+        return original(events)
+
+    monkeypatch.setattr(repository, "append_execution_events", recording_append)
+    writer = ExecutionEventWriter(repository, max_batch_size=4, flush_interval_seconds=60.0)
+
+    for sequence_number in range(1, 11):
+        writer.put(
+            execution_id=execution.id,
+            sequence_number=sequence_number,
+            source="stdout",
+            event_type="raw_text",
+            payload=f"line {sequence_number}",
+        )
+    writer.flush()
+
+    events = repository.list_execution_events(execution.id)
+    assert [event.sequence_number for event in events] == list(range(1, 11))
+    assert batch_sizes == [4, 4, 2]
+
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.put(
+            execution_id=execution.id,
+            sequence_number=11,
+            source="stdout",
+            event_type="raw_text",
+            payload="late",
+        )
+
+
+def test_event_writer_flush_surfaces_write_errors(tmp_path) -> None:
+    repository, _execution = _repository_with_execution(tmp_path)
+    writer = ExecutionEventWriter(repository)
+
+    writer.put(
+        execution_id="missing",
+        sequence_number=1,
+        source="stdout",
+        event_type="raw_text",
+        payload=None,  # type: ignore[arg-type]
+    )
+
+    with pytest.raises(Exception):
+        writer.flush()
+    writer.close()
+
+
+def test_event_writer_isolates_failed_rows_to_their_execution(tmp_path) -> None:
+    repository, failing = _repository_with_execution(tmp_path)
+    other_task = repository.enqueue_task(kind="codex", payload="{}")
+    healthy = repository.create_execution(task_id=other_task.id, agent_name="codex")
+    writer = ExecutionEventWriter(repository, max_batch_size=100, flush_interval_seconds=60.0)
+
+    writer.put_many(
+        [
+            {
+                "execution_id": failing.id,
+                "sequence_number": 1,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": None,
+            },
+            {
+                "execution_id": failing.id,
+                "sequence_number": 2,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": "kept",
+            },
+        ]
+    )
+    writer.put_many(
+        [
+            {
+                "execution_id": healthy.id,
+                "sequence_number": number,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": f"line {number}",
+            }
+            for number in range(1, 4)
+        ]
+    )
+
+    writer.flush(healthy.id)
+    assert [event.payload for event in repository.list_execution_events(healthy.id)] == [
+        "line 1",
+        "line 2",
+        "line 3",
+    ]
+    with pytest.raises(Exception):
+        writer.flush(failing.id)
+    assert [event.payload for event in repository.list_execution_events(failing.id)] == ["kept"]
+    writer.flush(failing.id)
+    writer.close()
+
+
+def test_event_writer_fails_a_batch_once_when_the_database_fails(tmp_path, monkeypatch) -> None:
+    repository, first = _repository_with_execution(tmp_path)
+    second = repository.create_execution(task_id=first.task_id, agent_name="codex")
+    writer = ExecutionEventWriter(repository, max_batch_size=100, flush_interval_seconds=60.0)
+    attempts = []
+
+    def disk_full(rows):  # type: ignore[no-untyped-def]
+        attempts.append(len(rows))
+        raise OperationalError("INSERT", {}, sqlite3.OperationalError("database or disk is full"))
+
+    monkeypatch.setattr(repository, "append_execution_events", disk_full)
+    writer.put_many(
+        [
+            {
+                "execution_id": execution.id,
+                "sequence_number": number,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": f"line {number}",
+            }
+            for execution in (first, second)
+            for number in range(1, 9)
+        ]
+    )
+
+    for execution in (first, second):
+        with pytest.raises(OperationalError):
+            writer.flush(execution.id)
+    assert attempts == [16]
+    writer.close()
+
+
+def test_event_writer_bounds_pending_rows_not_batches(tmp_path, monkeypatch) -> None:
+    repository, execution = _repository_with_execution(tmp_path)
+    gate = threading.Event()
+    original = repository.append_execution_events
+
+    def gated_append(events):  # type: ignore[no-untyped-def]
+        gate.wait()
+        return original(events)
+
+    monkeypatch.setattr(repository, "append_execution_events", gated_append)
+    writer = ExecutionEventWriter(repository, flush_interval_seconds=0.01, max_pending=5)
+
+    def rows(first: int) -> list[dict[str, object]]:
+        return [
+            {
+                "execution_id": execution.id,
+                "sequence_number": number,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": f"line {number}",
+            }
+            for number in range(first, first + 3)
+        ]
+
+    writer.put_many(rows(1))
+    assert writer.try_put_many(rows(4)) is False
+    second = threading.Thread(target=writer.put_many, args=(rows(4),))
+    second.start()
+    second.join(timeout=0.3)
+    assert second.is_alive()
+
+    gate.set()
+    second.join(timeout=5.0)
+    assert not second.is_alive()
+    writer.flush(execution.id)
+    assert len(repository.list_execution_events(execution.id)) == 6
+    writer.close()
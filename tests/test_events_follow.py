@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import io
+
+from rich.console import Console
+
+from agent_fleet.cli import _follow_events
+from agent_fleet.persistence.repository import SQLiteRepository
+
+
+def _append(repository: SQLiteRepository, execution_id: str, sequences: range) -> None:
+    repository.append_execution_events(
+        [
+            {
+                "execution_id": execution_id,
+                "sequence_number": sequence,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": f"line {sequence} [not markup]",
+            }
+            for sequence in sequences
+        ]
+    )
+
+
+def test_follow_prints_only_events_past_the_cursor_across_executions(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "follow.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    first = repository.create_execution(task_id=task.id, agent_name="codex")
+    _append(repository, first.id, range(1, 1201))
+    second = repository.create_execution(task_id=task.id, agent_name="codex")
+    _append(repository, second.id, range(1, 3))
+    repository.mark_task_failed(task.id)
+    output = io.StringIO()
+
+    _follow_events(
+        repository,
+        Console(file=output, width=200),
+        task_id=task.id,
+        cursor=(first.id, 1198),
+        interval=0.05,
+    )
+
+    lines = output.getvalue().splitlines()
+    assert [line.split()[:2] for line in lines] == [
+        [first.id, "1199"],
+        [first.id, "1200"],
+        [second.id, "1"],
+        [second.id, "2"],
+    ]
+    assert lines[0].endswith("raw_text: line 1199 [not markup]")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import subprocess
+
+from agent_fleet.workspace.git_facts import GitFactsCache
+
+
+def _git(cwd, *args: str) -> None:  # type: ignore[no-untyped-def]
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True)
+
+
+def test_git_facts_reads_repository_and_remotes_without_git(tmp_path) -> None:
+    _git(tmp_path, "init")
+    _git(tmp_path, "remote", "add", "origin", "git@github.com:example/project.git")
+    nested = tmp_path / "src" / "pkg"
+    nested.mkdir(parents=True)
+    cache = GitFactsCache()
+
+    facts = cache.facts(nested)
+
+    assert facts.is_repo
+    assert facts.root == tmp_path
+    assert facts.has_remote
+    assert facts.origin_url == "git@github.com:example/project.git"
+
+
+def test_git_facts_cache_hits_and_invalidates_on_config_change(tmp_path) -> None:
+    _git(tmp_path, "init")
+    cache = GitFactsCache()
+
+    assert not cache.facts(tmp_path).has_remote
+    assert not cache.facts(tmp_path).has_remote
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    _git(tmp_path, "remote", "add", "upstream", "https://gitlab.com/acme/repo.git")
+
+    facts = cache.facts(tmp_path)
+    assert facts.remotes == {"upstream": "https://gitlab.com/acme/repo.git"}
+    assert cache.misses == 2
+
+
+def test_git_facts_detects_git_init_and_worktrees(tmp_path) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    cache = GitFactsCache()
+
+    assert not cache.facts(repo).is_repo
+
+    _git(repo, "init")
+    _git(repo, "-c", "user.email=a@b.c", "-c", "user.name=a", "commit", "--allow-empty", "-m", "init")
+    _git(repo, "remote", "add", "origin", "https://github.com/acme/repo.git")
+    assert cache.facts(repo).is_repo
+
+    worktree = tmp_path / "worktree"
+    _git(repo, "worktree", "add", "--detach", str(worktree))
+
+    facts = cache.facts(worktree)
+    assert facts.is_repo
+    assert facts.root == worktree
+    assert facts.origin_url == "https://github.com/acme/repo.git"
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+from click.testing import CliRunner
+
+from agent_fleet.cli import main
+from agent_fleet.github.cache import IssueCache
+from agent_fleet.github.issues import IssueFetchResult, fetch_issues
+from agent_fleet.persistence.repository import SQLiteRepository
+
+_STUB_GH = """\
+import json, os, re, sys
+args = sys.argv[1:]
+metadata_only = any(a.startswith("query=") and "body" not in a for a in args) or "number,updatedAt" in args
+with open({log!r}, "a") as log:
+    log.write(" ".join(args[:2]) + (" (metadata)" if metadata_only else "") + "\\n")
+edited = json.loads(os.environ.get("STUB_GH_EDITED", "{{}}"))
+issues = {{n: {{"number": n, "title": edited.get(str(n), f"Issue {{n}}"), "body": f"Body {{n}}",
+          "url": f"https://github.com/acme/repo/issues/{{n}}",
+          "updatedAt": "2026-02-01T00:00:00Z" if str(n) in edited else "2026-01-01T00:00:00Z"}}
+          for n in (1, 2, 3, 5, 8)}}
+graphql_visible = {{1, 2, 3, 8}}
+if args[:2] == ["api", "graphql"]:
+    query = next(a for a in args if a.startswith("query="))
+    numbers = [int(n) for n in re.findall(r"issue\\(number: (\\d+)\\)", query)]
+    data = {{f"i{{n}}": issues[n] if n in graphql_visible else None for n in numbers}}
+    print(json.dumps({{"data": {{"repository": data}}}}))
+    sys.exit(1 if any(v is None for v in data.values()) else 0)
+if args[:2] == ["issue", "view"]:
+    number = int(args[2])
+    if number not in issues:
+        print("GraphQL: Could not resolve to an issue", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(issues[number]))
+    sys.exit(0)
+if args[:2] == ["issue", "list"]:
+    label = args[args.index("--label") + 1]
+    print(json.dumps([issues[n] for n in (2, 8)] if label == "bug" else []))
+    sys.exit(0)
+sys.exit(2)
+"""
+
+
+def _install_stub_gh(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log_path = tmp_path / "gh.log"
+    gh_path = bin_dir / "gh"
+    gh_path.write_text(f"#!{sys.executable}\n" + _STUB_GH.format(log=str(log_path)), encoding="utf-8")
+    os.chmod(gh_path, 0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return log_path
+
+
+def test_fetch_issues_batches_graphql_and_falls_back_per_issue(tmp_path, monkeypatch) -> None:
+    log_path = _install_stub_gh(tmp_path, monkeypatch)
+
+    result = fetch_issues(repo="acme/repo", issue_numbers=[1, 2, 3, 5, 9, 2], max_workers=4)
+
+    assert sorted(result.issues) == [1, 2, 3, 5]
+    assert result.issues[5]["title"] == "Issue 5"
+    assert list(result.errors) == [9]
+    assert "Could not resolve" in result.errors[9]
+    calls = log_path.read_text(encoding="utf-8").splitlines()
+    assert sorted(calls) == ["api graphql", "issue view", "issue view"]
+
+
+def test_enqueue_from_issues_queues_everything_in_one_batch(tmp_path, monkeypatch) -> None:
+    _install_stub_gh(tmp_path, monkeypatch)
+    database = tmp_path / "issues.db"
+    base_args = ["--database", str(database), "--runtime-dir", str(tmp_path / "runtime"), "enqueue-from-issues"]
+
+    by_number = CliRunner().invoke(
+        main,
+        [*base_args, "--working-dir", str(tmp_path), "--repo", "acme/repo", "--issues", "1,3,9"],
+    )
+    by_label = CliRunner().invoke(
+        main,
+        [*base_args, "--working-dir", str(tmp_path), "--repo", "acme/repo", "--label", "bug"],
+    )
+
+    assert by_number.exit_code == 1
+    assert "acme/repo#9:" in by_number.stderr
+    assert "queued 2 tasks from acme/repo (1 failed)" in by_number.stdout
+    assert by_label.exit_code == 0, by_label.output
+    payloads = [json.loads(task.payload) for task in SQLiteRepository(database).list_tasks(limit=10)]
+    assert sorted(payload["github_issue"]["number"] for payload in payloads) == [1, 2, 3, 8]
+    assert all(payload["input_mode"] == "github_issue" for payload in payloads)
+
+
+def test_enqueue_from_issues_reports_failures_under_the_requested_number(tmp_path, monkeypatch) -> None:
+    def fake_fetch_issues(*, repo, issue_numbers, max_workers):  # type: ignore[no-untyped-def]
+        return IssueFetchResult(issues={4: {"title": "No url or number"}}, errors={9: "not found"})
+
+    monkeypatch.setattr("agent_fleet.cli.fetch_issues", fake_fetch_issues)
+    result = CliRunner().invoke(
+        main,
+        [
+            "--database",
+            str(tmp_path / "issues.db"),
+            "--runtime-dir",
+            str(tmp_path / "runtime"),
+            "enqueue-from-issues",
+            "--working-dir",
+            str(tmp_path),
+            "--repo",
+            "acme/repo",
+            "--issues",
+            "4,9",
+            "--no-cache",
+        ],
+    )
+
+    assert result.exit_code == 1
+    assert "acme/repo#4: --github-issue-url is required" in result.stderr
+    assert "acme/repo#9: not found" in result.stderr
+    assert "queued 0 tasks from acme/repo (2 failed)" in result.stdout
+
+
+def test_issue_cache_refetches_only_issues_whose_updated_at_changed(tmp_path, monkeypatch) -> None:
+    log_path = _install_stub_gh(tmp_path, monkeypatch)
+    repository = SQLiteRepository(tmp_path / "cache.db")
+    repository.initialize()
+    cache = IssueCache(repository)
+
+    first = cache.fetch_issues(repo="acme/repo", issue_numbers=[1, 2, 3])
+    log_path.write_text("", encoding="utf-8")
+    second = cache.fetch_issues(repo="acme/repo", issue_numbers=[3, 1, 2])
+    assert log_path.read_text(encoding="utf-8").splitlines() == ["api graphql (metadata)"]
+
+    monkeypatch.setenv("STUB_GH_EDITED", json.dumps({"2": "Renamed"}))
+    log_path.write_text("", encoding="utf-8")
+    third = cache.fetch_issues(repo="acme/repo", issue_numbers=[1, 2, 3])
+
+    assert first.issues == {number: second.issues[number] for number in (1, 2, 3)}
+    assert list(second.issues) == [3, 1, 2]
+    assert third.issues[2]["title"] == "Renamed" and third.issues[1]["title"] == "Issue 1"
+    assert log_path.read_text(encoding="utf-8").splitlines() == ["api graphql (metadata)", "api graphql"]
+    assert (cache.hits, cache.misses) == (5, 4)
+
+    assert repository.evict_cached_issues(max_entries=2) == 1
+    assert repository.evict_cached_issues(fetched_before="9999") == 2
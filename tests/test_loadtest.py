@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+import pytest
+
+from agent_fleet.cli import main
+from agent_fleet.loadtest.fake_agent import parse_mix
+from agent_fleet.persistence.repository import SQLiteRepository
+
+
+def test_parse_mix_rejects_unknown_kinds_and_empty_mixes() -> None:
+    assert parse_mix("json=3, raw=0,stderr=1") == (("json", 3), ("stderr", 1))
+    with pytest.raises(ValueError):
+        parse_mix("json=1,xml=2")
+    with pytest.raises(ValueError):
+        parse_mix("json=0")
+
+
+@pytest.mark.parametrize("runtime", ["threads", "asyncio"])
+def test_loadtest_runs_fake_agents_and_reports(tmp_path, runtime: str) -> None:
+    work_dir = tmp_path / "work"
+    output = tmp_path / "report.json"
+    result = CliRunner().invoke(
+        main,
+        [
+            "--database",
+            str(tmp_path / "untouched.db"),
+            "--runtime-dir",
+            str(tmp_path / "runtime"),
+            "loadtest",
+            "--tasks",
+            "3",
+            "--workers",
+            "2",
+            "--runtime",
+            runtime,
+            "--events-per-second",
+            "40",
+            "--duration",
+            "0.2",
+            "--mix",
+            "json=2,raw=1,stderr=1",
+            "--payload-bytes",
+            "16",
+            "--poll-interval",
+            "0.05",
+            "--sample-interval",
+            "0.05",
+            "--work-dir",
+            str(work_dir),
+            "--output",
+            str(output),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "events/s sustained" in result.output
+    assert not (tmp_path / "untouched.db").exists()
+
+    report = json.loads(output.read_text(encoding="utf-8"))["report"]
+    assert report["succeeded"] == 3
+    assert report["events_ingested"] == 24
+    assert report["database_growth_bytes"] > 0
+    assert report["rss_peak_bytes"] > 0
+    assert {"queue_wait", "dispatch", "first_event", "overhead"} <= set(report["stages"])
+
+    repository = SQLiteRepository(work_dir / "loadtest.db")
+    [task] = repository.list_tasks(limit=1)
+    [execution] = repository.list_executions_for_task(task.id)
+    sources = [event.source for event in repository.list_execution_events(execution.id)]
+    assert sorted(sources) == ["json"] * 4 + ["stderr"] * 2 + ["stdout"] * 2
+
+    rerun = CliRunner().invoke(main, ["loadtest", "--tasks", "1", "--work-dir", str(work_dir)])
+    assert rerun.exit_code != 0
+    assert "already exists" in rerun.output
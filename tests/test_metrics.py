@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from agent_fleet.agents.codex_runner import CodexRunner
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.observability.metrics import FleetMetrics, MetricsRegistry, fleet_metrics
+from agent_fleet.observability.server import MetricsServer, parse_metrics_address
+from agent_fleet.orchestrator.service import OrchestratorService
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.fifo import FIFOQueue
+
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not found in:\n{text}")
+
+
+def test_registry_renders_prometheus_text_format() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs", "Jobs done.", ("kind",))
+    gauge = registry.gauge("depth", "Queue depth.")
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    counter.labels('a"b').inc(2)
+    gauge.set(3)
+    gauge.dec()
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs Jobs done.",
+        "# TYPE jobs counter",
+        'jobs_total{kind="a\\"b"} 2',
+        "# HELP depth Queue depth.",
+        "# TYPE depth gauge",
+        "depth 2",
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+    with pytest.raises(ValueError):
+        registry.counter("jobs", "Duplicate.")
+
+
+def test_parse_metrics_address() -> None:
+    assert parse_metrics_address("9464") == ("127.0.0.1", 9464)
+    assert parse_metrics_address("0.0.0.0:9000") == ("0.0.0.0", 9000)
+    assert parse_metrics_address("[::1]:9000") == ("::1", 9000)
+    with pytest.raises(ValueError):
+        parse_metrics_address("localhost:http")
+
+
+def test_metrics_server_serves_only_metrics_path() -> None:
+    metrics = FleetMetrics()
+    metrics.tasks_dispatched.inc(4)
+    server = MetricsServer("127.0.0.1", 0, metrics.render)
+    server.start()
+    try:
+        host, port = server.address
+        with urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            body = response.read().decode("utf-8")
+        with pytest.raises(HTTPError):
+            urlopen(f"http://{host}:{port}/", timeout=5)
+    finally:
+        server.close()
+    assert _sample(body, "agent_fleet_tasks_dispatched_total") == 4
+
+
+def test_orchestrator_updates_fleet_metrics(tmp_path) -> None:
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text(
+        "#!/usr/bin/env bash\nprintf '%s\\n' '{\"type\":\"a\"}' '{\"type\":\"b\"}'\nexit \"${EXIT_CODE:-0}\"\n",
+        encoding="ascii",
+    )
+    os.chmod(script_path, 0o755)
+    repository = SQLiteRepository(tmp_path / "metrics.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    for _ in range(3):
+        queue.enqueue(kind="codex", payload=json.dumps({"working_dir": str(tmp_path), "instruction": "do work"}))
+    queue.enqueue(kind="codex", payload=json.dumps({"working_dir": str(tmp_path / "missing")}))
+
+    before = fleet_metrics().render()
+    service = OrchestratorService(
+        repository,
+        queue,
+        CodexRunner(repository, command=(str(script_path),)),
+        poll_interval_seconds=0.05,
+        max_workers=2,
+        queue_metrics_interval_seconds=0.05,
+    )
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = time.monotonic() + 10.0
+    while time.monotonic() < deadline:
+        statuses = {task.status for task in repository.list_tasks(limit=4)}
+        if statuses <= {TaskStatus.SUCCEEDED, TaskStatus.FAILED}:
+            break
+        time.sleep(0.02)
+    # Let the dispatcher refresh queue depth once more after the last task.
+    time.sleep(0.3)
+    service.stop()
+    thread.join(timeout=10.0)
+    after = fleet_metrics().render()
+
+    def delta(name: str) -> float:
+        try:
+            previous = _sample(before, name)
+        except AssertionError:
+            previous = 0.0
+        return _sample(after, name) - previous
+
+    assert delta("agent_fleet_tasks_dispatched_total") == 4
+    assert delta("agent_fleet_task_queue_wait_seconds_count") == 4
+    assert delta("agent_fleet_events_ingested_total") == 6
+    assert delta('agent_fleet_agent_exits_total{exit_code="0"}') == 3
+    assert delta('agent_fleet_agent_exits_total{exit_code="none"}') == 1
+    assert delta('agent_fleet_execution_duration_seconds_count{outcome="succeeded"}') == 3
+    assert delta('agent_fleet_db_write_seconds_count{operation="append_events"}') >= 1
+    assert _sample(after, "agent_fleet_executions_running") == 0
+    assert _sample(after, 'agent_fleet_tasks{status="succeeded"}') == 3
+    assert _sample(after, 'agent_fleet_tasks{status="queued"}') == 0
+    assert _sample(after, "agent_fleet_oldest_queued_task_age_seconds") == 0
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from agent_fleet.agents.codex_runner import CodexRunner
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.orchestrator.service import OrchestratorService
+from agent_fleet.orchestrator.slots import SlotManager, SlotState, read_slot_state
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.fifo import FIFOQueue
+
+
+def _write_sleeping_agent(tmp_path, seconds: float):  # type: ignore[no-untyped-def]
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text(
+        "\n".join(
+            [
+                "#!/usr/bin/env bash",
+                f"sleep {seconds}",
+                "printf '%s\\n' '{\"type\":\"done\"}'",
+            ]
+        )
+        + "\n",
+        encoding="ascii",
+    )
+    os.chmod(script_path, 0o755)
+    return script_path
+
+
+def _plain_payload(working_dir) -> str:  # type: ignore[no-untyped-def]
+    return json.dumps(
+        {
+            "working_dir": str(working_dir),
+            "task_type": "feature_implementation",
+            "input_mode": "plain_task",
+            "instruction": "do work",
+            "github_issue": None,
+        }
+    )
+
+
+def _run_until_finished(service: OrchestratorService, repository: SQLiteRepository, count: int) -> float:
+    started = time.monotonic()
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = started + 10.0
+    while time.monotonic() < deadline:
+        tasks = repository.list_tasks(limit=count)
+        if all(task.status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED} for task in tasks):
+            break
+        time.sleep(0.02)
+    elapsed = time.monotonic() - started
+    service.stop()
+    thread.join(timeout=10.0)
+    assert not thread.is_alive()
+    return elapsed
+
+
+def test_orchestrator_runs_tasks_concurrently(tmp_path) -> None:
+    script_path = _write_sleeping_agent(tmp_path, 0.5)
+    repository = SQLiteRepository(tmp_path / "service.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    for _ in range(3):
+        queue.enqueue(kind="codex", payload=_plain_payload(tmp_path))
+
+    service = OrchestratorService(
+        repository,
+        queue,
+        CodexRunner(repository, command=(str(script_path),)),
+        poll_interval_seconds=0.05,
+        max_workers=3,
+    )
+    elapsed = _run_until_finished(service, repository, 3)
+
+    tasks = repository.list_tasks(limit=3)
+    assert [task.status for task in tasks] == [TaskStatus.SUCCEEDED] * 3
+    assert elapsed < 1.4
+
+
+def test_orchestrator_stop_drains_running_executions(tmp_path) -> None:
+    script_path = _write_sleeping_agent(tmp_path, 0.3)
+    repository = SQLiteRepository(tmp_path / "drain.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    task = queue.enqueue(kind="codex", payload=_plain_payload(tmp_path))
+
+    service = OrchestratorService(
+        repository,
+        queue,
+        CodexRunner(repository, command=(str(script_path),)),
+        poll_interval_seconds=0.05,
+        max_workers=2,
+    )
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = time.monotonic() + 5.0
+    while service.slots.busy_count() == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    service.stop()
+    thread.join(timeout=10.0)
+
+    stored = repository.get_task(task.id)
+    assert stored is not None
+    assert stored.status is TaskStatus.SUCCEEDED
+
+
+def test_slot_manager_reports_slot_state(tmp_path) -> None:
+    state_path = tmp_path / "slots.json"
+    release = threading.Event()
+    slots = SlotManager(2, state_path=state_path)
+
+    slots.submit("task-1", release.wait)
+
+    assert slots.free_count() == 1
+    persisted = read_slot_state(state_path)
+    assert [slot.state for slot in persisted] == [SlotState.BUSY, SlotState.IDLE]
+    assert persisted[0].task_id == "task-1"
+
+    release.set()
+    slots.drain()
+
+    assert slots.free_count() == 2
+    assert not state_path.exists()
+
+
+def test_slot_state_file_is_not_overwritten_by_a_stale_write(tmp_path, monkeypatch) -> None:
+    state_path = tmp_path / "slots.json"
+    slots = SlotManager(1, state_path=state_path)
+    stalled = threading.Event()
+    gate = threading.Event()
+    writers: list[threading.Thread] = []
+    real_replace = os.replace
+
+    def slow_replace(source, destination):  # type: ignore[no-untyped-def]
+        # Hold back the "slot is idle again" write of the first task.
+        if threading.current_thread().name.startswith("agent-fleet-slot-") and not writers:
+            writers.append(threading.current_thread())
+            stalled.set()
+            gate.wait(timeout=0.5)
+        real_replace(source, destination)
+
+    monkeypatch.setattr("agent_fleet.orchestrator.slots.os.replace", slow_replace)
+    release = threading.Event()
+    slots.submit("task-1", lambda: None)
+    assert stalled.wait(timeout=5)
+
+    slots.submit("task-2", release.wait)
+    gate.set()
+    writers[0].join(timeout=5)
+
+    persisted = read_slot_state(state_path)
+    assert [(slot.state, slot.task_id) for slot in persisted] == [(SlotState.BUSY, "task-2")]
+    release.set()
+    slots.drain()
+
+
+class _FailingRunner:
+    def __init__(self, repository: SQLiteRepository) -> None:
+        self.repository = repository
+
+    def run(self, *, execution_id: str, prompt: str, working_dir) -> None:  # type: ignore[no-untyped-def]
+        for sequence_number in (1, 2):
+            self.repository.append_execution_event(
+                execution_id=execution_id,
+                sequence_number=sequence_number,
+                source="stdout",
+                event_type="line",
+                payload="partial output",
+            )
+        raise RuntimeError("agent crashed")
+
+
+def test_orchestrator_error_follows_events_the_runner_already_stored(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "service.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    task_id = queue.enqueue(kind="codex", payload=_plain_payload(tmp_path)).id
+
+    service = OrchestratorService(
+        repository,
+        queue,
+        _FailingRunner(repository),  # type: ignore[arg-type]
+        poll_interval_seconds=0.05,
+    )
+    _run_until_finished(service, repository, 1)
+
+    [execution] = repository.list_executions_for_task(task_id)
+    events = repository.list_execution_events(execution.id)
+    assert [(event.sequence_number, event.event_type) for event in events] == [
+        (1, "line"),
+        (2, "line"),
+        (3, "orchestrator_error"),
+    ]
+    assert events[-1].payload == "agent crashed"
+    assert repository.get_task(task_id).status == TaskStatus.FAILED  # type: ignore[union-attr]
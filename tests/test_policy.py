@@ -2,7 +2,7 @@ import subprocess
 
 import pytest
 
-from agent_fleet.prompts.policy import build_prompt
+from agent_fleet.prompts.policy import _normalize_blank_lines, build_prompt
 
 
 def test_feature_implementation_prompt_includes_git_commit_push_and_pr_policy(tmp_path) -> None:
@@ -93,3 +93,17 @@ def test_unknown_input_mode_raises(tmp_path) -> None:
             input_mode="wat",
             working_dir=tmp_path,
         )
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("a\r\n\r\n\r\nb  \r\n", "a\n\nb\n"),
+        ("a\rb\x0cc", "a\nb\nc\n"),
+        ("a\x85\u2028\u2029b\x0b", "a\n\nb\n"),
+        ("  \n a \t\n\n\n\nb\x1c", "a\n\nb\n"),
+    ],
+)
+def test_normalize_blank_lines_treats_every_line_separator_as_a_break(text: str, expected: str) -> None:
+    assert _normalize_blank_lines(text) == expected
+    assert _normalize_blank_lines(text) == _normalize_blank_lines("\n".join(text.splitlines()))
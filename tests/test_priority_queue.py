@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from agent_fleet.persistence.repository import SQLiteRepository, utc_after
+from agent_fleet.queue.priority import PriorityQueue
+
+
+def test_priority_queue_dequeues_highest_priority_first(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "priority.db")
+    repository.initialize()
+    queue = PriorityQueue(repository, aging_interval_seconds=None)
+
+    bulk_first = queue.enqueue(kind="codex", payload="bulk 1")
+    bulk_second = queue.enqueue(kind="codex", payload="bulk 2")
+    hotfix = queue.enqueue(kind="codex", payload="hotfix", priority=10)
+
+    dequeued = [queue.dequeue(), queue.dequeue(), queue.dequeue()]
+
+    assert [task.id for task in dequeued if task is not None] == [
+        hotfix.id,
+        bulk_first.id,
+        bulk_second.id,
+    ]
+    assert queue.dequeue() is None
+
+
+def test_priority_queue_ages_waiting_tasks_at_claim_time(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "aging.db")
+    repository.initialize()
+    queue = PriorityQueue(repository, aging_interval_seconds=60.0, max_aging_boost=3)
+
+    old_low = queue.enqueue(kind="codex", payload="old low")
+    stale_low = queue.enqueue(kind="codex", payload="stale low")
+    fresh_high = queue.enqueue(kind="codex", payload="fresh high", priority=4)
+    with repository.engine.begin() as connection:
+        # Two intervals of waiting lift "old low" to 2; ten would lift
+        # "stale low" to 10, but the boost is capped at 3.
+        connection.execute(
+            text("UPDATE tasks SET queued_at = :queued_at WHERE id = :id"),
+            [
+                {"queued_at": utc_after(-150), "id": old_low.id},
+                {"queued_at": utc_after(-600), "id": stale_low.id},
+            ],
+        )
+
+    claimed = queue.claim(worker_id="worker", limit=3)
+
+    assert [task.id for task in claimed] == [fresh_high.id, stale_low.id, old_low.id]
+    assert [task.priority for task in claimed] == [4, 0, 0]
+
+
+def test_priority_claim_uses_status_priority_index(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "plan.db")
+    repository.initialize()
+
+    with repository.engine.connect() as connection:
+        plan = connection.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE status = 'QUEUED' "
+                "ORDER BY priority DESC, queued_at ASC, id ASC LIMIT 5"
+            )
+        ).fetchall()
+
+    details = " ".join(str(row[-1]) for row in plan)
+    assert "idx_tasks_status_priority_queued_at" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from agent_fleet.prompts.registry import TemplateRegistry, compile_template
+
+
+def test_compiled_template_renders_by_joining_segments() -> None:
+    template = compile_template("t.md", "Hello {{ name }}!\n{{greeting}} from {{name}}")
+
+    assert template.variables == frozenset({"name", "greeting"})
+    assert template.render({"name": "fleet", "greeting": "Hi"}) == "Hello fleet!\nHi from fleet"
+    with pytest.raises(ValueError, match="missing template variable: greeting"):
+        template.render({"name": "fleet"})
+
+
+def test_registry_reloads_only_when_mtime_changes(tmp_path) -> None:
+    template_path = tmp_path / "task.md"
+    template_path.write_text("v1 {{working_dir}}", encoding="utf-8")
+    registry = TemplateRegistry(tmp_path, variables={"working_dir"})
+
+    assert registry.render("task.md", {"working_dir": "/w"}) == "v1 /w"
+    assert registry.render("task.md", {"working_dir": "/w"}) == "v1 /w"
+    assert registry.timings()["task.md"].loads == 1
+    assert registry.timings()["task.md"].renders == 2
+
+    template_path.write_text("v2 {{working_dir}}", encoding="utf-8")
+    stat = template_path.stat()
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.render("task.md", {"working_dir": "/w"}) == "v2 /w"
+    assert registry.timings()["task.md"].loads == 2
+
+
+def test_registry_rejects_templates_with_unknown_variables(tmp_path) -> None:
+    (tmp_path / "bad.md").write_text("{{working_dir}} {{typo_block}}", encoding="utf-8")
+    registry = TemplateRegistry(tmp_path, variables={"working_dir"})
+
+    with pytest.raises(ValueError, match="typo_block"):
+        registry.preload(["bad.md"])
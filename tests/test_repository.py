@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from agent_fleet.config import SQLiteSettings
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.persistence.repository import SQLiteRepository, task_cursor
+
+
+def _busy_error() -> OperationalError:
+    return OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_write_retries_on_busy_database(tmp_path, monkeypatch) -> None:
+    repository = SQLiteRepository(
+        tmp_path / "retry.db",
+        sqlite_settings=SQLiteSettings(busy_retries=3, busy_retry_delay_seconds=0.0),
+    )
+    repository.initialize()
+
+    original_commit = Session.commit
+    failures = {"remaining": 2}
+
+    def flaky_commit(self):  # type: ignore[no-untyped-def]
+        if failures["remaining"]:
+            failures["remaining"] -= 1
+            raise _busy_error()
+        return original_commit(self)
+
+    monkeypatch.setattr("sqlmodel.Session.commit", flaky_commit)
+
+    task = repository.enqueue_task(kind="codex", payload="{}")
+
+    assert failures["remaining"] == 0
+    assert repository.get_task(task.id) is not None
+
+
+def test_write_gives_up_after_retry_budget(tmp_path, monkeypatch) -> None:
+    repository = SQLiteRepository(
+        tmp_path / "retry-exhausted.db",
+        sqlite_settings=SQLiteSettings(busy_retries=1, busy_retry_delay_seconds=0.0),
+    )
+    repository.initialize()
+
+    def always_busy(self):  # type: ignore[no-untyped-def]
+        raise _busy_error()
+
+    monkeypatch.setattr("sqlmodel.Session.commit", always_busy)
+
+    with pytest.raises(OperationalError):
+        repository.enqueue_task(kind="codex", payload="{}")
+
+
+def test_claim_tasks_claims_a_batch_in_queue_order(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "claim.db")
+    repository.initialize()
+    queued = [repository.enqueue_task(kind="codex", payload=str(index)) for index in range(4)]
+
+    claimed = repository.claim_tasks(worker_id="worker-a", limit=3, lease_seconds=60)
+
+    assert [task.id for task in claimed] == [task.id for task in queued[:3]]
+    assert all(task.status is TaskStatus.RUNNING for task in claimed)
+    assert all(task.claimed_by == "worker-a" for task in claimed)
+    assert all(task.lease_expires_at for task in claimed)
+    assert [task.id for task in repository.claim_tasks(worker_id="worker-b", limit=3)] == [queued[3].id]
+
+
+def test_concurrent_claims_never_share_a_task(tmp_path) -> None:
+    database_path = tmp_path / "claim-race.db"
+    setup = SQLiteRepository(database_path)
+    setup.initialize()
+    for index in range(60):
+        setup.enqueue_task(kind="codex", payload=str(index))
+
+    claimed: dict[str, list[str]] = {}
+
+    def _worker(name: str) -> None:
+        repository = SQLiteRepository(database_path)
+        ids: list[str] = []
+        while True:
+            batch = repository.claim_tasks(worker_id=name, limit=2)
+            if not batch:
+                break
+            ids.extend(task.id for task in batch)
+        claimed[name] = ids
+
+    threads = [threading.Thread(target=_worker, args=(f"worker-{index}",)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [task_id for ids in claimed.values() for task_id in ids]
+    assert len(all_ids) == 60
+    assert len(set(all_ids)) == 60
+
+
+def test_expired_leases_are_requeued(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "lease.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    repository.claim_tasks(worker_id="worker-a", limit=1, lease_seconds=-1)
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+
+    assert repository.renew_task_leases(worker_id="worker-b", task_ids=[task.id]) == 0
+    assert repository.requeue_expired_tasks() == [task.id]
+
+    stored = repository.get_task(task.id)
+    stored_execution = repository.get_execution(execution.id)
+    assert stored is not None and stored.status is TaskStatus.QUEUED
+    assert stored.claimed_by is None
+    assert stored_execution is not None and stored_execution.status is TaskStatus.FAILED
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_task(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "stale.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    repository.claim_tasks(worker_id="worker-a", limit=1, lease_seconds=-1)
+    stale_execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    repository.requeue_expired_tasks()
+    repository.claim_tasks(worker_id="worker-b", limit=1, lease_seconds=60)
+
+    assert repository.mark_task_succeeded(task.id, worker_id="worker-a") is None
+    assert repository.mark_execution_succeeded(execution_id=stale_execution.id, exit_code=0) is None
+    stored = repository.get_task(task.id)
+    assert stored is not None and stored.status is TaskStatus.RUNNING
+    assert stored.claimed_by == "worker-b"
+    assert repository.get_execution(stale_execution.id).status is TaskStatus.FAILED  # type: ignore[union-attr]
+
+    finished = repository.mark_task_failed(task.id, worker_id="worker-b")
+    assert finished is not None and finished.status is TaskStatus.FAILED
+    assert finished.finished_at is not None and finished.lease_expires_at is None
+    with pytest.raises(ValueError):
+        repository.mark_task_canceled("missing-task")
+
+
+def _payload_for(working_dir: str) -> str:
+    return json.dumps({"working_dir": working_dir, "instruction": "x"})
+
+
+def test_claim_skips_tasks_whose_working_dir_is_busy(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "per-dir.db")
+    repository.initialize()
+    first_a = repository.enqueue_task(kind="codex", payload=_payload_for("/repos/a"))
+    second_a = repository.enqueue_task(kind="codex", payload=_payload_for("/repos/a"))
+    first_b = repository.enqueue_task(kind="codex", payload=_payload_for("/repos/b"))
+
+    claimed = repository.claim_tasks(worker_id="worker-a", limit=3, max_per_working_dir=1)
+
+    assert [task.id for task in claimed] == [first_a.id, first_b.id]
+    assert repository.claim_tasks(worker_id="worker-b", limit=3, max_per_working_dir=1) == []
+
+    repository.mark_task_succeeded(first_a.id)
+    reclaimed = repository.claim_tasks(worker_id="worker-b", limit=3, max_per_working_dir=1)
+    assert [task.id for task in reclaimed] == [second_a.id]
+
+
+def _codex_line(index: int) -> str:
+    return json.dumps(
+        {
+            "type": "item.completed",
+            "item": {
+                "id": f"item_{index}",
+                "type": "command_execution",
+                "command": "bash -lc 'pytest -q'",
+                "aggregated_output": "collected 12 items\n............ [100%]\n" * 4,
+                "exit_code": 0,
+                "status": "completed",
+            },
+        }
+    )
+
+
+def test_compressed_event_payloads_round_trip(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "codec.db", event_codec="zlib-dict1")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    payloads = [_codex_line(index) for index in range(3)] + ["short"]
+
+    repository.append_execution_event(
+        execution_id=execution.id, sequence_number=1, source="stdout", event_type="json", payload=payloads[0]
+    )
+    repository.append_execution_events(
+        [
+            {
+                "execution_id": execution.id,
+                "sequence_number": index + 2,
+                "source": "stdout",
+                "event_type": "json",
+                "payload": payload,
+            }
+            for index, payload in enumerate(payloads[1:])
+        ]
+    )
+
+    assert [event.payload for event in repository.list_execution_events(execution.id)] == payloads
+    with sqlite3.connect(tmp_path / "codec.db") as connection:
+        stored = connection.execute(
+            "SELECT payload_codec, length(payload_data) FROM execution_events ORDER BY sequence_number"
+        ).fetchall()
+    assert [codec for codec, _ in stored] == ["zlib-dict1"] * 3 + [None]
+    assert all(size < len(payloads[0]) for _, size in stored[:3])
+
+
+def test_compress_event_payloads_rewrites_plain_rows(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "backfill.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    payloads = [_codex_line(index) for index in range(5)] + ["tiny"]
+    for index, payload in enumerate(payloads):
+        repository.append_execution_event(
+            execution_id=execution.id,
+            sequence_number=index,
+            source="stdout",
+            event_type="json",
+            payload=payload,
+        )
+
+    stats = repository.compress_event_payloads(codec="zlib", batch_size=2)
+
+    assert stats["scanned"] == 6 and stats["compressed"] == 5
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert [event.payload for event in repository.list_execution_events(execution.id)] == payloads
+    assert repository.compress_event_payloads(codec="zlib")["compressed"] == 0
+
+
+def test_compress_event_payloads_retries_a_busy_batch(tmp_path, monkeypatch) -> None:
+    repository = SQLiteRepository(
+        tmp_path / "backfill-busy.db",
+        sqlite_settings=SQLiteSettings(busy_retries=2, busy_retry_delay_seconds=0.0),
+    )
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    payloads = [_codex_line(index) for index in range(4)]
+    for index, payload in enumerate(payloads):
+        repository.append_execution_event(
+            execution_id=execution.id,
+            sequence_number=index,
+            source="stdout",
+            event_type="json",
+            payload=payload,
+        )
+
+    original_commit = Session.commit
+    commits = {"count": 0}
+
+    def busy_second_commit(self):  # type: ignore[no-untyped-def]
+        commits["count"] += 1
+        if commits["count"] == 2:
+            raise _busy_error()
+        return original_commit(self)
+
+    monkeypatch.setattr("sqlmodel.Session.commit", busy_second_commit)
+
+    stats = repository.compress_event_payloads(codec="zlib", batch_size=2)
+
+    assert commits["count"] == 3
+    assert stats["scanned"] == 4 and stats["compressed"] == 4
+    assert [event.payload for event in repository.list_execution_events(execution.id)] == payloads
+
+
+def test_archived_events_are_read_back_transparently(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "archive.db", event_codec="zlib")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    finished = repository.create_execution(task_id=task.id, agent_name="codex")
+    running = repository.create_execution(task_id=task.id, agent_name="codex")
+    payloads = [_codex_line(index) for index in range(20)] + ["done"]
+    for execution in (finished, running):
+        repository.append_execution_events(
+            [
+                {
+                    "execution_id": execution.id,
+                    "sequence_number": index,
+                    "source": "json",
+                    "event_type": "item_completed",
+                    "payload": payload,
+                }
+                for index, payload in enumerate(payloads)
+            ]
+        )
+    repository.mark_execution_succeeded(execution_id=finished.id, exit_code=0)
+    before = repository.list_execution_events(finished.id)
+
+    assert repository.archive_execution_events(older_than_seconds=3600) == {
+        "executions": 0,
+        "events": 0,
+        "archive_bytes": 0,
+    }
+    stats = repository.archive_execution_events(older_than_seconds=-1)
+
+    assert stats["executions"] == 1 and stats["events"] == len(payloads)
+    assert list(repository.archive_dir.rglob("*.jsonl.gz"))
+    with sqlite3.connect(tmp_path / "archive.db") as connection:
+        remaining = connection.execute(
+            "SELECT execution_id, count(*) FROM execution_events GROUP BY execution_id"
+        ).fetchall()
+    assert remaining == [(running.id, len(payloads))]
+
+    after = repository.list_execution_events(finished.id)
+    assert [(event.sequence_number, event.payload) for event in after] == [
+        (event.sequence_number, event.payload) for event in before
+    ]
+    history = repository.get_task_history(task.id)
+    assert history is not None
+    assert [len(item["events"]) for item in history["executions"]] == [len(payloads)] * 2
+    assert repository.archive_execution_events(older_than_seconds=-1)["executions"] == 0
+    assert repository.reclaim_free_pages() > 0
+    with sqlite3.connect(tmp_path / "archive.db") as connection:
+        assert connection.execute("PRAGMA freelist_count").fetchone() == (0,)
+
+
+def test_reclaim_free_pages_never_runs_a_full_vacuum(tmp_path) -> None:
+    database = tmp_path / "legacy.db"
+    legacy = SQLiteRepository(database, sqlite_settings=SQLiteSettings(auto_vacuum="none"))
+    legacy.initialize()
+    task = legacy.enqueue_task(kind="codex", payload="{}")
+    execution = legacy.create_execution(task_id=task.id, agent_name="codex")
+    legacy.append_execution_events(
+        [
+            {
+                "execution_id": execution.id,
+                "sequence_number": number,
+                "source": "stdout",
+                "event_type": "line",
+                "payload": f"{number:06d}" * 200,
+            }
+            for number in range(1, 501)
+        ]
+    )
+    legacy.mark_execution_succeeded(execution_id=execution.id, exit_code=0)
+    assert legacy.archive_execution_events(older_than_seconds=-1)["executions"] == 1
+
+    repository = SQLiteRepository(database)
+    assert repository.reclaim_free_pages() == 0
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+    assert repository.vacuum() > 0
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("PRAGMA freelist_count").fetchone() == (0,)
+        assert connection.execute("PRAGMA auto_vacuum").fetchone() == (2,)
+
+
+def test_list_execution_events_after_reads_past_the_cursor(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "cursor.db")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    execution = repository.create_execution(task_id=task.id, agent_name="codex")
+    repository.append_execution_events(
+        [
+            {
+                "execution_id": execution.id,
+                "sequence_number": sequence,
+                "source": "stdout",
+                "event_type": "raw_text",
+                "payload": f"line {sequence}",
+            }
+            for sequence in range(1, 8)
+        ]
+    )
+
+    page = repository.list_execution_events_after(execution.id, after_sequence=2, limit=3)
+
+    assert [event.sequence_number for event in page] == [3, 4, 5]
+    assert repository.list_execution_events_after(execution.id, after_sequence=7) == []
+
+
+def test_tail_task_events_spans_executions_and_truncates(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "tail.db", event_codec="zlib")
+    repository.initialize()
+    task = repository.enqueue_task(kind="codex", payload="{}")
+    archived = repository.create_execution(task_id=task.id, agent_name="codex")
+    older = repository.create_execution(task_id=task.id, agent_name="codex")
+    newer = repository.create_execution(task_id=task.id, agent_name="codex")
+    for execution, count in ((archived, 3), (older, 4), (newer, 3)):
+        repository.append_execution_events(
+            [
+                {
+                    "execution_id": execution.id,
+                    "sequence_number": sequence,
+                    "source": "json",
+                    "event_type": "item_completed",
+                    "payload": _codex_line(sequence),
+                }
+                for sequence in range(1, count + 1)
+            ]
+        )
+    repository.mark_execution_failed(execution_id=archived.id, exit_code=1)
+    repository.archive_execution_events(older_than_seconds=-1)
+
+    tail = repository.tail_task_events(task.id, limit=5, max_payload_chars=12)
+
+    assert [(row.execution_id, row.sequence_number) for row in tail] == [
+        (older.id, 3),
+        (older.id, 4),
+        (newer.id, 1),
+        (newer.id, 2),
+        (newer.id, 3),
+    ]
+    assert all(row.payload == _codex_line(row.sequence_number)[:12] for row in tail)
+
+    everything = repository.tail_task_events(task.id, limit=None)
+    assert [(row.execution_id, row.sequence_number) for row in everything[:4]] == [
+        (archived.id, 1),
+        (archived.id, 2),
+        (archived.id, 3),
+        (older.id, 1),
+    ]
+    assert len(everything) == 10 and everything[-1].payload == _codex_line(3)
+
+
+def test_list_tasks_pages_with_keyset_cursor_and_filters(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "pages.db")
+    repository.initialize()
+    tasks = [
+        repository.enqueue_task(kind="codex" if index % 2 else "review", payload="{}")
+        for index in range(7)
+    ]
+    repository.mark_task_failed(tasks[0].id)
+
+    seen = []
+    cursor = None
+    while True:
+        page = repository.list_tasks(limit=3, after=cursor)
+        if not page:
+            break
+        seen.extend(task.id for task in page)
+        cursor = task_cursor(page[-1])
+
+    assert seen == [task.id for task in reversed(tasks)]
+    codex = repository.list_tasks(limit=10, kind="codex", status=TaskStatus.QUEUED)
+    assert [task.id for task in codex] == [tasks[5].id, tasks[3].id, tasks[1].id]
+    counts = repository.count_tasks_by_status()
+    assert counts[TaskStatus.QUEUED] == 6 and counts[TaskStatus.FAILED] == 1
+    assert counts[TaskStatus.RUNNING] == 0
+    with pytest.raises(ValueError):
+        repository.list_tasks(after="garbage")
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import os
+import subprocess
+import threading
+import time
 
+from click.testing import CliRunner
 import pytest
 
+from agent_fleet.cli import main, run, start
 from agent_fleet.orchestrator.runtime import RuntimeStateError, acquire_pid_file, read_pid_file
 
 
@@ -22,3 +27,68 @@ def test_acquire_pid_file_replaces_stale_pid_file(tmp_path) -> None:
     acquire_pid_file(pid_file, pid=12345)
 
     assert read_pid_file(pid_file) == 12345
+
+
+def test_start_forwards_every_run_option(tmp_path, monkeypatch) -> None:
+    launched: list[list[str]] = []
+
+    class _Process:
+        pid = 4321
+
+    def fake_popen(args, **_kwargs):  # type: ignore[no-untyped-def]
+        launched.append(list(args))
+        return _Process()
+
+    monkeypatch.setattr("agent_fleet.cli.subprocess.Popen", fake_popen)
+    monkeypatch.setattr("agent_fleet.cli._wait_for_pid_file", lambda *_args, **_kwargs: None)
+    result = CliRunner().invoke(
+        main,
+        [
+            "--runtime-dir",
+            str(tmp_path),
+            "start",
+            "--worker-id",
+            "host-a",
+            "--lease-seconds",
+            "45",
+            "--workers",
+            "3",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    [args] = launched
+    forwarded = args[args.index("run") + 1 :]
+    context = run.make_context("run", forwarded)
+    assert context.params["worker_id"] == "host-a"
+    assert context.params["lease_seconds"] == 45.0
+    assert context.params["workers"] == 3
+    assert context.params["pid_file"] == tmp_path / "orchestrator.pid"
+    run_options = {param.name for param in run.params} - {"pid_file", "help"}
+    assert run_options <= {param.name for param in start.params}
+
+
+def test_stop_waits_for_the_drain_unless_given_a_timeout(tmp_path) -> None:
+    pid_file = tmp_path / "orchestrator.pid"
+    stubborn = subprocess.Popen(["bash", "-c", "trap '' TERM; exec sleep 30"])
+    try:
+        time.sleep(0.2)
+        pid_file.write_text(f"{stubborn.pid}\n", encoding="ascii")
+        result = CliRunner().invoke(main, ["--runtime-dir", str(tmp_path), "stop", "--timeout", "0.3"])
+        assert result.exit_code != 0
+        assert "timed out" in result.output
+    finally:
+        stubborn.kill()
+        stubborn.wait()
+
+    # Exits 0.5 s after SIGTERM, like an orchestrator finishing its last execution.
+    draining = subprocess.Popen(["bash", "-c", "trap 'sleep 0.5; kill $!; exit 0' TERM; sleep 30 & wait"])
+    reaper = threading.Thread(target=draining.wait)
+    reaper.start()
+    time.sleep(0.2)
+    pid_file.write_text(f"{draining.pid}\n", encoding="ascii")
+    result = CliRunner().invoke(main, ["--runtime-dir", str(tmp_path), "stop"])
+    reaper.join(timeout=10.0)
+    assert result.exit_code == 0, result.output
+    assert f"stopped orchestrator pid {draining.pid}" in result.output
+    assert not pid_file.exists()
@@ -1,5 +1,6 @@
 import sqlite3
 
+from agent_fleet.config import SQLiteSettings
 from agent_fleet.persistence.schema import create_sqlite_engine, initialize_schema
 
 
@@ -29,3 +30,21 @@ def test_initialize_schema_creates_expected_tables(tmp_path) -> None:
 
     assert {"process_id", "exit_code"} <= execution_columns
     assert {"sequence_number", "source"} <= event_columns
+
+
+def test_create_sqlite_engine_applies_connection_profile(tmp_path) -> None:
+    engine = create_sqlite_engine(
+        tmp_path / "profile.db",
+        SQLiteSettings(synchronous="normal", busy_timeout_ms=1234, temp_store="memory"),
+    )
+
+    with engine.connect() as connection:
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+        synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+        busy_timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        temp_store = connection.exec_driver_sql("PRAGMA temp_store").scalar()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    assert busy_timeout == 1234
+    assert temp_store == 2
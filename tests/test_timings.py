@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from click.testing import CliRunner
+
+from agent_fleet.agents.codex_runner import CodexRunner
+from agent_fleet.cli import main
+from agent_fleet.domain.models import TaskStatus
+from agent_fleet.observability.timings import EXECUTION_STAGES, stage_percentiles
+from agent_fleet.orchestrator.service import OrchestratorService
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.fifo import FIFOQueue
+
+
+def test_stage_percentiles_use_nearest_rank_and_derive_overhead() -> None:
+    rows = [{"total": float(value), "agent": float(value) - 0.5} for value in range(1, 11)]
+    rows.append({"queue_wait": 3.0})
+
+    summary = stage_percentiles(rows, percentiles=(50, 90))
+
+    assert summary["total"] == {"p50": 5.0, "p90": 9.0, "max": 10.0, "count": 10.0}
+    assert summary["overhead"]["max"] == 0.5
+    assert summary["queue_wait"]["count"] == 1.0
+    assert "spawn" not in summary
+
+
+def test_orchestrator_records_stage_timings_per_execution(tmp_path) -> None:
+    script_path = tmp_path / "fake-codex"
+    script_path.write_text(
+        "#!/usr/bin/env bash\nsleep 0.2\nprintf '%s\\n' '{\"type\":\"a\"}'\nsleep 0.1\n",
+        encoding="ascii",
+    )
+    os.chmod(script_path, 0o755)
+    database = tmp_path / "timings.db"
+    repository = SQLiteRepository(database)
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    task = queue.enqueue(kind="codex", payload=json.dumps({"working_dir": str(tmp_path), "instruction": "go"}))
+    broken = queue.enqueue(kind="codex", payload=json.dumps({"working_dir": str(tmp_path / "missing")}))
+
+    service = OrchestratorService(
+        repository,
+        queue,
+        CodexRunner(repository, command=(str(script_path),)),
+        poll_interval_seconds=0.05,
+        max_workers=2,
+    )
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = time.monotonic() + 10.0
+    while time.monotonic() < deadline:
+        statuses = {stored.status for stored in repository.list_tasks(limit=2)}
+        if statuses <= {TaskStatus.SUCCEEDED, TaskStatus.FAILED}:
+            break
+        time.sleep(0.02)
+    service.stop()
+    thread.join(timeout=10.0)
+
+    [timing] = repository.list_execution_timings(task.id)
+    values = {stage: getattr(timing, f"{stage}_seconds") for stage in EXECUTION_STAGES}
+    assert all(value is not None for value in values.values()), values
+    assert 0.15 <= values["first_event"] <= values["agent"]
+    assert values["agent"] >= 0.25
+    # `spawn` includes marking the execution running, which overlaps the
+    # first moments of `agent`, so the two are bounded by `total` separately.
+    assert values["total"] >= values["agent"] + values["checkout"] + values["prompt_build"]
+    assert values["total"] >= values["spawn"]
+
+    [failed] = repository.list_execution_timings(broken.id)
+    assert failed.agent_seconds is None
+    assert failed.finalize_seconds is not None
+    assert failed.total_seconds is not None
+
+    base_args = ["--database", str(database), "--runtime-dir", str(tmp_path / "runtime"), "timings"]
+    per_task = CliRunner().invoke(main, [*base_args, "--task-id", task.id])
+    assert per_task.exit_code == 0, per_task.output
+    assert "first_event" in per_task.output
+    assert timing.execution_id[:8] in per_task.output
+
+    aggregate = CliRunner().invoke(main, [*base_args, "--kind", "codex"])
+    assert aggregate.exit_code == 0, aggregate.output
+    assert "last 2 executions" in aggregate.output
+    assert "overhead" in aggregate.output
+
+    missing = CliRunner().invoke(main, [*base_args, "--task-id", "nope"])
+    assert missing.exit_code != 0
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import pytest
+
+from agent_fleet.agents.codex_runner import CodexRunner
+from agent_fleet.orchestrator.service import OrchestratorService
+from agent_fleet.orchestrator.wakeup import WakeupListener, notify_orchestrator
+from agent_fleet.persistence.repository import SQLiteRepository
+from agent_fleet.queue.fifo import FIFOQueue
+
+
+def test_notify_orchestrator_wakes_listener(tmp_path) -> None:
+    socket_path = tmp_path / "orchestrator.sock"
+    woken = threading.Event()
+    listener = WakeupListener(socket_path, woken.set)
+
+    assert notify_orchestrator(socket_path) is False
+
+    listener.start()
+    try:
+        assert notify_orchestrator(socket_path) is True
+        assert woken.wait(2.0)
+    finally:
+        listener.close()
+
+    assert not socket_path.exists()
+
+
+def test_wakeup_listener_refuses_a_live_socket_and_replaces_a_stale_one(tmp_path) -> None:
+    socket_path = tmp_path / "orchestrator.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    first = WakeupListener(socket_path, lambda: None)
+    first.start()
+    try:
+        second = WakeupListener(socket_path, lambda: None)
+        with pytest.raises(OSError):
+            second.start()
+        assert socket_path.exists()
+
+        # Once the path belongs to a newer listener, closing the old one leaves it alone.
+        socket_path.unlink()
+        woken = threading.Event()
+        newer = WakeupListener(socket_path, woken.set)
+        newer.start()
+        first.close()
+        assert socket_path.exists()
+        assert notify_orchestrator(socket_path) is True
+        assert woken.wait(2.0)
+        newer.close()
+    finally:
+        first.close()
+    assert not socket_path.exists()
+
+
+def test_enqueue_nudge_dispatches_without_waiting_for_poll(tmp_path) -> None:
+    repository = SQLiteRepository(tmp_path / "wakeup.db")
+    repository.initialize()
+    queue = FIFOQueue(repository)
+    socket_path = tmp_path / "orchestrator.sock"
+    service = OrchestratorService(
+        repository,
+        queue,
+        CodexRunner(repository, command=("true",)),
+        poll_interval_seconds=30.0,
+        wakeup_socket_path=socket_path,
+    )
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while not socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Let the dispatcher reach its idle wait before enqueueing.
+        time.sleep(0.1)
+
+        task = queue.enqueue(kind="codex", payload="{}")
+        enqueued_at = time.monotonic()
+        notify_orchestrator(socket_path)
+        while time.monotonic() < enqueued_at + 5.0:
+            stored = repository.get_task(task.id)
+            if stored is not None and stored.started_at is not None:
+                break
+            time.sleep(0.005)
+        dispatch_latency = time.monotonic() - enqueued_at
+    finally:
+        service.stop()
+        thread.join(timeout=10.0)
+
+    assert dispatch_latency < 1.0
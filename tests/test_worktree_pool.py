@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import subprocess
+
+from agent_fleet.workspace.worktrees import WorktreePool, repository_root
+
+
+def _git(cwd, *args: str) -> str:  # type: ignore[no-untyped-def]
+    completed = subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True)
+    return completed.stdout.strip()
+
+
+def _init_repository(path):  # type: ignore[no-untyped-def]
+    path.mkdir()
+    _git(path, "init")
+    _git(path, "config", "user.email", "fleet@example.com")
+    _git(path, "config", "user.name", "Fleet")
+    (path / "README.md").write_text("hello\n", encoding="utf-8")
+    _git(path, "add", "README.md")
+    _git(path, "commit", "-m", "initial")
+    return path
+
+
+def test_worktree_pool_hands_out_isolated_worktrees_and_reuses_them(tmp_path) -> None:
+    source = _init_repository(tmp_path / "repo")
+    pool = WorktreePool(tmp_path / "pool", max_idle_per_repo=2, max_total=4)
+
+    first = pool.acquire(source)
+    second = pool.acquire(source)
+
+    assert first != second
+    assert (first / "README.md").read_text(encoding="utf-8") == "hello\n"
+    assert pool.stats() == {"total": 2, "busy": 2, "idle": 0}
+
+    (first / "README.md").write_text("dirty\n", encoding="utf-8")
+    (first / "scratch.txt").write_text("tmp\n", encoding="utf-8")
+    pool.release(first)
+
+    reused = pool.acquire(source)
+    assert reused == first
+    assert (reused / "README.md").read_text(encoding="utf-8") == "hello\n"
+    assert not (reused / "scratch.txt").exists()
+
+    pool.close()
+    assert pool.stats()["total"] == 0
+    assert not first.exists()
+
+
+def test_worktree_pool_follows_source_head_and_evicts_idle_worktrees(tmp_path) -> None:
+    source = _init_repository(tmp_path / "repo")
+    pool = WorktreePool(tmp_path / "pool", max_idle_per_repo=1, max_total=4)
+
+    worktrees = [pool.acquire(source) for _ in range(3)]
+    for worktree in worktrees:
+        pool.release(worktree)
+    assert pool.stats() == {"total": 1, "busy": 0, "idle": 1}
+
+    (source / "README.md").write_text("updated\n", encoding="utf-8")
+    _git(source, "commit", "-am", "update")
+
+    worktree = pool.acquire(source)
+    assert (worktree / "README.md").read_text(encoding="utf-8") == "updated\n"
+    pool.close()
+
+
+def test_repository_root_is_none_outside_git(tmp_path) -> None:
+    assert repository_root(tmp_path) is None
+
+
+def test_commits_made_in_a_pooled_worktree_survive_its_reuse(tmp_path) -> None:
+    source = _init_repository(tmp_path / "repo")
+    pool = WorktreePool(tmp_path / "pool", max_idle_per_repo=1, max_total=2)
+
+    worktree = pool.acquire(source, branch="agent-fleet/execution-1")
+    (worktree / "feature.txt").write_text("agent output\n", encoding="utf-8")
+    _git(worktree, "add", "feature.txt")
+    _git(worktree, "commit", "-m", "agent change")
+    commit = _git(worktree, "rev-parse", "HEAD")
+    pool.release(worktree)
+
+    reused = pool.acquire(source, branch="agent-fleet/execution-2")
+    assert reused == worktree
+    assert not (reused / "feature.txt").exists()
+    assert _git(source, "rev-parse", "agent-fleet/execution-1") == commit
+    assert _git(source, "cat-file", "-p", f"{commit}:feature.txt") == "agent output"
+
+    # A branch nothing was committed on is not kept around.
+    pool.release(reused)
+    assert _git(source, "branch", "--list", "agent-fleet/execution-2") == ""
+    pool.close()
+    assert _git(source, "rev-parse", "agent-fleet/execution-1") == commit